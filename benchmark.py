@@ -0,0 +1,1058 @@
+"""
+Offline benchmarks for the attendance scraper
+Serves local page fixtures and drives a real headless Chrome against them
+
+Usage:
+    python benchmark.py detect [--checks 50]
+    python benchmark.py network [--checks 20]
+    python benchmark.py profile [--refreshes 20]   (needs a display, e.g. xvfb-run, for the headed profile)
+    python benchmark.py cadence [--history .attendance-history.json]   (no browser needed; uses the
+                                                                       fixture history until detections are recorded)
+    python benchmark.py e2e [--modes poll,watch,network] [--cadences fixed,adaptive] [--trials 3]
+    python benchmark.py notify [--webhooks 5]   (no browser needed)
+    python benchmark.py tabs [--tabs 1,2,4] [--trials 8]
+    python benchmark.py refresh [--checks 30] [--hard-every 10]
+    python benchmark.py login [--variants button,provider] [--trials 3]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import pytz
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from cadence import CadenceModel, DEFAULT_HISTORY_FILE, simulate
+from config import CHECK_INTERVAL, FAST_CHECK_INTERVAL, LATENCY_BUDGET, TIMEZONE
+from endpoint import AttendanceEndpoint
+from metrics import STAGE_SECONDS
+import scraper
+from scraper import AttendanceBot, GOOGLE_BUTTON_XPATHS, process_tree_cpu, process_tree_rss, psutil
+from settings import Settings
+from store import StateStore
+from tenants import Tenant
+from timetable import Timetable
+from worker import ScraperWorker
+
+logger = logging.getLogger(__name__)
+
+# 23 recorded periods over three weekly slots, for replaying cadence before any real history exists
+FIXTURE_HISTORY_FILE = os.path.join(os.path.dirname(__file__), 'tests', 'fixtures', 'attendance-history.json')
+
+# Dashboard fixture; {button} is replaced with one of the BUTTON_VARIANTS
+DASHBOARD_HTML = """<!doctype html>
+<html>
+<head><title>Kalvium</title></head>
+<body>
+  <nav><a href="#">Your Kalvium Apps</a> <a href="#">My Day</a></nav>
+  <main>
+    <h1>Attendance Hub</h1>
+    {filler}
+    <div id="attendance">{button}</div>
+  </main>
+</body>
+</html>
+"""
+
+BUTTON_VARIANTS = {
+    'none': '',
+    'button': '<button>Mark Attendance</button>',
+    'span': '<button class="btn"><span class="icon"></span><span>MARK ATTENDANCE</span></button>',
+    'role': '<div role="button" tabindex="0"><span>Mark attendance</span></div>',
+    'hidden': '<button style="display:none">Mark Attendance</button>',
+}
+
+# SPA-style dashboard that renders the button from the attendance API
+APP_HTML = """<!doctype html>
+<html>
+<head><title>Kalvium</title></head>
+<body>
+  <h1>Attendance Hub</h1>
+  {filler}
+  <div id="attendance"></div>
+  <script>
+    fetch('/api/attendance', {{headers: {{'Accept': 'application/json'}}}})
+      .then(function (r) {{ return r.json(); }})
+      .then(function (data) {{
+        if (data.attendance.open) {{
+          document.getElementById('attendance').innerHTML = '<button><span>Mark Attendance</span></button>';
+        }}
+      }});
+  </script>
+</body>
+</html>
+"""
+
+# Live dashboard: the SPA re-reads /api/attendance every {refresh_ms} ms and
+# renders {button} once attendance opens, so the button appears at a scripted time
+LIVE_HTML = """<!doctype html>
+<html>
+<head><title>Kalvium</title></head>
+<body>
+  <h1>Attendance Hub</h1>
+  {filler}
+  <div id="attendance"></div>
+  <script>
+    function load() {{
+      fetch('/api/attendance', {{headers: {{'Accept': 'application/json'}}}})
+        .then(function (r) {{ return r.json(); }})
+        .then(function (data) {{
+          var slot = document.getElementById('attendance');
+          if (data.attendance.open && !slot.innerHTML) {{
+            slot.innerHTML = {button};
+          }}
+        }});
+    }}
+    load();
+    setInterval(load, {refresh_ms});
+  </script>
+</body>
+</html>
+"""
+
+# Asset-heavy dashboard: images, web fonts and a video like the real landing page
+MEDIA_HTML = """<!doctype html>
+<html>
+<head>
+  <title>Kalvium</title>
+  <style>
+    @font-face {{ font-family: 'Brand'; src: url('/static/brand.woff2') format('woff2'); }}
+    body {{ font-family: 'Brand', sans-serif; }}
+  </style>
+</head>
+<body>
+  <h1>Attendance Hub</h1>
+  {images}
+  <video src="/static/intro.mp4" autoplay muted></video>
+  {filler}
+  <div id="attendance"></div>
+</body>
+</html>
+"""
+
+# Static asset sizes in bytes served under /static/
+STATIC_ASSETS = {
+    '.png': ('image/png', 150_000),
+    '.woff2': ('font/woff2', 80_000),
+    '.mp4': ('video/mp4', 1_000_000),
+}
+
+# SPA dashboard with a script bundle; like SWR/React Query it re-fetches
+# /api/attendance when the window regains focus or becomes visible
+SPA_HTML = """<!doctype html>
+<html>
+<head><title>Kalvium</title><script src="/bundle.js"></script></head>
+<body>
+  <h1>Attendance Hub</h1>
+  <div id="widgets"></div>
+  <div id="attendance"></div>
+  <script>
+    renderWidgets();
+    var loading = false;
+    function load() {
+      if (loading) return;
+      loading = true;
+      fetch('/api/attendance', {headers: {'Accept': 'application/json'}})
+        .then(function (r) { return r.json(); })
+        .then(function (data) {
+          document.getElementById('attendance').innerHTML =
+            data.attendance.open ? '<button><span>Mark Attendance</span></button>' : '';
+        })
+        .finally(function () { loading = false; });
+    }
+    load();
+    window.addEventListener('focus', load);
+    document.addEventListener('visibilitychange', function () {
+      if (document.visibilityState === 'visible') load();
+    });
+  </script>
+</body>
+</html>
+"""
+
+# Stand-in for the SPA's JS bundle: enough code to make parsing and running it show up per reload
+BUNDLE_JS = '\n'.join(
+    f"function widget{i}(id) {{ return '<div class=\"card\"><button>Open app ' + id + '</button>"
+    f"<span>Widget {i}</span></div>'; }}"
+    for i in range(5000)
+) + """
+function renderWidgets() {
+  var html = '';
+  for (var i = 0; i < 40; i++) html += window['widget' + i](i);
+  document.getElementById('widgets').innerHTML = html;
+}
+"""
+
+# Kalvium login page; the SPA renders {button} after {delay_ms} ms
+LOGIN_HTML = """<!doctype html>
+<html>
+<head><title>Kalvium</title></head>
+<body>
+  <h1>Welcome to Kalvium</h1>
+  <div id="login"></div>
+  <script>
+    setTimeout(function () {{
+      document.getElementById('login').innerHTML = {button};
+      document.getElementById('login').onclick = function () {{
+        location.href = '/accounts.google.com/signin';
+      }};
+    }}, {delay_ms});
+  </script>
+</body>
+</html>
+"""
+
+# "Continue with Google" markup, one per entry of GOOGLE_BUTTON_XPATHS
+LOGIN_BUTTON_VARIANTS = {
+    'button': '<button><span>Continue with Google</span></button>',
+    'text': '<button>Continue with Google</button>',
+    'role': '<div role="button" tabindex="0"><span>Continue with Google</span></div>',
+    'anchor': '<a href="#">Continue with Google</a>',
+    'provider': '<button data-provider="google"><img alt="G" width="20" height="20"></button>',
+}
+
+# Two-step Google sign-in stub that lands on the dashboard
+GOOGLE_HTML = """<!doctype html>
+<html>
+<head><title>Sign in - Google Accounts</title></head>
+<body>
+  <div id="email"><input id="identifierId" type="email"><div id="identifierNext" role="button">Next</div></div>
+  <div id="password" style="display:none">
+    <input name="Passwd" type="password"><div id="passwordNext" role="button">Next</div>
+  </div>
+  <script>
+    document.getElementById('identifierNext').onclick = function () {
+      document.getElementById('email').style.display = 'none';
+      document.getElementById('password').style.display = '';
+    };
+    document.getElementById('passwordNext').onclick = function () { location.href = '/'; };
+  </script>
+</body>
+</html>
+"""
+
+# Roughly the number of widgets on the real dashboard
+FILLER = ''.join(f'<div class="card"><button>Open app {i}</button><span>Widget {i}</span></div>' for i in range(40))
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Serves the dashboard fixtures.
+
+    /           static dashboard; ?variant= selects the button markup
+    /app        SPA dashboard rendered from /api/attendance
+    /live       SPA dashboard that keeps polling /api/attendance; ?variant= as for /
+    /spa        SPA dashboard (script bundle from /bundle.js) that re-fetches on focus
+    /media      asset-heavy dashboard (images, fonts, video from /static/)
+    /login      Kalvium login page; ?button= selects the "Continue with Google" markup
+    /accounts.google.com/signin  email + password stub that redirects to /
+    /api/attendance  JSON stub of the attendance API (open once server.opened_at passes)
+    """
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path == '/api/attendance':
+            self._send(200, 'application/json', json.dumps(self.server.attendance_state()).encode())
+        elif parsed.path == '/app':
+            self._send(200, 'text/html', APP_HTML.format(filler=FILLER).encode())
+        elif parsed.path == '/live':
+            query = parse_qs(parsed.query)
+            button = BUTTON_VARIANTS.get(query.get('variant', ['span'])[0], '')
+            body = LIVE_HTML.format(
+                button=json.dumps(button), filler=FILLER, refresh_ms=int(query.get('refresh', ['1000'])[0])
+            )
+            self._send(200, 'text/html', body.encode())
+        elif parsed.path == '/spa':
+            self._send(200, 'text/html', SPA_HTML.encode())
+        elif parsed.path == '/bundle.js':
+            self._send(200, 'application/javascript', BUNDLE_JS.encode())
+        elif parsed.path == '/login':
+            query = parse_qs(parsed.query)
+            button = LOGIN_BUTTON_VARIANTS.get(query.get('button', ['button'])[0], '')
+            body = LOGIN_HTML.format(button=json.dumps(button), delay_ms=int(query.get('delay', ['300'])[0]))
+            self._send(200, 'text/html', body.encode())
+        elif parsed.path == '/accounts.google.com/signin':
+            self._send(200, 'text/html', GOOGLE_HTML.encode())
+        elif parsed.path == '/media':
+            images = ''.join(f'<img src="/static/img-{i}.png" width="200" height="120">' for i in range(12))
+            self._send(200, 'text/html', MEDIA_HTML.format(images=images, filler=FILLER).encode())
+        elif parsed.path.startswith('/static/'):
+            content_type, size = STATIC_ASSETS.get(os.path.splitext(parsed.path)[1], ('application/octet-stream', 1000))
+            self._send(200, content_type, b'\0' * size)
+        else:
+            variant = parse_qs(parsed.query).get('variant', ['none'])[0]
+            body = DASHBOARD_HTML.format(button=BUTTON_VARIANTS.get(variant, ''), filler=FILLER)
+            self._send(200, 'text/html', body.encode())
+
+    def _send(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.bytes_sent += len(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer:
+    """Local HTTP server running in a background thread"""
+
+    def __init__(self, handler=FixtureHandler):
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self.httpd.opened_at = None
+        self.httpd.bytes_sent = 0
+        self.httpd.attendance_state = self.attendance_state
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def open_attendance(self, delay=0.0):
+        """Make the attendance button appear `delay` seconds from now"""
+        self.httpd.opened_at = time.monotonic() + delay
+
+    def close_attendance(self):
+        self.httpd.opened_at = None
+
+    def attendance_state(self):
+        """Body of the /api/attendance stub; serverTime changes on every call"""
+        opened_at = self.httpd.opened_at
+        return {
+            'serverTime': time.time(),
+            'user': {'name': 'Benchmark Student'},
+            'attendance': {'open': opened_at is not None and time.monotonic() >= opened_at},
+        }
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class RoundTripCounter:
+    """Counts WebDriver commands (one HTTP round-trip each) issued by a driver"""
+
+    def __init__(self, driver):
+        self.count = 0
+        self._execute = driver.execute
+
+        def counting_execute(*args, **kwargs):
+            self.count += 1
+            return self._execute(*args, **kwargs)
+
+        driver.execute = counting_execute
+
+
+def make_headless_driver(capture_network=False):
+    """Plain headless Chrome without a persistent profile"""
+    options = Options()
+    options.add_argument('--headless=new')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--window-size=1280,800')
+    if capture_network:
+        options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    driver = webdriver.Chrome(options=options)
+    if capture_network:
+        driver.execute_cdp_cmd('Network.enable', {})
+    return driver
+
+
+def make_fixture_bot(driver, url):
+    """AttendanceBot wired to an existing driver, treated as logged in"""
+    bot = AttendanceBot('', '', url)
+    bot.driver = driver
+    bot.logged_in = True
+    return bot
+
+
+def summarize(samples_ms):
+    """Median and p95 of a list of millisecond samples"""
+    ordered = sorted(samples_ms)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return statistics.median(ordered), p95
+
+
+def bench_detect(args):
+    """Compare the in-page detector with the legacy XPath cascade"""
+    methods = {
+        'xpath-cascade': AttendanceBot._check_attendance_button_xpath,
+        'in-page-script': AttendanceBot.check_attendance_button,
+    }
+    with FixtureServer() as server:
+        driver = make_headless_driver()
+        try:
+            bot = make_fixture_bot(driver, server.url)
+            bot.install_detector()
+            counter = RoundTripCounter(driver)
+
+            print(f"{'variant':<8} {'method':<15} {'found':<6} {'trips/check':>11} {'median ms':>10} {'p95 ms':>8}")
+            for variant in BUTTON_VARIANTS:
+                driver.get(f"{server.url}/?variant={variant}")
+                for name, method in methods.items():
+                    samples = []
+                    counter.count = 0
+                    found = None
+                    for _ in range(args.checks):
+                        start = time.perf_counter()
+                        found = method(bot)
+                        samples.append((time.perf_counter() - start) * 1000)
+                    median, p95 = summarize(samples)
+                    trips = counter.count / args.checks
+                    print(f"{variant:<8} {name:<15} {str(found):<6} {trips:>11.1f} {median:>10.2f} {p95:>8.2f}")
+        finally:
+            driver.quit()
+
+
+def bench_network(args):
+    """Compare a full reload + DOM check with polling the learned attendance API"""
+    with FixtureServer() as server:
+        driver = make_headless_driver(capture_network=True)
+        try:
+            bot = make_fixture_bot(driver, f"{server.url}/app")
+            bot.install_detector()
+            driver.get(bot.url)
+            time.sleep(0.5)
+
+            endpoint = AttendanceEndpoint.learn(driver)
+            if endpoint is None:
+                print("Failed to learn the attendance endpoint from the stub")
+                return
+            print(f"Learned endpoint: {endpoint.url}")
+
+            counter = RoundTripCounter(driver)
+            reload_ms, poll_ms = [], []
+            for _ in range(args.checks):
+                start = time.perf_counter()
+                bot.refresh_page()
+                bot.check_attendance_button()
+                reload_ms.append((time.perf_counter() - start) * 1000)
+            reload_trips = counter.count / args.checks
+
+            counter.count = 0
+            for _ in range(args.checks):
+                start = time.perf_counter()
+                changed = endpoint.poll()
+                poll_ms.append((time.perf_counter() - start) * 1000)
+            assert changed is False, "volatile fields must not register as a state change"
+
+            server.open_attendance()
+            detected = endpoint.poll()
+            bot.refresh_page()
+            confirmed = bot.check_attendance_button()
+
+            print(f"{'method':<16} {'trips/check':>11} {'median ms':>10} {'p95 ms':>8}")
+            print(f"{'reload + DOM':<16} {reload_trips:>11.1f} {summarize(reload_ms)[0]:>10.2f} {summarize(reload_ms)[1]:>8.2f}")
+            print(f"{'API poll':<16} {counter.count / args.checks:>11.1f} {summarize(poll_ms)[0]:>10.2f} {summarize(poll_ms)[1]:>8.2f}")
+            print(f"Open state detected by API poll: {detected}; confirmed in DOM: {confirmed}")
+        finally:
+            driver.quit()
+
+
+def bench_profile(args):
+    """Compare memory and per-refresh cost of the interactive and monitoring browser profiles"""
+    with FixtureServer() as server:
+        print(f"{'profile':<12} {'RSS MB':>8} {'refresh median ms':>18} {'p95 ms':>8} {'KB/refresh':>11}")
+        for monitoring in (False, True):
+            with tempfile.TemporaryDirectory() as profile_dir:
+                bot = AttendanceBot('', '', f"{server.url}/media", profile_dir=profile_dir)
+                if not bot.setup_driver(monitoring=monitoring):
+                    print(f"Could not start the {'monitoring' if monitoring else 'interactive'} profile")
+                    continue
+                try:
+                    bot.logged_in = True
+                    bot.driver.get(bot.url)
+                    samples = []
+                    server.httpd.bytes_sent = 0
+                    for _ in range(args.refreshes):
+                        start = time.perf_counter()
+                        bot.driver.refresh()
+                        bot.check_attendance_button()
+                        samples.append((time.perf_counter() - start) * 1000)
+                    kb_per_refresh = server.httpd.bytes_sent / args.refreshes / 1024
+                    rss = bot.browser_rss()
+                    rss_mb = f"{rss / 2**20:.0f}" if rss else 'n/a'
+                    median, p95 = summarize(samples)
+                    name = 'monitoring' if monitoring else 'interactive'
+                    print(f"{name:<12} {rss_mb:>8} {median:>18.2f} {p95:>8.2f} {kb_per_refresh:>11.1f}")
+                finally:
+                    bot.close()
+
+
+def bench_tabs(args):
+    """Detection latency of staggered multi-tab polling at a fixed per-tab reload rate.
+
+    Every tab count sees the same button appearance times, spread evenly over
+    one interval.
+    """
+    offsets = [args.interval * (i + 0.5) / args.trials for i in range(args.trials)]
+    print(f"{'tabs':>4} {'tick s':>7} {'reloads/s/tab':>14} {'median s':>9} {'p95 s':>7} {'max s':>7} {'missed':>7}")
+    with FixtureServer() as server:
+        for count in [int(k) for k in args.tabs.split(',')]:
+            # The bot's monitoring profile, so extra tabs get the same per-tab setup as in production
+            with tempfile.TemporaryDirectory() as profile_dir:
+                bot = make_live_bot(f"{server.url}/app", False, profile_dir)
+                if bot is None:
+                    print(f"Could not start a browser for {count} tab(s)")
+                    continue
+                try:
+                    worker = ScraperWorker('', '', bot.url, tabs=count)
+                    tick = args.interval / count
+                    latencies, missed, reloads, polling = [], 0, 0, 0.0
+                    for offset in offsets:
+                        # Start every trial with all tabs showing the closed state
+                        server.close_attendance()
+                        for _ in range(count):
+                            worker._refresh_and_check(bot)
+                        started = time.monotonic()
+                        server.open_attendance(offset)
+                        next_tick = started
+                        while True:
+                            time.sleep(max(0.0, next_tick - time.monotonic()))
+                            found = worker._refresh_and_check(bot)
+                            reloads += 1
+                            now = time.monotonic()
+                            if found:
+                                latencies.append(now - started - offset)
+                                break
+                            if now - started > offset + 2 * args.interval + 30:
+                                missed += 1
+                                break
+                            next_tick = max(next_tick + tick, now)
+                        polling += time.monotonic() - started
+                    median, p95 = summarize(latencies) if latencies else (float('nan'), float('nan'))
+                    print(f"{count:>4} {tick:>7.2f} {reloads / polling / count:>14.3f} {median:>9.2f} {p95:>7.2f} "
+                          f"{max(latencies, default=float('nan')):>7.2f} {missed:>7}")
+                finally:
+                    bot.close()
+
+
+def bench_refresh(args):
+    """Per-check wall time and CPU of a full reload versus a soft refresh of the SPA fixture"""
+    modes = {
+        'hard': dict(soft_refresh=False),
+        'soft': dict(soft_refresh=True, hard_refresh_every=args.checks + 1),
+        f'soft+hard/{args.hard_every}': dict(soft_refresh=True, hard_refresh_every=args.hard_every),
+    }
+    print(f"{'refresh':<14} {'median ms':>10} {'p95 ms':>8} {'CPU ms/check':>13} {'found once open':>16}")
+    for name, options in modes.items():
+        with FixtureServer() as server:
+            driver = make_headless_driver()
+            try:
+                bot = make_fixture_bot(driver, f"{server.url}/spa")
+                bot.install_detector()
+                driver.get(bot.url)
+                worker = ScraperWorker('', '', bot.url, **options)
+                samples = []
+                cpu_before = process_tree_cpu(os.getpid())
+                for _ in range(args.checks):
+                    start = time.perf_counter()
+                    worker._refresh_and_check(bot)
+                    samples.append((time.perf_counter() - start) * 1000)
+                cpu_after = process_tree_cpu(os.getpid())
+
+                server.open_attendance()
+                found = worker._refresh_and_check(bot)
+                cpu = f"{(cpu_after - cpu_before) * 1000 / args.checks:.1f}" if cpu_before is not None else 'n/a'
+                median, p95 = summarize(samples)
+                print(f"{name:<14} {median:>10.2f} {p95:>8.2f} {cpu:>13} {str(found):>16}")
+            finally:
+                driver.quit()
+
+
+def bench_cadence(args):
+    """Replay recorded detection history: adaptive cadence versus a fixed CHECK_INTERVAL.
+
+    Each recorded detection is replayed against a model trained on the
+    remaining samples of its slot (leave-one-out).
+    """
+    path = args.history
+    if path is None:
+        path = DEFAULT_HISTORY_FILE if os.path.exists(DEFAULT_HISTORY_FILE) else FIXTURE_HISTORY_FILE
+        print(f"Replaying {path}")
+    history = CadenceModel(path).history
+    uniform = CadenceModel(path=None, default_interval=CHECK_INTERVAL)
+    results = {'uniform': ([], []), 'adaptive': ([], [])}
+
+    for slot, samples in history.items():
+        for i, appear_at in enumerate(samples):
+            model = CadenceModel(
+                path=None, default_interval=CHECK_INTERVAL,
+                fast_interval=FAST_CHECK_INTERVAL, latency_budget=LATENCY_BUDGET
+            )
+            model.history = {slot: samples[:i] + samples[i + 1:]}
+            for name, m in (('uniform', uniform), ('adaptive', model)):
+                checks, delay = simulate(m, slot, appear_at, args.period)
+                results[name][0].append(checks)
+                if delay is not None:
+                    results[name][1].append(delay)
+
+    if not results['uniform'][0]:
+        print(f"No recorded detections in {path}")
+        return
+
+    print(f"{'cadence':<10} {'periods':>8} {'checks/period':>14} {'median delay s':>15} {'max delay s':>12}")
+    for name, (checks, delays) in results.items():
+        print(f"{name:<10} {len(checks):>8} {statistics.mean(checks):>14.1f} "
+              f"{statistics.median(delays):>15.1f} {max(delays):>12.1f}")
+
+
+class FakeChannel:
+    """Stand-in for a Discord text channel that records when the ping arrives"""
+
+    name = 'benchmark'
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.messages = []
+        self.sent = asyncio.Event()
+        self.sent_at = None
+
+    async def send(self, content=None, **kwargs):
+        # Simulated gateway round-trip before the message counts as delivered
+        await asyncio.sleep(self.latency)
+        self.messages.append(content)
+        self.sent_at = time.monotonic()
+        self.sent.set()
+
+
+def make_live_bot(url, capture_network, profile_dir):
+    """Monitoring-profile AttendanceBot on the live fixture, treated as logged in (worker thread)"""
+    bot = AttendanceBot('', '', url, capture_network=capture_network, profile_dir=profile_dir)
+    if not bot.setup_driver(monitoring=True):
+        return None
+    bot.driver.get(url)
+    bot.logged_in = True
+    return bot
+
+
+def checks_so_far():
+    summary = STAGE_SECONDS.summary(stage='check')
+    return summary[0] if summary else 0
+
+
+async def run_e2e_trial(app, server, mode, adaptive, args, profile_dir):
+    """One scripted period through bot.check_attendance; returns a dict of measurements or None"""
+    tz = pytz.timezone(TIMEZONE)
+    # Pretend it's Monday 10:00, an hour into a 09:00-12:00 period, whatever the real date
+    period_start = tz.localize(datetime(2024, 1, 1, 9, 0))
+    t0 = time.monotonic()
+    schedule = {0: [('09:00', '12:00')]}
+    tenant = Tenant('benchmark', '', '', url=f"{server.url}/live?variant={args.variant}", channel_id=1,
+                    schedule=schedule, ping_message='@everyone Mark attendance')
+    tenant.timetable = Timetable(schedule, TIMEZONE, clock=lambda: period_start + timedelta(
+        seconds=3600 + time.monotonic() - t0
+    ))
+    tenant.worker = ScraperWorker(
+        '', '', tenant.url, mode=mode, check_timeout=args.check_timeout,
+        factory=lambda: make_live_bot(tenant.url, mode == 'network', profile_dir)
+    )
+
+    if adaptive:
+        # History of past periods clustered around the scripted appearance time
+        slot = f"{tenant.name}/0-09:00"
+        app.cadence.history = {slot: [3600 + args.appear_at + jitter for jitter in (-6, -3, 0, 2, 5)]}
+    app.ADAPTIVE_CADENCE = adaptive
+    app.DETECTION_MODE = mode
+    app.settings = Settings(check_interval=args.interval)
+
+    channel = FakeChannel(args.send_latency)
+    app.bot.get_channel = lambda channel_id: channel
+    app.tenants[:] = [tenant]
+    # Every trial replays the same period; let it be pinged again
+    app.notifier.sent.clear()
+    app.notifier.channels.clear()
+    app.state = StateStore(path=None)
+
+    server.httpd.opened_at = None
+    if not await tenant.worker.login():
+        print(f"Could not start the {mode} browser")
+        await tenant.worker.close()
+        return None
+
+    checks_before = checks_so_far()
+    cpu_before = process_tree_cpu(os.getpid())
+    start = time.monotonic()
+    server.open_attendance(args.appear_at)
+    tenant.next_check = start
+    app.check_attendance.start()
+
+    peak_rss = 0
+    deadline = start + args.appear_at + args.timeout
+    while not channel.sent.is_set() and time.monotonic() < deadline:
+        peak_rss = max(peak_rss, process_tree_rss(os.getpid()) or 0)
+        try:
+            await asyncio.wait_for(channel.sent.wait(), 1.0)
+        except asyncio.TimeoutError:
+            pass
+
+    end = channel.sent_at or time.monotonic()
+    cpu_after = process_tree_cpu(os.getpid())
+    app.check_attendance.cancel()
+    task = app.check_attendance.get_task()
+    if task is not None:
+        await asyncio.gather(task, return_exceptions=True)
+    if tenant.task is not None:
+        await asyncio.gather(tenant.task, return_exceptions=True)
+    await tenant.worker.close()
+
+    checks = checks_so_far() - checks_before
+    return {
+        'detected': channel.sent_at is not None,
+        'latency': end - server.httpd.opened_at if channel.sent_at else None,
+        'checks_per_sec': checks / (end - start),
+        'cpu': None if cpu_before is None or cpu_after is None else (cpu_after - cpu_before) / (end - start),
+        'rss': peak_rss,
+    }
+
+
+async def run_e2e(args):
+    # Imported here so the other benchmarks don't need discord.py
+    import bot as app
+
+    app.cadence = CadenceModel(
+        path=None, default_interval=args.interval,
+        fast_interval=FAST_CHECK_INTERVAL, latency_budget=LATENCY_BUDGET
+    )
+    print(f"{'mode':<8} {'cadence':<9} {'detected':>8} {'median s':>9} {'max s':>7} "
+          f"{'checks/s':>9} {'CPU %':>6} {'peak RSS MB':>12}")
+    await app.notifier.start(app.bot)
+    with FixtureServer() as server:
+        for mode in args.modes.split(','):
+            for cadence in args.cadences.split(','):
+                results = []
+                for _ in range(args.trials):
+                    with tempfile.TemporaryDirectory() as profile_dir:
+                        result = await run_e2e_trial(app, server, mode, cadence == 'adaptive', args, profile_dir)
+                    if result:
+                        results.append(result)
+                if not results:
+                    continue
+                latencies = [r['latency'] for r in results if r['detected']]
+                cpu = [r['cpu'] for r in results if r['cpu'] is not None]
+                print(f"{mode:<8} {cadence:<9} {len(latencies):>5}/{len(results):<2} "
+                      f"{statistics.median(latencies) if latencies else float('nan'):>9.2f} "
+                      f"{max(latencies) if latencies else float('nan'):>7.2f} "
+                      f"{statistics.mean(r['checks_per_sec'] for r in results):>9.2f} "
+                      f"{statistics.mean(cpu) * 100 if cpu else float('nan'):>6.1f} "
+                      f"{max(r['rss'] for r in results) / 2**20:>12.0f}")
+    await app.notifier.close()
+
+
+def bench_e2e(args):
+    """Full check_attendance path against the live fixture with a stubbed Discord channel.
+
+    Each trial starts a monitoring-profile browser through ScraperWorker,
+    opens attendance `appear_at` seconds later and runs bot.check_attendance
+    until the fake channel receives the ping. Detection latency is measured
+    from the scripted appearance to the ping; CPU and RSS cover this process
+    plus chromedriver and Chrome.
+    """
+    asyncio.run(run_e2e(args))
+
+
+class FakeWebhookServer:
+    """Local stand-in for Discord's HTTP API (aiohttp, on the running loop).
+
+    POST /webhooks/<id>/<token> answers 429 with Retry-After for the first
+    `rate_limited` requests, then 204 (or `status` if set). Requests are
+    recorded with their arrival time. GET on a webhook (used to warm the
+    connection) and the two REST routes the bot client needs to send a
+    channel message are answered as well.
+    """
+
+    def __init__(self, rate_limited=0, retry_after=0.2, status=204):
+        self.rate_limited = rate_limited
+        self.retry_after = retry_after
+        self.status = status
+        self.requests = []
+        self.runner = None
+        self.port = None
+
+    async def handle(self, request):
+        from aiohttp import web
+
+        self.requests.append((time.monotonic(), await request.json()))
+        if len(self.requests) <= self.rate_limited:
+            return web.json_response(
+                {'message': 'You are being rate limited.', 'retry_after': self.retry_after, 'global': False},
+                status=429, headers={'Retry-After': str(self.retry_after)}
+            )
+        return web.Response(status=self.status)
+
+    async def handle_webhook_info(self, request):
+        from aiohttp import web
+
+        return web.json_response({'id': request.match_info['id'], 'type': 1, 'name': 'benchmark'})
+
+    async def handle_me(self, request):
+        from aiohttp import web
+
+        return web.json_response({'id': '1', 'username': 'benchmark', 'discriminator': '0', 'avatar': None})
+
+    async def handle_message(self, request):
+        from aiohttp import web
+
+        self.requests.append((time.monotonic(), await request.json()))
+        return web.json_response({'id': str(len(self.requests)), 'channel_id': request.match_info['id']})
+
+    @property
+    def api_base(self):
+        return f"http://127.0.0.1:{self.port}/api/v10"
+
+    def url(self, webhook_id='1'):
+        return f"http://127.0.0.1:{self.port}/webhooks/{webhook_id}/token"
+
+    async def __aenter__(self):
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_post('/webhooks/{id}/{token}', self.handle)
+        app.router.add_get('/webhooks/{id}/{token}', self.handle_webhook_info)
+        app.router.add_get('/api/v10/users/@me', self.handle_me)
+        app.router.add_post('/api/v10/channels/{id}/messages', self.handle_message)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, '127.0.0.1', 0).start()
+        self.port = self.runner.addresses[0][1]
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.runner.cleanup()
+
+
+async def run_notify(args):
+    from notify import Notifier
+
+    notifier = Notifier(base_delay=0.1)
+    await notifier.start(None)
+    channel = FakeChannel(args.send_latency)
+    notifier.channels[1] = channel
+    try:
+        print(f"{'scenario':<22} {'delivered':<10} {'requests':>8} {'latency ms':>11}")
+        scenarios = [
+            ('webhook ok', dict()),
+            ('webhook 429 x2', dict(rate_limited=2, retry_after=args.retry_after)),
+            ('webhook 500', dict(status=500)),
+        ]
+        for name, options in scenarios:
+            async with FakeWebhookServer(**options) as server:
+                start = time.monotonic()
+                delivered = await notifier.notify(None, '@everyone', webhook_urls=[server.url()])
+                latency = (time.monotonic() - start) * 1000
+                print(f"{name:<22} {str(delivered):<10} {len(server.requests):>8} {latency:>11.1f}")
+
+        # Fan-out: one channel plus several webhooks, sent concurrently
+        async with FakeWebhookServer() as server:
+            start = time.monotonic()
+            urls = [server.url(str(i)) for i in range(args.webhooks)]
+            delivered = await notifier.notify(None, '@everyone', channel_ids=[1], webhook_urls=urls)
+            await asyncio.sleep(0.2)  # let the remaining targets finish
+            latency = (time.monotonic() - start) * 1000
+            print(f"{f'fan-out 1+{args.webhooks}':<22} {str(delivered):<10} {len(server.requests) + len(channel.messages):>8} "
+                  f"{latency:>11.1f}")
+
+        # Dedupe: the same period key queued twice is sent once
+        async with FakeWebhookServer() as server:
+            first = notifier.notify('tenant/2024-01-01/09:00', '@everyone', webhook_urls=[server.url()])
+            second = notifier.notify('tenant/2024-01-01/09:00', '@everyone', webhook_urls=[server.url()])
+            await first
+            print(f"{'dedupe (2 queued)':<22} {str(second is None):<10} {len(server.requests):>8} {'':>11}")
+    finally:
+        await notifier.close()
+
+
+class GatewayChannel:
+    """Channel that sends through discord.py's own HTTP client, as the bot's channels do"""
+
+    name = 'gateway'
+
+    def __init__(self, http, channel_id):
+        self.http = http
+        self.id = channel_id
+
+    async def send(self, content):
+        import discord.http
+
+        with discord.http.handle_message_parameters(content=content) as params:
+            await self.http.send_message(self.id, params=params)
+
+
+async def run_send_paths(args):
+    """Ping latency of the webhook fast path (cold and warm) versus the bot client's REST path"""
+    import discord.http
+    from notify import Notifier
+
+    async with FakeWebhookServer() as server:
+        # Point the bot client at the stub instead of discord.com
+        discord.http.Route.BASE = server.api_base
+        http = discord.http.HTTPClient(asyncio.get_running_loop())
+        await http.static_login('benchmark-token')
+
+        paths = {
+            'webhook cold': (Notifier(keepalive=0), dict(fast_webhook_url=server.url())),
+            'webhook warm': (Notifier(), dict(fast_webhook_url=server.url())),
+            'bot client': (Notifier(), dict(fallback_channel_ids=[1])),
+        }
+        print(f"{'send path':<14} {'median ms':>10} {'p95 ms':>8}")
+        try:
+            for name, (notifier, targets) in paths.items():
+                await notifier.start(None)
+                notifier.channels[1] = GatewayChannel(http, 1)
+                if name == 'webhook warm':
+                    await notifier.warm(server.url())
+                samples = []
+                for _ in range(args.sends):
+                    start = time.perf_counter()
+                    delivered = await notifier.notify(None, '@everyone', **targets)
+                    samples.append((time.perf_counter() - start) * 1000)
+                    assert delivered
+                    await asyncio.sleep(args.gap)
+                await notifier.close()
+                median, p95 = summarize(samples)
+                print(f"{name:<14} {median:>10.2f} {p95:>8.2f}")
+        finally:
+            await http.close()
+
+
+def bench_notify(args):
+    """Notification dispatcher against a local fake Discord: retries, 429 handling, fan-out, dedupe, send paths"""
+    asyncio.run(run_notify(args))
+    print()
+    asyncio.run(run_send_paths(args))
+
+
+def sequential_race(driver, candidates, timeout, clickable=False, cache=None, page=None, poll=0.5):
+    """The previous lookup: one WebDriverWait per candidate, each with the full timeout"""
+    condition = EC.element_to_be_clickable if clickable else EC.presence_of_element_located
+    for xpath in candidates:
+        try:
+            return WebDriverWait(driver, timeout, poll_frequency=poll).until(condition((By.XPATH, xpath))), xpath
+        except Exception:
+            continue
+    return None, None
+
+
+def bench_login(args):
+    """Full login against the local login/Google fixtures: raced vs sequential selectors, cold vs learned cache"""
+    variants = args.variants.split(',')
+    raced = scraper.race
+    print(f"{'button':<9} {'lookup':<11} {'cache':<8} {'ok':<4} {'median s':>9} {'max s':>7}")
+    with FixtureServer() as server, tempfile.TemporaryDirectory() as tmp:
+        for variant in variants:
+            position = list(LOGIN_BUTTON_VARIANTS).index(variant) + 1
+            for lookup in ('sequential', 'race'):
+                for cache_state in ('cold', 'learned'):
+                    if lookup == 'sequential' and cache_state == 'learned':
+                        continue  # the old lookup had no cache
+                    samples = []
+                    ok = True
+                    cache_path = os.path.join(tmp, f'{variant}.json')
+                    if os.path.exists(cache_path):
+                        os.remove(cache_path)
+                    for _ in range(args.trials + (cache_state == 'learned')):
+                        if cache_state == 'cold' and os.path.exists(cache_path):
+                            os.remove(cache_path)
+                        driver = make_headless_driver()
+                        bot = AttendanceBot('bench@example.com', 'password', f"{server.url}/login?button={variant}")
+                        bot.driver = driver
+                        bot.selectors = scraper.SelectorCache(cache_path)
+                        scraper.race = sequential_race if lookup == 'sequential' else raced
+                        try:
+                            start = time.perf_counter()
+                            ok = bot.login_with_google() and ok
+                            samples.append(time.perf_counter() - start)
+                        finally:
+                            scraper.race = raced
+                            driver.quit()
+                    if cache_state == 'learned':
+                        samples = samples[1:]  # the first login teaches the cache
+                    print(f"{variant:<9} {lookup:<11} {cache_state:<8} {str(ok):<4} "
+                          f"{statistics.median(samples):>9.2f} {max(samples):>7.2f}")
+            print(f"  ('{variant}' matches selector {position} of {len(GOOGLE_BUTTON_XPATHS)})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    detect = sub.add_parser('detect', help='detection round-trips and latency per check')
+    detect.add_argument('--checks', type=int, default=50)
+    detect.set_defaults(func=bench_detect)
+
+    network = sub.add_parser('network', help='reload + DOM check versus polling the attendance API stub')
+    network.add_argument('--checks', type=int, default=20)
+    network.set_defaults(func=bench_network)
+
+    profile = sub.add_parser('profile', help='memory and refresh time of the interactive vs monitoring profile')
+    profile.add_argument('--refreshes', type=int, default=20)
+    profile.set_defaults(func=bench_profile)
+
+    tabs = sub.add_parser('tabs', help='detection latency of staggered multi-tab polling per tab count')
+    tabs.add_argument('--tabs', default='1,2,4', help='comma-separated tab counts')
+    tabs.add_argument('--interval', type=float, default=CHECK_INTERVAL, help='reload interval of each tab in seconds')
+    tabs.add_argument('--trials', type=int, default=8, help='button appearances per tab count')
+    tabs.set_defaults(func=bench_tabs)
+
+    refresh = sub.add_parser('refresh', help='full reload versus soft refresh of an SPA dashboard')
+    refresh.add_argument('--checks', type=int, default=30)
+    refresh.add_argument('--hard-every', type=int, default=10, help='full reload every N checks in the mixed run')
+    refresh.set_defaults(func=bench_refresh)
+
+    cadence = sub.add_parser('cadence', help='replay detection history: adaptive vs fixed polling')
+    cadence.add_argument('--history', help='detection history to replay (default: the recorded one, else the fixture)')
+    cadence.add_argument('--period', type=int, default=3600, help='period length in seconds')
+    cadence.set_defaults(func=bench_cadence)
+
+    e2e = sub.add_parser('e2e', help='full check_attendance path: detection latency, checks/s, CPU and memory')
+    e2e.add_argument('--modes', default='poll,watch,network', help='comma-separated detection modes')
+    e2e.add_argument('--cadences', default='fixed,adaptive', help='comma-separated: fixed, adaptive')
+    e2e.add_argument('--interval', type=float, default=CHECK_INTERVAL, help='fixed check interval in seconds')
+    e2e.add_argument('--trials', type=int, default=3)
+    e2e.add_argument('--appear-at', type=float, default=20.0, help='seconds until the button appears')
+    e2e.add_argument('--variant', default='span', choices=[v for v in BUTTON_VARIANTS if v not in ('none', 'hidden')])
+    e2e.add_argument('--send-latency', type=float, default=0.1, help='simulated Discord send time in seconds')
+    e2e.add_argument('--check-timeout', type=float, default=30.0)
+    e2e.add_argument('--timeout', type=float, default=120.0, help='give up this long after the button appears')
+    e2e.set_defaults(func=bench_e2e)
+
+    notify = sub.add_parser('notify', help='notification retries, rate limits and fan-out against a fake webhook')
+    notify.add_argument('--webhooks', type=int, default=5, help='webhooks in the fan-out scenario')
+    notify.add_argument('--retry-after', type=float, default=0.2, help='Retry-After sent with each 429')
+    notify.add_argument('--send-latency', type=float, default=0.05, help='simulated channel send time in seconds')
+    notify.add_argument('--sends', type=int, default=50, help='pings per send path in the latency comparison')
+    notify.add_argument('--gap', type=float, default=0.05, help='seconds between those pings')
+    notify.set_defaults(func=bench_notify)
+
+    login = sub.add_parser('login', help='Google login flow: raced vs sequential selector lookup, cold vs learned cache')
+    login.add_argument('--variants', default='button,provider',
+                       help=f"comma-separated button markups: {', '.join(LOGIN_BUTTON_VARIANTS)}")
+    login.add_argument('--trials', type=int, default=3)
+    login.set_defaults(func=bench_login)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
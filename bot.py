@@ -5,15 +5,28 @@ Checks for attendance button and pings @everyone when it appears
 import discord
 from discord.ext import commands, tasks
 import logging
-import pytz
-from datetime import datetime, time
 import asyncio
+import functools
+import os
+import time
+from datetime import datetime, timedelta
 
 from config import (
-    DISCORD_TOKEN, ATTENDANCE_CHANNEL_ID, GOOGLE_EMAIL, GOOGLE_PASSWORD,
-    KALVIUM_URL, CHECK_INTERVAL, TIMEZONE, CLASS_SCHEDULE, PING_MESSAGE
+    DISCORD_TOKEN, TIMEZONE, LOGIN_TIMEOUT, CHECK_TIMEOUT, SCRAPER_SOCKET, COORDINATION_DB, INSTANCE_ID,
+    LEASE_TTL, ADAPTIVE_CADENCE, DETECTION_MODE, METRICS_HOST, METRICS_PORT, WEBHOOK_KEEPALIVE, SETTINGS_FILE,
+    SETTINGS_WATCH_INTERVAL, TENANTS_FILE
 )
-from scraper import create_bot as create_scraper_bot
+from cadence import CadenceModel
+from coordination import Coordinator
+from metrics import (
+    Gauge, STAGE_SECONDS, ROUND_TRIPS, DETECTIONS, FAILURES, BROWSER_RECYCLES, PING_LATENCY, DETECTION_LAG,
+    start_http_server
+)
+from notify import Notifier
+from remote import DaemonConnection, RemoteWorker
+from settings import load_settings
+from store import StateStore
+from tenants import load_tenants
 
 # Setup logging
 logging.basicConfig(
@@ -28,125 +41,422 @@ intents.message_content = True
 bot = commands.Bot(command_prefix='!', intents=intents)
 
 # Global variables
-scraper_bot = None
-is_checking = False
-attendance_marked = False
-current_class_period = None
+settings = load_settings()
+tenants = load_tenants(settings=settings)
+settings_stamp = None  # modification times of the watched settings files at the last (re)load
+notifier = Notifier()
+state = StateStore()
+coordinator = Coordinator(COORDINATION_DB, INSTANCE_ID, ttl=LEASE_TTL) if COORDINATION_DB else None
+instance_slot = (0, 1)  # (rank, count) of this instance among the live ones
+cadence = CadenceModel(
+    default_interval=settings.check_interval, fast_interval=settings.fast_check_interval,
+    latency_budget=settings.latency_budget
+)
+
+if SCRAPER_SOCKET:
+    # Browsers live in the scraper daemon; Selenium is never imported here
+    daemon_connection = DaemonConnection(SCRAPER_SOCKET)
+    for tenant in tenants:
+        tenant.worker = RemoteWorker(
+            daemon_connection, tenant.name, login_timeout=LOGIN_TIMEOUT, check_timeout=CHECK_TIMEOUT
+        )
+else:
+    from daemon import build_workers
+    workers, _ = build_workers(tenants)
+    for tenant in tenants:
+        tenant.worker = workers[tenant.name]
+
+
+def browser_memory():
+    """Browser RSS per tenant for the metrics gauge (read at scrape time, off the hot loop)"""
+    return {
+        (tenant.name,): tenant.worker.browser_rss()
+        for tenant in tenants if tenant.worker.ready
+    }
+
+
+Gauge('attendance_browser_rss_bytes', 'Resident memory of the browser process tree', labels=('tenant',),
+      collect=browser_memory)
+metrics_server = None
 
 
 @bot.event
 async def on_ready():
     """Called when the bot is ready"""
+    global metrics_server, settings_stamp
     logger.info(f'Logged in as {bot.user}')
+    if check_attendance.is_running():
+        return
+
+    await notifier.start(bot)
+    await notifier.resolve(channel_id for tenant in tenants for channel_id in tenant.channel_ids)
+
+    if METRICS_PORT and metrics_server is None:
+        try:
+            metrics_server = await start_http_server(METRICS_HOST, METRICS_PORT)
+        except Exception as e:
+            logger.error(f"Failed to start metrics endpoint: {e}")
+
+    # Spread tenants evenly over one check interval
+    now = time.monotonic()
+    spread_phases()
+    for tenant in tenants:
+        tenant.next_check = now + tenant.phase
     check_attendance.start()
+    if SETTINGS_WATCH_INTERVAL and watched_files():
+        settings_stamp = settings_files_stamp()
+        watch_settings.start()
 
 
-def is_class_time():
-    """Check if current time falls within any class period"""
-    tz = pytz.timezone(TIMEZONE)
-    now = datetime.now(tz)
-    
-    # Check if it's a weekday (Monday=0, Sunday=6)
-    weekday = now.weekday()
-    if weekday > 5:  # Sunday and beyond
-        return None
-    
-    current_time = now.time()
-    
-    if weekday not in CLASS_SCHEDULE:
-        return None
-    
-    for start_str, end_str in CLASS_SCHEDULE[weekday]:
-        start_time = datetime.strptime(start_str, '%H:%M').time()
-        end_time = datetime.strptime(end_str, '%H:%M').time()
-        
-        if start_time <= current_time <= end_time:
-            return (start_str, end_str)
-    
-    return None
+def spread_phases():
+    """Stagger tenants' checks evenly over one check interval"""
+    step = settings.check_interval / len(tenants)
+    for index, tenant in enumerate(tenants):
+        tenant.phase = index * step
 
 
-async def send_attendance_ping():
-    """Send attendance ping to Discord channel"""
-    try:
-        channel = bot.get_channel(ATTENDANCE_CHANNEL_ID)
-        if not channel:
-            logger.error(f"Channel with ID {ATTENDANCE_CHANNEL_ID} not found")
-            return False
-        
-        await channel.send(PING_MESSAGE)
-        logger.info(f"Sent attendance ping to channel {channel.name}")
-        return True
-    except Exception as e:
-        logger.error(f"Failed to send Discord message: {e}")
+def tenant_for_channel(channel_id):
+    """The tenant pinging `channel_id`, or the first tenant"""
+    for tenant in tenants:
+        if tenant.channel_id == channel_id:
+            return tenant
+    return tenants[0]
+
+
+def instance_offset(tenant):
+    """This instance's share of the tenant's check interval, so redundant instances poll in turn"""
+    rank, count = instance_slot
+    return rank / count * settings.check_interval / tenant.worker.tabs
+
+
+def cadence_slot(tenant, interval):
+    """The next check time on an `interval` grid that keeps the tenant's phase and this instance's offset"""
+    step = interval / tenant.worker.tabs
+    rank, count = instance_slot
+    offset = (tenant.phase / settings.check_interval + rank / count) * step
+    after = time.monotonic()
+    return after + (offset - after) % step
+
+
+def interleave(rank, count):
+    """Move this instance's checks to its new polling phase after instances joined or left"""
+    global instance_slot
+    if (rank, count) == instance_slot:
+        return
+    logger.info(f"Instance {INSTANCE_ID} is {rank + 1} of {count}; interleaving checks")
+    before = {tenant.name: instance_offset(tenant) for tenant in tenants}
+    instance_slot = (rank, count)
+    for tenant in tenants:
+        tenant.next_check += instance_offset(tenant) - before[tenant.name]
+
+
+def ping_key(tenant):
+    """Identifies the ping for the tenant's current class period (notifier dedupe and coordination lease)"""
+    return f"{tenant.name}/{tenant.record['date']}/{tenant.record['period_start']}"
+
+
+async def send_attendance_ping(tenant, since=None):
+    """Queue the attendance ping for the tenant's current class period.
+
+    Delivery happens on the notifier, so the check loop never waits on
+    Discord. With redundant instances only the holder of the period's lease
+    pings. Returns False if another instance holds it and has not delivered
+    yet; the caller keeps checking so it can take over.
+    """
+    period = tenant.current_class_period
+    record = tenant.record
+    key = ping_key(tenant)
+    if coordinator is not None and not await coordinator.run(coordinator.acquire, key):
+        if await coordinator.run(coordinator.done, key):
+            logger.info(f"[{tenant.name}] Another instance already pinged for class {period}")
+            return True
+        logger.info(f"[{tenant.name}] Another instance is sending the ping for class {period}; standing by")
         return False
+    delivery = notifier.notify(key, tenant.ping_message, since=since, **tenant.ping_targets())
+    if delivery is None:
+        return True
 
+    def on_delivered(future):
+        state.record_ping(record, future.result())
+        if coordinator is not None:
+            # Not awaited: the lease update must not hold up the callback
+            if future.result():
+                coordinator.run(coordinator.complete, key)
+            else:
+                coordinator.run(coordinator.release, key)
+        if future.result():
+            logger.info(f"[{tenant.name}] ✓ Successfully pinged @everyone for class {period}")
+        elif tenant.current_class_period == period:
+            # Every target failed; the next check detects the button and tries again
+            tenant.attendance_marked = False
 
-@tasks.loop(seconds=10)
-async def check_attendance():
-    """Main task to check for attendance button every 10 seconds"""
-    global scraper_bot, is_checking, attendance_marked, current_class_period
-    
+    delivery.add_done_callback(on_delivered)
+    return True
+
+
+async def check_tenant(tenant):
+    """Run one attendance check for a tenant and schedule its next one"""
     try:
         # Check if we're in class time
-        class_period = is_class_time()
-        
+        class_period = tenant.timetable.current_period()
+
         if not class_period:
             # Not in class time
-            if is_checking:
-                logger.info("Class period ended, stopping attendance check")
-                is_checking = False
-                attendance_marked = False
-                current_class_period = None
+            now = time.monotonic()
+            if tenant.is_checking:
+                logger.info(f"[{tenant.name}] Class period ended, stopping attendance check")
+                tenant.is_checking = False
+                tenant.attendance_marked = False
+                tenant.current_class_period = None
+                tenant.record = None
+                state.flush()
+            if tenant.idle_since is None:
+                tenant.idle_since = now
+
+            # Sleep until the next period starts instead of ticking all day,
+            # waking early to warm up the browser or to close an idle one
+            until_start = tenant.timetable.seconds_until_next_start()
+            until_warmup = None if until_start is None else until_start - settings.warmup_lead_time
+            if until_warmup is not None and until_warmup <= 0:
+                if not tenant.worker.ready:
+                    logger.info(f"[{tenant.name}] Warming up browser {until_start:.0f}s before class")
+                    await tenant.worker.login()
+                else:
+                    await tenant.worker.supervise()
+                notifier.keep_warm(tenant.ping_webhook_url, WEBHOOK_KEEPALIVE)
+                # Retry a failed warm-up on the normal cadence
+                wake = [until_start if tenant.worker.ready else min(until_start, settings.check_interval)]
+            else:
+                idle_for = now - tenant.idle_since
+                if tenant.worker.ready and settings.idle_timeout and idle_for >= settings.idle_timeout:
+                    logger.info(f"[{tenant.name}] No class for {idle_for:.0f}s, closing browser")
+                    await tenant.worker.release()
+                wake = [settings.max_idle_sleep if until_warmup is None else until_warmup]
+                if tenant.worker.ready and settings.idle_timeout:
+                    wake.append(settings.idle_timeout - idle_for)
+            idle = min(min(wake), settings.max_idle_sleep)
+            tenant.next_check = time.monotonic() + max(idle, 0) + tenant.phase + instance_offset(tenant)
             return
-        
-        # We're in class time
-        if not is_checking:
-            logger.info(f"Starting attendance check for class {class_period[0]}-{class_period[1]}")
-            is_checking = True
-            attendance_marked = False
-            current_class_period = class_period
-        
-        # Initialize scraper if not already done
-        if scraper_bot is None:
-            logger.info("Initializing Kalvium scraper...")
-            scraper_bot = create_scraper_bot(GOOGLE_EMAIL, GOOGLE_PASSWORD, KALVIUM_URL)
-            if not scraper_bot:
-                logger.error("Failed to initialize scraper bot")
-                return
-        
+
+        tenant.idle_since = None
+
+        # We're in class time; a new period (even one right after the last) starts fresh
+        if class_period != tenant.current_class_period:
+            if tenant.is_checking:
+                logger.info(f"[{tenant.name}] Class period {'-'.join(tenant.current_class_period)} ended")
+                state.flush()
+            logger.info(f"[{tenant.name}] Starting attendance check for class {class_period[0]}-{class_period[1]}")
+            tenant.is_checking = True
+            tenant.attendance_marked = False
+            tenant.current_class_period = class_period
+            tenant.last_miss = None
+            tenant.record = state.open_period(tenant.name, tenant.timetable.clock().date().isoformat(), class_period)
+            if tenant.record['ping_ok']:
+                # Restarted after this period was already pinged
+                logger.info(f"[{tenant.name}] Attendance for this class was already pinged; not pinging again")
+                tenant.attendance_marked = True
+
+        # Initialize scraper if not already done (runs on the scraper thread)
+        if not await tenant.worker.login():
+            return
+
+        if (not tenant.attendance_marked and coordinator is not None
+                and await coordinator.run(coordinator.done, ping_key(tenant))):
+            logger.info(f"[{tenant.name}] Another instance pinged for this class; stopping checks")
+            tenant.attendance_marked = True
+
         # Refresh and check for the Mark Attendance button
-        if not attendance_marked:
-            scraper_bot.refresh_page()
-            button_found = scraper_bot.check_attendance_button()
-            logger.info(f"[Check] Button found: {button_found}")
-            
+        if not tenant.attendance_marked:
+            # Keep the fast-path webhook connection open while the ping may be needed
+            notifier.keep_warm(tenant.ping_webhook_url, WEBHOOK_KEEPALIVE)
+            check_started = time.monotonic()
+            button_found = await tenant.worker.check(settings.check_interval)
+            logger.info(f"[{tenant.name}] [Check] Button found: {button_found}")
+            slot = tenant.timetable.current_slot()
+            state.record_check(tenant.record)
+
             if button_found:
-                logger.info("✓ Attendance button detected!")
-                if await send_attendance_ping():
-                    attendance_marked = True
-                    logger.info(f"✓ Successfully pinged @everyone for class {current_class_period}")
+                if tenant.record['detected_at'] is None:
+                    logger.info(f"[{tenant.name}] ✓ Attendance button detected!")
+                    state.record_detection(tenant.record)
+                    if tenant.last_miss is not None:
+                        DETECTION_LAG.observe(time.monotonic() - tenant.last_miss)
+                    if slot:
+                        cadence.record(f"{tenant.name}/{slot[0]}", slot[1])
+                # Stays unmarked while another instance holds the ping, to take over if it fails
+                tenant.attendance_marked = await send_attendance_ping(tenant, since=check_started)
+            elif ADAPTIVE_CADENCE and DETECTION_MODE != 'watch' and slot:
+                # (a watch check already waits a whole interval for the button; keep it back to back)
+                tenant.last_miss = check_started
+                interval = cadence.interval(f"{tenant.name}/{slot[0]}", slot[1])
+                tenant.next_check = cadence_slot(tenant, interval)
+                logger.debug(f"[{tenant.name}] Attendance button not found, will check again in {interval:.0f}s")
             else:
-                logger.debug("Attendance button not found, will check again in 10s")
-    
+                tenant.last_miss = check_started
+                logger.debug(
+                    f"[{tenant.name}] Attendance button not found, will check again in {settings.check_interval}s"
+                )
+
+        # Sample browser health; a degraded browser is only recycled once this period's ping is done
+        await tenant.worker.supervise(critical=not tenant.attendance_marked)
+
     except Exception as e:
-        logger.error(f"Error in check_attendance task: {e}")
+        logger.error(f"[{tenant.name}] Error in check_attendance task: {e}")
+
+
+@tasks.loop(seconds=settings.check_interval)
+async def check_attendance():
+    """Main task: start the checks of tenants that are due, then sleep until the next one is.
+
+    Each tenant's check runs as its own task, so one tenant's slow login or
+    long-poll never holds up the others; a tenant whose previous check is
+    still running is skipped and re-planned once it finishes. Inside class
+    periods a tenant is due every check interval (staggered across tenants;
+    with multi-tab polling once per tab in that time); outside them it is
+    due when its browser should be warmed up or closed, or at the next
+    period start.
+    """
+    if coordinator is not None:
+        interleave(*await coordinator.run(coordinator.heartbeat))
+    now = time.monotonic()
+    for tenant in tenants:
+        if tenant.next_check > now or busy(tenant):
+            continue
+        tenant.next_check = max(tenant.next_check + settings.check_interval / tenant.worker.tabs, now)
+        tenant.task = asyncio.create_task(check_tenant(tenant))
+        tenant.task.add_done_callback(functools.partial(check_finished, tenant))
+
+    # Busy tenants wake the loop when their check finishes
+    idle = [tenant.next_check for tenant in tenants if not busy(tenant)]
+    delay = min(idle) - now if idle else settings.check_interval
+    if coordinator is not None:
+        # Heartbeat often enough that held leases never lapse
+        delay = min(delay, coordinator.ttl / 3)
+    schedule_check_loop(now + max(delay, 0.5))
+
+
+def busy(tenant):
+    """True while the tenant's previous check is still running"""
+    return tenant.task is not None and not tenant.task.done()
+
+
+def schedule_check_loop(wake):
+    """Run the check loop's next iteration at monotonic time `wake`.
+
+    The loop counts its interval from when the current iteration was
+    scheduled, which is not when it ran if it was woken early; convert.
+    """
+    if not check_attendance.is_running() or check_attendance.next_iteration is None:
+        return
+    scheduled = check_attendance.next_iteration - timedelta(seconds=check_attendance.seconds)
+    target = discord.utils.utcnow() + timedelta(seconds=wake - time.monotonic())
+    check_attendance.change_interval(seconds=max((target - scheduled).total_seconds(), 0))
+
+
+def check_finished(tenant, _task):
+    """Re-plan right away once a tenant's check finishes (it may be due sooner than the loop sleeps)"""
+    now = time.monotonic()
+    step = settings.check_interval / tenant.worker.tabs
+    if now - tenant.next_check >= step:
+        # A slow check (e.g. a login) ran over whole slots; the check just done covers them
+        tenant.next_check = now + step
+    schedule_check_loop(now)
+
+
+def watched_files():
+    """The settings, tenants and calendar files a reload reads"""
+    calendars = sorted({path for tenant in tenants for path in tenant.calendars})
+    return [path for path in (SETTINGS_FILE, TENANTS_FILE, *calendars) if path]
+
+
+def settings_files_stamp():
+    """Modification times of the watched files (None for a missing one)"""
+    stamp = []
+    for path in watched_files():
+        try:
+            stamp.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            stamp.append(None)
+    return tuple(stamp)
+
+
+async def reload_settings():
+    """Re-read the settings, tenants and calendar files and swap them in without touching the browsers.
+
+    Everything is parsed and validated first; on any error the running
+    settings are kept. Returns None on success, otherwise the error.
+    """
+    global settings, settings_stamp
+    try:
+        fresh_settings = load_settings()
+        fresh = {tenant.name: tenant for tenant in load_tenants(settings=fresh_settings)}
+    except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+        settings_stamp = settings_files_stamp()
+        logger.error(f"Rejected config reload, keeping the current settings: {e}")
+        return str(e) or type(e).__name__
+
+    settings = fresh_settings
+    cadence.default_interval = settings.check_interval
+    cadence.fast_interval = settings.fast_check_interval
+    cadence.latency_budget = settings.latency_budget
+    for tenant in tenants:
+        if tenant.name not in fresh:
+            logger.warning(f"[{tenant.name}] No longer in {TENANTS_FILE}; it is removed on the next restart")
+            continue
+        if fresh[tenant.name].url != tenant.url:
+            if SCRAPER_SOCKET:
+                # The daemon's workers were built from its own copy of the settings
+                logger.warning(f"[{tenant.name}] Dashboard URL changed; restart the scraper daemon to use it")
+            else:
+                logger.info(f"[{tenant.name}] Dashboard URL changed; it takes effect on the next browser login")
+        tenant.update_from(fresh[tenant.name])
+        if not SCRAPER_SOCKET:
+            tenant.worker.url = tenant.url
+    for name in fresh.keys() - {tenant.name for tenant in tenants}:
+        logger.warning(f"[{name}] New in {TENANTS_FILE}; it is added on the next restart")
+    # Taken after the swap so newly listed calendar files are watched too
+    settings_stamp = settings_files_stamp()
+    await notifier.resolve(channel_id for tenant in tenants for channel_id in tenant.channel_ids)
+
+    # Idle tenants may be asleep until a period that moved; re-plan them against the new schedule now
+    spread_phases()
+    now = time.monotonic()
+    for tenant in tenants:
+        if not tenant.is_checking:
+            tenant.next_check = min(tenant.next_check, now)
+    schedule_check_loop(now)
+    logger.info("Reloaded settings")
+    return None
+
+
+@tasks.loop(seconds=SETTINGS_WATCH_INTERVAL or 5)
+async def watch_settings():
+    """Reload once a settings, tenants or calendar file changes on disk"""
+    if settings_files_stamp() != settings_stamp:
+        logger.info("Settings file changed; reloading")
+        await reload_settings()
 
 
 @bot.command(name='status')
 async def status_command(ctx):
     """Check the current status of the attendance bot"""
-    class_period = is_class_time()
-    
     embed = discord.Embed(title="Attendance Bot Status", color=discord.Color.blue())
     embed.add_field(name="Bot Status", value="🟢 Running", inline=False)
-    embed.add_field(name="Currently in Class Time", value="✅ Yes" if is_checking else "❌ No", inline=False)
-    
-    if class_period:
-        embed.add_field(name="Current Class", value=f"{class_period[0]} - {class_period[1]}", inline=False)
-    
-    embed.add_field(name="Attendance Marked", value="✅ Yes" if attendance_marked else "❌ No", inline=False)
-    
+    if coordinator is not None:
+        members = ", ".join(f"**{m}**" if m == INSTANCE_ID else m for m in coordinator.members)
+        embed.add_field(name="Instances", value=members, inline=False)
+
+    for tenant in tenants:
+        class_period = tenant.timetable.current_period()
+        lines = [
+            f"Currently in Class Time: {'✅ Yes' if tenant.is_checking else '❌ No'}",
+            f"Attendance Marked: {'✅ Yes' if tenant.attendance_marked else '❌ No'}",
+        ]
+        if class_period:
+            lines.insert(1, f"Current Class: {class_period[0]} - {class_period[1]}")
+        name = tenant.name if len(tenants) > 1 else "Monitor"
+        embed.add_field(name=name, value="\n".join(lines), inline=False)
+
     await ctx.send(embed=embed)
 
 
@@ -154,54 +464,143 @@ async def status_command(ctx):
 async def test_command(ctx):
     """Test the Discord ping functionality"""
     try:
-        channel = bot.get_channel(ATTENDANCE_CHANNEL_ID)
-        if not channel:
-            await ctx.send("❌ Attendance channel not found!")
+        tenant = tenant_for_channel(ctx.channel.id)
+        delivered = await notifier.notify(None, f"[TEST] {tenant.ping_message}", **tenant.ping_targets())
+        if not delivered:
+            await ctx.send("❌ Test message could not be delivered (see logs)")
             return
-        
-        await channel.send("[TEST] @everyone attendance is now live")
         await ctx.send("✅ Test message sent successfully!")
     except Exception as e:
         await ctx.send(f"❌ Error: {e}")
 
 
+@bot.command(name='history')
+async def history_command(ctx, limit: int = 10):
+    """Show the most recent class periods: detection time, ping result and checks"""
+    tenant = tenant_for_channel(ctx.channel.id)
+    rows = state.history(tenant.name, max(1, min(limit, 25)))
+    if not rows:
+        await ctx.send("No class periods recorded yet")
+        return
+
+    def clock(timestamp):
+        return datetime.fromtimestamp(timestamp, tenant.timetable.tz).strftime('%H:%M:%S')
+
+    embed = discord.Embed(title="Attendance History", color=discord.Color.orange())
+    for row in rows:
+        if row['detected_at'] is None:
+            result = "❌ Not detected"
+        else:
+            result = f"Detected {clock(row['detected_at'])}"
+            if row['ping_ok'] is not None:
+                result += f", {'✅ pinged' if row['ping_ok'] else '❌ ping failed'} {clock(row['pinged_at'])}"
+        embed.add_field(
+            name=f"{row['date']} {row['period_start']}-{row['period_end']}",
+            value=f"{result} ({row['checks']} checks)", inline=False
+        )
+    await ctx.send(embed=embed)
+
+
+@bot.command(name='metrics')
+async def metrics_command(ctx):
+    """Summarize check pipeline latencies and failure counts"""
+    embed = discord.Embed(title="Attendance Bot Metrics", color=discord.Color.purple())
+
+    lines = []
+    for (stage,) in STAGE_SECONDS.series():
+        count, mean, p95 = STAGE_SECONDS.summary(stage=stage)
+        lines.append(f"{stage}: {count}× mean {mean * 1000:.0f} ms, p95 ≤ {p95 * 1000:.0f} ms")
+    for name, histogram in (("ping latency", PING_LATENCY), ("detection lag", DETECTION_LAG)):
+        summary = histogram.summary()
+        if summary:
+            lines.append(f"{name}: {summary[0]}× mean {summary[1]:.1f} s, p95 ≤ {summary[2]:g} s")
+    trips = ROUND_TRIPS.summary()
+    if trips:
+        lines.append(f"round-trips per check: mean {trips[1]:.1f}")
+    embed.add_field(name="Latency", value="\n".join(lines) or "No checks yet", inline=False)
+
+    strategies = [f"{strategy}: {DETECTIONS.value(strategy=strategy)}" for (strategy,) in DETECTIONS.series()]
+    failures = [f"{kind}: {FAILURES.value(type=kind)}" for (kind,) in FAILURES.series()]
+    embed.add_field(name="Detections", value="\n".join(strategies) or "None", inline=False)
+    embed.add_field(name="Failures", value="\n".join(failures) or "None", inline=False)
+    recycles = [f"{reason}: {BROWSER_RECYCLES.value(reason=reason)}" for (reason,) in BROWSER_RECYCLES.series()]
+    if recycles:
+        embed.add_field(name="Browser Recycles", value="\n".join(recycles), inline=False)
+
+    memory = [f"{name}: {rss / 2**20:.0f} MiB" for (name,), rss in browser_memory().items() if rss]
+    if memory:
+        embed.add_field(name="Browser Memory", value="\n".join(memory), inline=False)
+    if METRICS_PORT:
+        embed.set_footer(text=f"Full metrics: http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+    await ctx.send(embed=embed)
+
+
 @bot.command(name='config')
 async def config_command(ctx):
     """Display current configuration"""
+    tenant = tenant_for_channel(ctx.channel.id)
+
     embed = discord.Embed(title="Bot Configuration", color=discord.Color.green())
     embed.add_field(name="Timezone", value=TIMEZONE, inline=False)
-    embed.add_field(name="Check Interval", value=f"{CHECK_INTERVAL} seconds", inline=False)
-    embed.add_field(name="Kalvium URL", value=KALVIUM_URL, inline=False)
-    
+    embed.add_field(name="Check Interval", value=f"{settings.check_interval} seconds", inline=False)
+    embed.add_field(name="Kalvium URL", value=tenant.url, inline=False)
+    if len(tenants) > 1:
+        embed.add_field(name="Tenants", value=", ".join(t.name for t in tenants), inline=False)
+
     schedule_text = "📅 Class Schedule:\n"
     days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
     for day_num in range(6):
-        if day_num in CLASS_SCHEDULE:
-            times = CLASS_SCHEDULE[day_num]
+        if day_num in tenant.schedule:
+            times = tenant.schedule[day_num]
             schedule_text += f"\n**{days[day_num]}:**\n"
             for start, end in times:
                 schedule_text += f"  • {start} - {end}\n"
-    
+
     embed.add_field(name="Schedule", value=schedule_text, inline=False)
+
+    upcoming = tenant.timetable.upcoming_exceptions()
+    if upcoming:
+        exceptions_text = "\n".join(
+            f"• {day:%a %d %b}: " + (", ".join(f"{start}-{end}" for start, end in periods) or "no class")
+            for day, periods in upcoming
+        )
+        embed.add_field(name="Upcoming Exceptions", value=exceptions_text, inline=False)
     await ctx.send(embed=embed)
 
 
+@bot.command(name='reload')
+async def reload_command(ctx):
+    """Re-read the settings, tenants and calendar files without restarting the browser"""
+    if not watched_files():
+        await ctx.send("⚠️ No settings, tenants or calendar files configured; nothing to reload")
+        return
+    error = await reload_settings()
+    if error:
+        await ctx.send(f"❌ Reload failed, keeping the current settings: {error}")
+    else:
+        await ctx.send("✅ Settings reloaded; changes apply from the next check")
+
+
 def main():
     """Main function to run the bot"""
     if not DISCORD_TOKEN:
         logger.error("DISCORD_TOKEN not set in environment variables")
         return
-    
-    if not ATTENDANCE_CHANNEL_ID or ATTENDANCE_CHANNEL_ID == 0:
-        logger.error("ATTENDANCE_CHANNEL_ID not set in environment variables")
-        return
-    
-    if not GOOGLE_EMAIL or not GOOGLE_PASSWORD:
-        logger.error("Google credentials (GOOGLE_EMAIL/GOOGLE_PASSWORD) not set")
-        return
-    
-    logger.info("Starting Attendance Bot...")
+
+    for tenant in tenants:
+        if not tenant.channel_id or tenant.channel_id == 0:
+            logger.error(f"ATTENDANCE_CHANNEL_ID not set for tenant {tenant.name}")
+            return
+
+        if not tenant.email or not tenant.password:
+            logger.error(f"Google credentials (GOOGLE_EMAIL/GOOGLE_PASSWORD) not set for tenant {tenant.name}")
+            return
+
+    logger.info(f"Starting Attendance Bot for {len(tenants)} tenant(s)...")
     bot.run(DISCORD_TOKEN)
+    if coordinator is not None:
+        # Hand pending pings and the polling phase over to the other instances
+        coordinator.leave()
 
 
 if __name__ == '__main__':
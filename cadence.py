@@ -0,0 +1,126 @@
+"""
+Adaptive polling cadence
+Learns when attendance usually opens in each class period (offset from the
+period start) and polls fast around that window, sparsely elsewhere
+"""
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HISTORY_FILE = os.path.join(os.path.dirname(__file__), '.attendance-history.json')
+
+
+def quantile(sorted_values, q):
+    """Linear-interpolated quantile of an already sorted list"""
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    pos = (len(sorted_values) - 1) * q
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+class CadenceModel:
+    """Per-slot distribution of button appearance offsets.
+
+    A slot is one weekly class period of one tenant. Until a slot has
+    `min_samples` detections it is polled at `default_interval`. After that
+    the period is split into three bands:
+
+    - core: between the `core` quantiles (e.g. the middle 50% of past
+      detections), polled every `fast_interval`
+    - shoulder: between the `coverage` quantiles widened by `margin`
+      seconds, polled every `default_interval`
+    - elsewhere: polled every `latency_budget`, the longest detection delay
+      accepted for an unusually early or late button
+
+    Intervals are shortened so the next band is never overslept.
+    """
+
+    def __init__(self, path=DEFAULT_HISTORY_FILE, default_interval=10, fast_interval=2, latency_budget=60,
+                 core=0.5, coverage=0.9, margin=30, min_samples=3, max_samples=50):
+        self.path = path
+        self.default_interval = default_interval
+        self.fast_interval = fast_interval
+        self.latency_budget = latency_budget
+        self.core = core
+        self.coverage = coverage
+        self.margin = margin
+        self.min_samples = min_samples
+        self.max_samples = max_samples
+        self.history = self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read detection history {self.path}: {e}")
+            return {}
+
+    def _save(self):
+        if not self.path:
+            return
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.history, f)
+        os.replace(tmp_path, self.path)
+
+    def record(self, slot, offset):
+        """Remember that the button appeared `offset` seconds into `slot`"""
+        samples = self.history.setdefault(slot, [])
+        samples.append(round(offset, 1))
+        del samples[:-self.max_samples]
+        try:
+            self._save()
+        except OSError as e:
+            logger.warning(f"Could not save detection history: {e}")
+
+    def _band(self, samples, coverage, margin=0.0):
+        tail = (1 - coverage) / 2
+        return max(0.0, quantile(samples, tail) - margin), quantile(samples, 1 - tail) + margin
+
+    def window(self, slot):
+        """((core_start, core_end), (start, end)) offsets where the button is likely, or None"""
+        samples = sorted(self.history.get(slot, []))
+        if len(samples) < self.min_samples:
+            return None
+        return self._band(samples, self.core), self._band(samples, self.coverage, self.margin)
+
+    def interval(self, slot, offset):
+        """Seconds to wait before the next check at `offset` seconds into `slot`"""
+        window = self.window(slot)
+        if window is None:
+            return self.default_interval
+        (core_start, core_end), (start, end) = window
+        if core_start <= offset <= core_end:
+            return self.fast_interval
+        if start <= offset <= end:
+            interval = self.default_interval
+        else:
+            interval = self.latency_budget
+        # Don't sleep past the start of a faster band
+        for band_start in (start, core_start):
+            if offset < band_start:
+                interval = min(interval, band_start - offset)
+        return max(self.fast_interval, interval)
+
+
+def simulate(model, slot, appear_at, period_length):
+    """Replay one period offline: (checks made, detection delay in seconds).
+
+    The button appears `appear_at` seconds into the period; checks follow
+    `model.interval()` from the period start. Delay is None if never seen.
+    """
+    offset = 0.0
+    checks = 0
+    while offset <= period_length:
+        checks += 1
+        if offset >= appear_at:
+            return checks, offset - appear_at
+        offset += model.interval(slot, offset)
+    return checks, None
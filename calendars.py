@@ -0,0 +1,175 @@
+"""
+Calendar exceptions for the class schedule
+Reads holidays, moved periods and extra sessions from local iCalendar (.ics)
+or JSON files into the {date: periods} form Timetable takes as `exceptions`
+"""
+import json
+import logging
+import re
+from datetime import date, datetime, timedelta
+
+import pytz
+
+from timetable import parse_exceptions
+
+logger = logging.getLogger(__name__)
+
+# RFC 5545 dur-value, e.g. PT1H30M, P1D, P1W, -PT15M
+DURATION = re.compile(r'([+-]?)P(?:(\d+)W)?(?:(\d+)D)?(?:T(?=\d)(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?')
+
+
+def load_calendars(paths, timezone, schedule):
+    """Merge the exceptions of every calendar file in `paths` (for the weekly `schedule`).
+
+    Cancelled and replaced days from all files are applied first (where
+    several cover a date their periods are combined), then the extra
+    sessions of every .ics file are added on top of the resulting day. So an
+    extra session in one file never brings back the weekly classes of a day
+    another file cancels.
+    Raises OSError or ValueError for an unreadable or invalid file.
+    """
+    replaced = {}
+    extra = {}
+    for path in paths:
+        if path.lower().endswith('.ics'):
+            with open(path, encoding='utf-8') as f:
+                cancelled, sessions = read_ics(f.read(), timezone, where=path)
+            days = {day: [] for day in cancelled}
+        else:
+            with open(path) as f:
+                raw = json.load(f)
+            if not isinstance(raw, dict):
+                raise ValueError(f"{path} must contain a JSON object of dates")
+            days, sessions = parse_exceptions(raw, where=path), {}
+        for day, periods in days.items():
+            replaced[day] = sorted(set(replaced.get(day, [])) | set(periods))
+        for day, periods in sessions.items():
+            extra[day] = sorted(set(extra.get(day, [])) | set(periods))
+    merged = _apply(replaced, extra, schedule)
+    if paths:
+        logger.info(f"Loaded {len(merged)} calendar exception day(s) from {len(paths)} file(s)")
+    return merged
+
+
+def parse_ics(text, timezone, schedule, where='calendar'):
+    """Exceptions from iCalendar text: all-day events cancel their days, timed events add sessions.
+
+    A timed event is an extra period on top of that day's weekly ones, or
+    the only periods of a day also covered by an all-day event (so moving a
+    day's classes is an all-day event plus the new times).
+    """
+    cancelled, extra = read_ics(text, timezone, where)
+    return _apply({day: [] for day in cancelled}, extra, schedule)
+
+
+def read_ics(text, timezone, where='calendar'):
+    """(cancelled dates, {date: [(start, end), ...] extra sessions}) from iCalendar text.
+
+    All-day events cancel the days they cover; timed events are extra
+    sessions. Times are converted to `timezone`. Cancelled events are
+    ignored, as are recurring ones (the weekly schedule already covers
+    regular classes).
+    """
+    tz = pytz.timezone(timezone)
+    cancelled = set()
+    extra = {}
+    for event in _events(text):
+        summary = event.get('SUMMARY', ({}, ''))[1] or 'untitled event'
+        if event.get('STATUS', ({}, ''))[1].upper() == 'CANCELLED':
+            continue
+        if 'RRULE' in event:
+            logger.warning(f"Skipping recurring event {summary!r} in {where}; only dated events are imported")
+            continue
+        if 'DTSTART' not in event:
+            raise ValueError(f"Event {summary!r} in {where} has no DTSTART")
+
+        start = _parse_value(*event['DTSTART'], tz, where)
+        if 'DTEND' in event:
+            end = _parse_value(*event['DTEND'], tz, where)
+        elif 'DURATION' in event:
+            end = start + _parse_duration(event['DURATION'][1], where)
+            if isinstance(end, datetime):
+                end = tz.normalize(end)
+        else:
+            end = None
+        if isinstance(start, date) and not isinstance(start, datetime):
+            # All-day event; its end is exclusive and defaults to the next day
+            last = end - timedelta(days=1) if end else start
+            cancelled.update(start + timedelta(days=offset) for offset in range((last - start).days + 1))
+            continue
+
+        if end is None or end <= start:
+            raise ValueError(f"Event {summary!r} in {where} needs a DTEND or DURATION ending after its DTSTART")
+        if end.date() != start.date():
+            # Class periods don't cross midnight; keep the part on the start day
+            end = start.replace(hour=23, minute=59, second=0, microsecond=0)
+        extra.setdefault(start.date(), []).append((start.strftime('%H:%M'), end.strftime('%H:%M')))
+    return cancelled, extra
+
+
+def _apply(replaced, extra, schedule):
+    """{date: periods} from days whose periods are `replaced` plus `extra` sessions on top of each day"""
+    exceptions = dict(replaced)
+    for day, periods in extra.items():
+        if day in replaced:
+            base = replaced[day]
+        else:
+            base = [] if day.weekday() > 5 else schedule.get(day.weekday(), [])
+        exceptions[day] = sorted(set(base) | set(periods))
+    return exceptions
+
+
+def _events(text):
+    """Yield each VEVENT as {property name: (params, value)} from unfolded iCalendar lines"""
+    lines = []
+    for line in text.splitlines():
+        if line[:1] in (' ', '\t') and lines:
+            lines[-1] += line[1:]
+        elif line.strip():
+            lines.append(line.strip())
+
+    event = None
+    for line in lines:
+        if line.upper() == 'BEGIN:VEVENT':
+            event = {}
+        elif line.upper() == 'END:VEVENT':
+            if event is not None:
+                yield event
+            event = None
+        elif event is not None and ':' in line:
+            head, value = line.split(':', 1)
+            name, *params = head.split(';')
+            params = dict(param.split('=', 1) for param in params if '=' in param)
+            event[name.upper()] = ({key.upper(): val for key, val in params.items()}, value)
+
+
+def _parse_duration(value, where):
+    """DURATION value as a timedelta"""
+    match = DURATION.fullmatch(value.strip())
+    if not match or value.strip().lstrip('+-') == 'P':
+        raise ValueError(f"Invalid duration {value!r} in {where}")
+    sign, weeks, days, hours, minutes, seconds = match.groups()
+    duration = timedelta(
+        weeks=int(weeks or 0), days=int(days or 0), hours=int(hours or 0),
+        minutes=int(minutes or 0), seconds=int(seconds or 0)
+    )
+    return -duration if sign == '-' else duration
+
+
+def _parse_value(params, value, tz, where):
+    """DTSTART/DTEND value as a date (all-day) or a datetime in `tz`"""
+    try:
+        if params.get('VALUE', '').upper() == 'DATE' or len(value) == 8:
+            return datetime.strptime(value, '%Y%m%d').date()
+        if value.endswith('Z'):
+            return pytz.utc.localize(datetime.strptime(value, '%Y%m%dT%H%M%SZ')).astimezone(tz)
+        moment = datetime.strptime(value, '%Y%m%dT%H%M%S')
+    except ValueError:
+        raise ValueError(f"Invalid date-time {value!r} in {where}")
+    zone = tz
+    if 'TZID' in params:
+        try:
+            zone = pytz.timezone(params['TZID'].strip('"'))
+        except pytz.UnknownTimeZoneError:
+            logger.warning(f"Unknown TZID {params['TZID']} in {where}; assuming {tz.zone}")
+    return zone.localize(moment).astimezone(tz)
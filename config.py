@@ -2,6 +2,7 @@
 Configuration file for the Attendance Bot
 """
 import os
+import socket
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -10,13 +11,105 @@ load_dotenv()
 DISCORD_TOKEN = os.getenv('DISCORD_TOKEN')
 ATTENDANCE_CHANNEL_ID = int(os.getenv('ATTENDANCE_CHANNEL_ID', '0'))  # Replace with your channel ID
 
+# Extra destinations for the attendance ping (comma-separated channel IDs / webhook URLs)
+NOTIFY_CHANNEL_IDS = [int(c) for c in os.getenv('NOTIFY_CHANNEL_IDS', '').split(',') if c.strip()]
+WEBHOOK_URLS = [u.strip() for u in os.getenv('WEBHOOK_URLS', '').split(',') if u.strip()]
+
+# Fast path: post the ping to this webhook first over a pre-warmed connection,
+# using the bot's channel only if it fails; re-warmed every WEBHOOK_KEEPALIVE seconds in class
+PING_WEBHOOK_URL = os.getenv('PING_WEBHOOK_URL')
+WEBHOOK_KEEPALIVE = int(os.getenv('WEBHOOK_KEEPALIVE', '30'))
+
 # Google Login Credentials
 GOOGLE_EMAIL = os.getenv('GOOGLE_EMAIL')
 GOOGLE_PASSWORD = os.getenv('GOOGLE_PASSWORD')
 
 # Website Configuration
 KALVIUM_URL = "https://kalvium.community"  # Update if different
-CHECK_INTERVAL = 10  # seconds - how often to check for the button
+CHECK_INTERVAL = 10  # seconds - how often to check for the button during class
+MAX_IDLE_SLEEP = 3600  # seconds - longest sleep between class periods before re-reading the clock
+
+# Local Prometheus endpoint (http://METRICS_HOST:METRICS_PORT/metrics); port 0 disables it
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', '9108'))
+
+# Start the browser and log in this many seconds before a period begins, and
+# close it after IDLE_TIMEOUT seconds without class (0 keeps it open)
+WARMUP_LEAD_TIME = int(os.getenv('WARMUP_LEAD_TIME', '120'))
+IDLE_TIMEOUT = int(os.getenv('IDLE_TIMEOUT', '900'))
+
+# Adaptive cadence: once a period has a few recorded detections, poll every
+# FAST_CHECK_INTERVAL around the usual opening time and every LATENCY_BUDGET elsewhere
+ADAPTIVE_CADENCE = os.getenv('ADAPTIVE_CADENCE', 'true').lower() in ('1', 'true', 'yes')
+FAST_CHECK_INTERVAL = int(os.getenv('FAST_CHECK_INTERVAL', '2'))  # seconds
+LATENCY_BUDGET = int(os.getenv('LATENCY_BUDGET', '60'))  # seconds - worst-case delay outside the usual window
+
+# Scraper worker timeouts (browser work runs off the Discord event loop)
+LOGIN_TIMEOUT = int(os.getenv('LOGIN_TIMEOUT', '180'))  # seconds - browser startup + Google login
+CHECK_TIMEOUT = int(os.getenv('CHECK_TIMEOUT', '30'))  # seconds - one refresh + button check
+
+# Detection mode: 'poll' reloads the page every CHECK_INTERVAL,
+# 'watch' keeps the page open and waits on a MutationObserver,
+# 'network' polls the dashboard's attendance API directly and only reloads to confirm
+DETECTION_MODE = os.getenv('DETECTION_MODE', 'poll')
+WATCH_REFRESH_INTERVAL = int(os.getenv('WATCH_REFRESH_INTERVAL', '120'))  # seconds - safety reload in watch mode
+
+# Soft refresh: between checks, have the dashboard re-fetch its data in place
+# instead of reloading the page; a full reload is still done every
+# HARD_REFRESH_EVERY checks (and whenever a soft refresh fails)
+SOFT_REFRESH = os.getenv('SOFT_REFRESH', 'false').lower() in ('1', 'true', 'yes')
+HARD_REFRESH_EVERY = int(os.getenv('HARD_REFRESH_EVERY', '30'))
+
+# Poll mode: keep the dashboard open in POLL_TABS tabs and reload them in turn,
+# one every CHECK_INTERVAL / POLL_TABS seconds. Each tab still reloads once per
+# interval, but the button is seen up to POLL_TABS times sooner
+POLL_TABS = int(os.getenv('POLL_TABS', '1'))
+
+# Monitor in a headless, image-free browser with static assets and trackers blocked.
+# The visible browser is still used for the interactive Google login.
+MONITOR_HEADLESS = os.getenv('MONITOR_HEADLESS', 'true').lower() in ('1', 'true', 'yes')
+
+# Keep a second logged-in browser on standby so an expired session or a dead
+# browser fails over immediately (roughly doubles browser memory)
+WARM_STANDBY = os.getenv('WARM_STANDBY', 'false').lower() in ('1', 'true', 'yes')
+
+# Browser health supervisor: the browser is sampled every HEALTH_CHECK_INTERVAL
+# seconds and recycled (replaced without a new login, outside the window where
+# a ping may be needed) once it crosses one of these limits; 0 disables a limit
+HEALTH_CHECK_INTERVAL = int(os.getenv('HEALTH_CHECK_INTERVAL', '60'))  # seconds
+BROWSER_MEMORY_LIMIT = int(os.getenv('BROWSER_MEMORY_LIMIT', '1500'))  # MB - RSS of the Chrome process tree
+BROWSER_LEAK_RATE = int(os.getenv('BROWSER_LEAK_RATE', '300'))  # MB/hour - steady RSS growth over 30 minutes
+BROWSER_CPU_LIMIT = int(os.getenv('BROWSER_CPU_LIMIT', '90'))  # percent of one core, sustained
+DRIVER_LATENCY_LIMIT = float(os.getenv('DRIVER_LATENCY_LIMIT', '2'))  # seconds for a no-op WebDriver command
+
+# Redundant instances (on one or more hosts): set COORDINATION_DB on every instance
+# to the same SQLite file on a shared volume. Instances then interleave their checks
+# and only the holder of a period's lease pings; a lease held by an instance that
+# died lapses after LEASE_TTL seconds. Hosts need synchronized clocks (NTP).
+COORDINATION_DB = os.getenv('COORDINATION_DB')
+INSTANCE_ID = os.getenv('INSTANCE_ID') or f"{socket.gethostname()}-{os.getpid()}"
+LEASE_TTL = float(os.getenv('LEASE_TTL', str(CHECK_INTERVAL)))  # seconds
+
+# Scraper daemon: with SCRAPER_SOCKET set, the bot drives browsers owned by a
+# separately started `python daemon.py` over this Unix socket, so bot restarts
+# keep the logged-in sessions. Unset runs the browsers inside the bot.
+SCRAPER_SOCKET = os.getenv('SCRAPER_SOCKET')
+DAEMON_METRICS_PORT = int(os.getenv('DAEMON_METRICS_PORT', '9109'))  # daemon's own /metrics; 0 disables it
+
+# Multi-account monitoring: JSON file listing tenants (see README). When unset,
+# a single tenant is built from the GOOGLE_* / ATTENDANCE_CHANNEL_ID settings.
+TENANTS_FILE = os.getenv('TENANTS_FILE')
+BROWSER_POOL_SIZE = int(os.getenv('BROWSER_POOL_SIZE', '1'))  # shared Chromes serving all tenants
+
+# Hot-reloadable settings: a JSON file overriding the schedule, ping message,
+# dashboard URL and check timings below (see README). The bot re-reads it, and
+# TENANTS_FILE, every SETTINGS_WATCH_INTERVAL seconds if changed (0 = only on !reload)
+SETTINGS_FILE = os.getenv('SETTINGS_FILE')
+SETTINGS_WATCH_INTERVAL = int(os.getenv('SETTINGS_WATCH_INTERVAL', '5'))
+
+# Holidays, moved periods and extra sessions: comma-separated local .ics or JSON
+# files of dated exceptions to CLASS_SCHEDULE (see README)
+CALENDAR_FILES = [p.strip() for p in os.getenv('CALENDAR_FILES', '').split(',') if p.strip()]
 
 # Timezone
 TIMEZONE = 'Asia/Kolkata'  # IST
@@ -0,0 +1,138 @@
+"""
+Coordination between redundant bot instances
+Instances share one SQLite file (e.g. on a shared volume): each one heartbeats
+so the live instances can interleave their polling phases, and a per-period
+lease makes sure exactly one of them sends the attendance ping
+"""
+import asyncio
+import logging
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS instances (
+    instance_id TEXT PRIMARY KEY,
+    heartbeat REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    key TEXT PRIMARY KEY,
+    holder TEXT NOT NULL,
+    expires REAL NOT NULL,
+    done INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+# Taken if free, expired, or already ours; a completed lease is never taken again
+ACQUIRE = """
+INSERT INTO leases (key, holder, expires) VALUES (?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET holder = excluded.holder, expires = excluded.expires
+WHERE NOT leases.done AND (leases.expires < ? OR leases.holder = excluded.holder)
+"""
+
+
+class Coordinator:
+    """Heartbeats and ping leases in a SQLite file shared by all instances.
+
+    A lease lasts `ttl` seconds and is renewed by every heartbeat of its
+    holder, so if the holder dies another instance can take it over within
+    `ttl`. Instances whose last heartbeat is older than `ttl` count as gone.
+    Expiry uses wall-clock time, so hosts need synchronized clocks.
+    The methods block on the shared file (up to its lock timeout); from the
+    event loop call them through run(), which uses the coordinator's thread.
+    """
+
+    def __init__(self, path, instance_id, ttl=10.0):
+        self.path = path
+        self.instance_id = instance_id
+        self.ttl = ttl
+        # Rollback journal rather than WAL: WAL needs shared memory, which a
+        # database on a network filesystem can't provide
+        self.db = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='coordination')
+        self._last_heartbeat = float('-inf')
+        self.members = [instance_id]
+
+    def run(self, func, *args):
+        """Run `func(*args)` (one of the methods below) on the coordinator's thread; returns a future"""
+        return asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def heartbeat(self, force=False):
+        """Record that this instance is alive and renew its leases (at most every ttl/3 seconds).
+
+        Returns (rank, count): this instance's position among the live ones.
+        """
+        now = time.time()
+        if force or now - self._last_heartbeat >= self.ttl / 3:
+            try:
+                with self.db:
+                    self.db.execute("BEGIN IMMEDIATE")
+                    self.db.execute(
+                        "INSERT INTO instances VALUES (?, ?) ON CONFLICT (instance_id) DO UPDATE SET heartbeat = ?",
+                        (self.instance_id, now, now)
+                    )
+                    self.db.execute(
+                        "UPDATE leases SET expires = ? WHERE holder = ? AND NOT done", (now + self.ttl, self.instance_id)
+                    )
+                    rows = self.db.execute(
+                        "SELECT instance_id FROM instances WHERE heartbeat >= ? ORDER BY instance_id", (now - self.ttl,)
+                    ).fetchall()
+                self._last_heartbeat = now
+                self.members = [row[0] for row in rows]
+            except sqlite3.Error as e:
+                logger.error(f"Coordination heartbeat failed: {e}")
+        if self.instance_id not in self.members:
+            return 0, 1
+        return self.members.index(self.instance_id), len(self.members)
+
+    def acquire(self, key):
+        """Take the ping lease for `key`; False if another instance holds it or it is done"""
+        now = time.time()
+        try:
+            with self.db:
+                self.db.execute("BEGIN IMMEDIATE")
+                taken = self.db.execute(ACQUIRE, (key, self.instance_id, now + self.ttl, now)).rowcount == 1
+            return taken
+        except sqlite3.Error as e:
+            # Without the shared file there is nobody to coordinate with; ping rather than miss it
+            logger.error(f"Could not take ping lease {key}: {e}")
+            return True
+
+    def done(self, key):
+        """True once some instance has delivered the ping for `key`"""
+        try:
+            row = self.db.execute("SELECT done FROM leases WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Could not read ping lease {key}: {e}")
+            return False
+        return bool(row and row[0])
+
+    def complete(self, key):
+        """Mark `key` delivered so no instance pings it again"""
+        self._update("UPDATE leases SET done = 1 WHERE key = ? AND holder = ?", key)
+
+    def release(self, key):
+        """Give up `key` (delivery failed) so another instance may ping"""
+        self._update("DELETE FROM leases WHERE key = ? AND holder = ? AND NOT done", key)
+
+    def _update(self, sql, key):
+        try:
+            self.db.execute(sql, (key, self.instance_id))
+        except sqlite3.Error as e:
+            logger.error(f"Could not update ping lease {key}: {e}")
+
+    def leave(self):
+        """Drop this instance and its pending leases so the others take over at once"""
+        # Let queued lease updates (e.g. a just-delivered ping's completion) land first
+        self._executor.shutdown(wait=True)
+        try:
+            with self.db:
+                self.db.execute("BEGIN IMMEDIATE")
+                self.db.execute("DELETE FROM instances WHERE instance_id = ?", (self.instance_id,))
+                self.db.execute("DELETE FROM leases WHERE holder = ? AND NOT done", (self.instance_id,))
+        except sqlite3.Error as e:
+            logger.error(f"Could not leave coordination: {e}")
+        self.db.close()
@@ -0,0 +1,116 @@
+"""
+Scraper daemon
+Owns the browsers and serves each tenant's ScraperWorker to the Discord bot over
+a Unix socket (see remote.py), so logged-in sessions survive bot restarts
+
+Usage:
+    python daemon.py                       # serve on SCRAPER_SOCKET (default .scraper.sock)
+    python daemon.py health [TENANT]       # print a running daemon's browser health
+    python daemon.py screenshot TENANT PATH
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import signal
+
+from config import (
+    SCRAPER_SOCKET, LOGIN_TIMEOUT, CHECK_TIMEOUT, DETECTION_MODE, WATCH_REFRESH_INTERVAL,
+    SOFT_REFRESH, HARD_REFRESH_EVERY, MONITOR_HEADLESS, WARM_STANDBY, HEALTH_CHECK_INTERVAL, BROWSER_MEMORY_LIMIT,
+    BROWSER_LEAK_RATE, BROWSER_CPU_LIMIT, DRIVER_LATENCY_LIMIT, POLL_TABS, TENANTS_FILE, BROWSER_POOL_SIZE,
+    METRICS_HOST, DAEMON_METRICS_PORT
+)
+from health import BrowserHealth
+from metrics import start_http_server
+from pool import BrowserPool
+from remote import DEFAULT_SOCKET, DaemonConnection, RemoteWorker, serve
+from settings import load_settings
+from tenants import load_tenants
+from worker import ScraperWorker
+
+logger = logging.getLogger(__name__)
+
+
+def build_workers(tenants):
+    """One ScraperWorker per tenant (on a shared BrowserPool with a tenants file); returns (workers, pool)"""
+    browser_pool = BrowserPool(BROWSER_POOL_SIZE) if TENANTS_FILE else None
+    options = dict(
+        login_timeout=LOGIN_TIMEOUT, check_timeout=CHECK_TIMEOUT, watch_refresh_interval=WATCH_REFRESH_INTERVAL,
+        soft_refresh=SOFT_REFRESH, hard_refresh_every=HARD_REFRESH_EVERY
+    )
+    workers = {}
+    for index, tenant in enumerate(tenants):
+        if browser_pool:
+            workers[tenant.name] = browser_pool.worker_for(tenant, index, mode=DETECTION_MODE, **options)
+        else:
+            health = BrowserHealth(
+                memory_limit=BROWSER_MEMORY_LIMIT, leak_rate=BROWSER_LEAK_RATE,
+                cpu_limit=BROWSER_CPU_LIMIT, latency_limit=DRIVER_LATENCY_LIMIT
+            )
+            workers[tenant.name] = ScraperWorker(
+                tenant.email, tenant.password, tenant.url, mode=DETECTION_MODE, monitoring=MONITOR_HEADLESS,
+                standby=WARM_STANDBY, health=health, health_interval=HEALTH_CHECK_INTERVAL, tabs=POLL_TABS,
+                **options
+            )
+    return workers, browser_pool
+
+
+async def run(path):
+    """Serve all tenants until SIGINT/SIGTERM, then close the browsers"""
+    workers, browser_pool = build_workers(load_tenants(settings=load_settings()))
+    server = await serve(workers, path)
+    runner = await start_http_server(METRICS_HOST, DAEMON_METRICS_PORT) if DAEMON_METRICS_PORT else None
+    logger.info(f"Scraper daemon serving {len(workers)} tenant(s) on {path}")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+
+    logger.info("Shutting down scraper daemon...")
+    server.close()
+    await server.wait_closed()
+    for worker in workers.values():
+        await worker.close()
+    if browser_pool:
+        await browser_pool.close()
+    if runner:
+        await runner.cleanup()
+    if os.path.exists(path):
+        os.unlink(path)
+
+
+async def query(path, op, tenants, *args):
+    """Run one op against a running daemon for each tenant and print the results"""
+    connection = DaemonConnection(path)
+    for name in tenants:
+        worker = RemoteWorker(connection, name, LOGIN_TIMEOUT, CHECK_TIMEOUT)
+        result = await getattr(worker, op)(*args)
+        print(f"{name}: {json.dumps(result, indent=2) if isinstance(result, dict) else result}")
+    await connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', nargs='?', default='serve', choices=['serve', 'health', 'screenshot'])
+    parser.add_argument('tenant', nargs='?')
+    parser.add_argument('path', nargs='?')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    path = SCRAPER_SOCKET or DEFAULT_SOCKET
+    if args.command == 'serve':
+        asyncio.run(run(path))
+    elif args.command == 'health':
+        names = [args.tenant] if args.tenant else [tenant.name for tenant in load_tenants()]
+        asyncio.run(query(path, 'health_status', names))
+    else:
+        if not args.tenant or not args.path:
+            parser.error("screenshot needs TENANT and PATH")
+        asyncio.run(query(path, 'screenshot', [args.tenant], os.path.abspath(args.path)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""
+Network-level attendance detection
+Learns the dashboard API call that carries attendance state from Chrome's
+network log, then polls it directly with the browser's session
+"""
+import hashlib
+import json
+import logging
+
+import urllib3
+
+logger = logging.getLogger(__name__)
+
+# Request headers that must not be replayed from the captured browser request
+SKIP_HEADERS = {'host', 'content-length', 'connection', 'accept-encoding', 'cookie'}
+
+
+def read_network_log(driver):
+    """Drain Chrome's performance log and return captured GET XHR/fetch JSON exchanges.
+
+    Each exchange is a dict with request_id, url and headers. Requires the
+    driver to be created with the 'goog:loggingPrefs' performance capability.
+    """
+    requests = {}
+    exchanges = []
+    for entry in driver.get_log('performance'):
+        try:
+            message = json.loads(entry['message'])['message']
+        except (KeyError, ValueError):
+            continue
+        method = message.get('method')
+        params = message.get('params', {})
+        if method == 'Network.requestWillBeSent':
+            requests[params['requestId']] = params['request']
+        elif method == 'Network.responseReceived':
+            response = params.get('response', {})
+            request = requests.get(params.get('requestId'))
+            if params.get('type') not in ('XHR', 'Fetch') or not request:
+                continue
+            if request.get('method') != 'GET' or 'json' not in response.get('mimeType', ''):
+                continue
+            exchanges.append({
+                'request_id': params['requestId'],
+                'url': response['url'],
+                'headers': request.get('headers', {}),
+            })
+    return exchanges
+
+
+def attendance_projection(data, path=''):
+    """Collect (path, value) pairs for every JSON field under a key mentioning attendance"""
+    pairs = []
+    if isinstance(data, dict):
+        for key, value in data.items():
+            child = f"{path}.{key}"
+            if 'attendance' in str(key).lower():
+                pairs.append((child, json.dumps(value, sort_keys=True)))
+            else:
+                pairs.extend(attendance_projection(value, child))
+    elif isinstance(data, list):
+        for i, value in enumerate(data):
+            pairs.extend(attendance_projection(value, f"{path}[{i}]"))
+    return pairs
+
+
+def signature(body):
+    """Stable fingerprint of the attendance-related part of a response body.
+
+    Falls back to the whole body if no field mentions attendance, so unrelated
+    volatile fields (timestamps, counters) don't look like state changes when
+    the API does name its attendance fields.
+    """
+    try:
+        pairs = attendance_projection(json.loads(body))
+    except ValueError:
+        pairs = []
+    material = json.dumps(pairs) if pairs else body
+    return hashlib.sha1(material.encode('utf-8', 'replace')).hexdigest()
+
+
+class AttendanceEndpoint:
+    """A learned dashboard API endpoint polled with the browser's cookies and headers"""
+
+    def __init__(self, url, headers, cookies, baseline, pool=None):
+        self.url = url
+        self.headers = {k: v for k, v in headers.items() if k.lower() not in SKIP_HEADERS}
+        self.headers['Accept-Encoding'] = 'gzip'
+        if cookies:
+            self.headers['Cookie'] = '; '.join(f"{c['name']}={c['value']}" for c in cookies)
+        self.baseline = baseline
+        self.last = baseline
+        self.pool = pool or urllib3.PoolManager(maxsize=2, retries=False)
+
+    @classmethod
+    def learn(cls, driver, pool=None):
+        """Pick the attendance endpoint from the network log of the last page load.
+
+        Prefers calls whose URL mentions attendance, then calls whose JSON body
+        has attendance fields. Returns None if nothing suitable was captured.
+        """
+        best = None
+        for exchange in read_network_log(driver):
+            try:
+                body = driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': exchange['request_id']})['body']
+                fields = attendance_projection(json.loads(body))
+            except Exception:
+                continue
+            score = (2 if 'attendance' in exchange['url'].lower() else 0) + (1 if fields else 0)
+            if score and (best is None or score > best[0]):
+                best = (score, exchange, body)
+
+        if best is None:
+            return None
+
+        _, exchange, body = best
+        try:
+            cookies = driver.execute_cdp_cmd('Network.getCookies', {'urls': [exchange['url']]})['cookies']
+        except Exception:
+            cookies = driver.get_cookies()
+        logger.info(f"Learned attendance endpoint: {exchange['url']}")
+        return cls(exchange['url'], exchange['headers'], cookies, signature(body), pool)
+
+    def fetch(self):
+        """GET the endpoint; returns the body, or None if the session looks invalid"""
+        response = self.pool.request('GET', self.url, headers=self.headers, redirect=False, timeout=5.0)
+        if response.status != 200:
+            logger.warning(f"Attendance endpoint returned HTTP {response.status}")
+            return None
+        return response.data.decode('utf-8', 'replace')
+
+    def poll(self):
+        """Return True if attendance state changed since the baseline, False if not, None on error"""
+        try:
+            body = self.fetch()
+        except Exception as e:
+            logger.warning(f"Attendance endpoint poll failed: {e}")
+            return None
+        if body is None:
+            return None
+        self.last = signature(body)
+        return self.last != self.baseline
+
+    def rebase(self):
+        """Accept the last polled response as the new 'unchanged' state"""
+        self.baseline = self.last
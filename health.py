@@ -0,0 +1,73 @@
+"""
+Browser health tracking
+Keeps recent samples of a browser's memory, CPU and WebDriver latency and
+decides when the browser has degraded enough to be recycled
+"""
+SUSTAINED = 3  # consecutive samples over a CPU or latency limit before it counts
+LEAK_MIN_SPAN = 900  # seconds of samples needed before a growth rate is trusted
+
+
+class BrowserHealth:
+    """Rolling samples of one browser against recycle thresholds.
+
+    Limits: `memory_limit` in MB of the process tree, `leak_rate` in MB per
+    hour of steady growth over the last `window` seconds, `cpu_limit` in
+    percent of one core and `latency_limit` in seconds for a no-op WebDriver
+    command; 0 disables a limit. Samples of a different browser process
+    start a fresh history.
+    """
+
+    def __init__(self, memory_limit=0, leak_rate=0, cpu_limit=0, latency_limit=0, window=1800):
+        self.memory_limit = memory_limit
+        self.leak_rate = leak_rate
+        self.cpu_limit = cpu_limit
+        self.latency_limit = latency_limit
+        self.window = window
+        self.samples = []
+        self.pid = None
+
+    def reset(self):
+        self.samples = []
+        self.pid = None
+
+    def record(self, sample):
+        """Add a sample (dict with pid, at, rss, cpu, latency); returns (reason, detail) if over a limit"""
+        if sample['pid'] != self.pid:
+            self.reset()
+            self.pid = sample['pid']
+        if self.samples:
+            previous = self.samples[-1]
+            elapsed = sample['at'] - previous['at']
+            if sample['cpu'] is not None and previous['cpu'] is not None and elapsed > 0:
+                sample['cpu_percent'] = (sample['cpu'] - previous['cpu']) / elapsed * 100
+        self.samples.append(sample)
+        self.samples = [s for s in self.samples if sample['at'] - s['at'] <= self.window]
+        return self.verdict()
+
+    def growth_rate(self):
+        """Least-squares RSS growth in MB per hour over the window, or None with too little history"""
+        points = [(s['at'], s['rss'] / 2**20) for s in self.samples if s['rss'] is not None]
+        if len(points) < 3 or points[-1][0] - points[0][0] < LEAK_MIN_SPAN:
+            return None
+        mean_t = sum(t for t, _ in points) / len(points)
+        mean_m = sum(m for _, m in points) / len(points)
+        spread = sum((t - mean_t) ** 2 for t, _ in points)
+        slope = sum((t - mean_t) * (m - mean_m) for t, m in points) / spread
+        return slope * 3600
+
+    def _sustained(self, key, limit):
+        recent = [s.get(key) for s in self.samples[-SUSTAINED:]]
+        return len(recent) == SUSTAINED and all(v is not None and v > limit for v in recent)
+
+    def verdict(self):
+        latest = self.samples[-1]
+        if self.memory_limit and latest['rss'] is not None and latest['rss'] / 2**20 > self.memory_limit:
+            return 'memory', f"RSS {latest['rss'] / 2**20:.0f} MB over {self.memory_limit} MB"
+        rate = self.growth_rate() if self.leak_rate else None
+        if rate is not None and rate > self.leak_rate:
+            return 'leak', f"RSS growing {rate:.0f} MB/h, over {self.leak_rate} MB/h"
+        if self.cpu_limit and self._sustained('cpu_percent', self.cpu_limit):
+            return 'cpu', f"CPU {latest['cpu_percent']:.0f}% over {self.cpu_limit}% for {SUSTAINED} samples"
+        if self.latency_limit and self._sustained('latency', self.latency_limit):
+            return 'latency', f"WebDriver latency {latest['latency']:.1f}s over {self.latency_limit}s"
+        return None
@@ -0,0 +1,91 @@
+"""
+Selector racing for the login flow
+Waits on several candidate XPaths at once (one script round-trip per poll) and
+returns whichever matches first; the winner is remembered per page and tried
+first next time
+"""
+import json
+import logging
+import os
+
+from selenium.common.exceptions import JavascriptException, StaleElementReferenceException
+from selenium.webdriver.support.ui import WebDriverWait
+
+logger = logging.getLogger(__name__)
+
+# Returns [index, element] for the first candidate with a (visible, enabled) match, or null
+RACE_JS = """
+var xpaths = arguments[0], clickable = arguments[1];
+for (var i = 0; i < xpaths.length; i++) {
+    var found = document.evaluate(xpaths[i], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    for (var j = 0; j < found.snapshotLength; j++) {
+        var el = found.snapshotItem(j);
+        if (!clickable) return [i, el];
+        var r = el.getBoundingClientRect();
+        var s = window.getComputedStyle(el);
+        if (r.width && r.height && s.visibility !== 'hidden' && s.display !== 'none' && !el.disabled) return [i, el];
+    }
+}
+return null;
+"""
+
+
+class SelectorCache:
+    """Winning selector per page, persisted as JSON"""
+
+    def __init__(self, path):
+        self.path = path
+        self.winners = self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read selector cache {self.path}: {e}")
+            return {}
+
+    def order(self, page, candidates):
+        """`candidates` with the last winner for `page` first"""
+        winner = self.winners.get(page)
+        if winner not in candidates:
+            return list(candidates)
+        return [winner] + [c for c in candidates if c != winner]
+
+    def remember(self, page, selector):
+        if not self.path or self.winners.get(page) == selector:
+            return
+        self.winners[page] = selector
+        try:
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(self.winners, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not save selector cache: {e}")
+
+
+def race(driver, candidates, timeout, clickable=False, cache=None, page=None, poll=0.25):
+    """Wait up to `timeout` seconds for any of the XPath `candidates`.
+
+    All candidates are evaluated together on every poll, the cached winner
+    for `page` first. Returns (element, xpath) of the first match, or
+    (None, None) on timeout.
+    """
+    ordered = cache.order(page, candidates) if cache else list(candidates)
+
+    def first_match(d):
+        return d.execute_script(RACE_JS, ordered, clickable)
+
+    try:
+        # A poll may land mid-navigation; keep waiting instead of giving up
+        wait = WebDriverWait(driver, timeout, poll_frequency=poll,
+                             ignored_exceptions=(JavascriptException, StaleElementReferenceException))
+        index, element = wait.until(first_match)
+    except Exception:
+        return None, None
+    if cache:
+        cache.remember(page, ordered[index])
+    return element, ordered[index]
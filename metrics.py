@@ -0,0 +1,202 @@
+"""
+Prometheus-style metrics for the check pipeline
+Counters, gauges and histograms are plain in-process objects; render() produces
+the text exposition format served on /metrics and summarised by !metrics
+"""
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Seconds; covers a fast in-page detection up to a full Google login
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 180)
+COUNT_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55)
+
+REGISTRY = []
+
+
+def _label_text(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{value}"' for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+class Metric:
+    """Base class: a named family of series keyed by label values"""
+
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._series = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labels)
+
+    def series(self):
+        """Label values of every observed series"""
+        with self._lock:
+            return sorted(self._series)
+
+    def samples(self):
+        """[(suffix, label names, label values, value)] for the exposition format"""
+        raise NotImplementedError
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, names, values, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_label_text(names, values)} {value:g}")
+        return lines
+
+
+class Counter(Metric):
+    """Monotonically increasing count"""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._series.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            series = sorted(self._series.items())
+        return [('_total', self.labels, key, value) for key, value in series]
+
+
+class Gauge(Metric):
+    """Value read at scrape time from `collect`, a callable returning {label values: value}"""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labels=(), collect=None):
+        super().__init__(name, documentation, labels)
+        self.collect = collect
+
+    def samples(self):
+        try:
+            series = self.collect() if self.collect else {}
+        except Exception as e:
+            logger.warning(f"Could not collect {self.name}: {e}")
+            series = {}
+        return [('', self.labels, key, value) for key, value in sorted(series.items()) if value is not None]
+
+
+class Histogram(Metric):
+    """Bucketed distribution with running sum and count"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with-block in seconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def summary(self, **labels):
+        """(count, mean, approximate 95th percentile) or None if nothing was observed"""
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            if series is None:
+                return None
+            counts, total, count = list(series[0]), series[1], series[2]
+        target = 0.95 * count
+        seen = 0
+        for bound, n in zip(self.buckets + (float('inf'),), counts):
+            seen += n
+            if seen >= target:
+                break
+        return count, total / count, bound
+
+    def samples(self):
+        with self._lock:
+            series = sorted((key, list(s[0]), s[1], s[2]) for key, s in self._series.items())
+        samples = []
+        names = self.labels + ('le',)
+        for key, counts, total, count in series:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                samples.append(('_bucket', names, key + (f'{bound:g}',), cumulative))
+            samples.append(('_bucket', names, key + ('+Inf',), count))
+            samples.append(('_sum', self.labels, key, total))
+            samples.append(('_count', self.labels, key, count))
+        return samples
+
+
+def render():
+    """All registered metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+async def start_http_server(host, port):
+    """Serve render() on http://host:port/metrics from the running event loop"""
+    from aiohttp import web
+
+    async def handle(request):
+        return web.Response(text=render(), content_type='text/plain', charset='utf-8')
+
+    app = web.Application()
+    app.router.add_get('/metrics', handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+    return runner
+
+
+# Pipeline metrics
+STAGE_SECONDS = Histogram(
+    'attendance_stage_seconds', 'Duration of each stage of the check pipeline', labels=('stage',)
+)
+ROUND_TRIPS = Histogram(
+    'attendance_check_round_trips', 'WebDriver commands issued per check', buckets=COUNT_BUCKETS
+)
+DETECTIONS = Counter(
+    'attendance_detections', 'Detector results by strategy (none = button not found)', labels=('strategy',)
+)
+FAILURES = Counter('attendance_failures', 'Pipeline failures by type', labels=('type',))
+BROWSER_RECYCLES = Counter(
+    'attendance_browser_recycles', 'Degraded browsers replaced by the health supervisor', labels=('reason',)
+)
+PING_LATENCY = Histogram(
+    'attendance_ping_latency_seconds',
+    'Time from the start of the check that found the button to the ping being sent'
+)
+DETECTION_LAG = Histogram(
+    'attendance_detection_lag_seconds',
+    'Upper bound on button-to-detection delay: time since the previous negative check'
+)
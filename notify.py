@@ -0,0 +1,245 @@
+"""
+Notification dispatcher for attendance pings
+Queues pings and delivers them off the check loop: every configured channel and
+webhook is sent to at once, failed sends are retried with jittered backoff that
+honours Discord's rate-limit hints, and each class period is pinged only once.
+An optional fast-path webhook is tried first over a kept-alive connection, with
+the bot's own channel as the fallback
+"""
+import asyncio
+import logging
+import random
+import time
+
+import aiohttp
+import discord
+
+from metrics import STAGE_SECONDS, FAILURES, PING_LATENCY
+
+logger = logging.getLogger(__name__)
+
+
+class DeliveryError(Exception):
+    """A failed send; `retryable` sends are tried again after `retry_after` seconds if given"""
+
+    def __init__(self, message, retryable=True, retry_after=None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+class Notification:
+    """One message for a set of channels and webhooks.
+
+    `fallback_channel_ids` are only sent to if `fast_webhook_url` fails (or
+    is not set).
+    """
+
+    def __init__(self, key, message, channel_ids=(), webhook_urls=(), since=None,
+                 fast_webhook_url=None, fallback_channel_ids=()):
+        self.key = key
+        self.message = message
+        self.channel_ids = list(channel_ids)
+        self.webhook_urls = list(webhook_urls)
+        self.fast_webhook_url = fast_webhook_url
+        self.fallback_channel_ids = list(fallback_channel_ids)
+        self.since = since if since is not None else time.monotonic()
+        self.delivered = asyncio.get_running_loop().create_future()
+
+
+class Notifier:
+    """Async queue plus a dispatcher task that fans notifications out to Discord.
+
+    notify() never blocks: it returns a future that resolves to True once at
+    least one target received the message, False if every target failed, or
+    None straight away if `key` was already sent. A failed key may be sent again.
+    """
+
+    def __init__(self, max_attempts=5, base_delay=0.5, max_delay=30.0, send_timeout=10.0, keepalive=60.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.send_timeout = send_timeout
+        self.keepalive = keepalive
+        self.client = None
+        self.channels = {}
+        self.sent = set()
+        self.queue = None
+        self.session = None
+        self._task = None
+        self._tasks = set()
+        self._warmed = {}
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    async def start(self, client):
+        """Start the dispatcher; `client` resolves channel ids"""
+        self.client = client
+        if self.running:
+            return
+        self.queue = asyncio.Queue()
+        # Idle connections are kept for `keepalive` seconds so a warmed webhook
+        # host is sent to without a new TCP/TLS handshake; 0 disables reuse
+        if self.keepalive:
+            connector = aiohttp.TCPConnector(keepalive_timeout=self.keepalive, ttl_dns_cache=3600)
+        else:
+            connector = aiohttp.TCPConnector(force_close=True)
+        self.session = aiohttp.ClientSession(
+            connector=connector, timeout=aiohttp.ClientTimeout(total=self.send_timeout)
+        )
+        self._task = asyncio.create_task(self._dispatch())
+
+    async def resolve(self, channel_ids):
+        """Look up channels ahead of time so a ping doesn't wait on the API"""
+        for channel_id in set(channel_ids):
+            if not channel_id or channel_id in self.channels:
+                continue
+            channel = self.client.get_channel(channel_id)
+            if channel is None:
+                try:
+                    channel = await self.client.fetch_channel(channel_id)
+                except Exception as e:
+                    logger.error(f"Channel with ID {channel_id} not found: {e}")
+                    continue
+            self.channels[channel_id] = channel
+
+    async def warm(self, url):
+        """Open (or refresh) a kept-alive connection to a webhook's host with a harmless GET"""
+        self._warmed[url] = time.monotonic()
+        try:
+            async with self.session.get(url) as response:
+                await response.read()
+        except Exception as e:
+            logger.warning(f"Could not warm up {self._describe(url)}: {e}")
+
+    def keep_warm(self, url, max_age):
+        """Warm `url` in the background unless that happened in the last `max_age` seconds"""
+        if not url or not self.running or time.monotonic() - self._warmed.get(url, float('-inf')) < max_age:
+            return
+        task = asyncio.create_task(self.warm(url))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def notify(self, key, message, channel_ids=(), webhook_urls=(), since=None,
+               fast_webhook_url=None, fallback_channel_ids=()):
+        """Queue `message` once per `key` (None never dedupes); returns the delivery future or None"""
+        if key is not None:
+            if key in self.sent:
+                return None
+            self.sent.add(key)
+        notification = Notification(
+            key, message, channel_ids, webhook_urls, since, fast_webhook_url, fallback_channel_ids
+        )
+        self.queue.put_nowait(notification)
+        return notification.delivered
+
+    async def _dispatch(self):
+        while True:
+            notification = await self.queue.get()
+            # Deliver concurrently so one slow notification doesn't hold up the next
+            task = asyncio.create_task(self._deliver(notification))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _deliver(self, notification):
+        sends = [
+            *(self._retry(self._send_channel, channel_id, notification) for channel_id in notification.channel_ids),
+            *(self._retry(self._send_webhook, url, notification) for url in notification.webhook_urls),
+            self._fast_path(notification),
+        ]
+        results = await asyncio.gather(*sends)
+        delivered = any(results)
+        if not delivered:
+            logger.error(f"Notification could not be delivered to any target (key {notification.key})")
+            self.sent.discard(notification.key)
+        if not notification.delivered.done():
+            notification.delivered.set_result(delivered)
+
+    async def _fast_path(self, notification):
+        """One attempt on the fast-path webhook, then the fallback channels"""
+        if notification.fast_webhook_url:
+            if await self._retry(self._send_webhook, notification.fast_webhook_url, notification, attempts=1):
+                return True
+            if notification.fallback_channel_ids:
+                logger.warning("Fast-path webhook failed; falling back to the bot's channel")
+        results = await asyncio.gather(*(
+            self._retry(self._send_channel, channel_id, notification)
+            for channel_id in notification.fallback_channel_ids
+        ))
+        return any(results)
+
+    async def _retry(self, send, target, notification, attempts=None):
+        """Send to one target with jittered exponential backoff; True on success"""
+        attempts = attempts or self.max_attempts
+        for attempt in range(1, attempts + 1):
+            try:
+                with STAGE_SECONDS.time(stage='ping'):
+                    await send(target, notification.message)
+                if not notification.delivered.done():
+                    # First target to succeed marks the ping as delivered
+                    PING_LATENCY.observe(time.monotonic() - notification.since)
+                    notification.delivered.set_result(True)
+                return True
+            except DeliveryError as e:
+                error = e
+            except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                error = DeliveryError(str(e))
+
+            FAILURES.inc(type='ping')
+            if not error.retryable or attempt == attempts:
+                logger.error(f"Failed to send notification to {self._describe(target)}: {error}")
+                return False
+            delay = error.retry_after
+            if delay is None:
+                delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+            logger.warning(f"Send to {self._describe(target)} failed ({error}); retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+        return False
+
+    @staticmethod
+    def _describe(target):
+        if isinstance(target, str):
+            # Webhook URLs contain a token; log only the id
+            return f"webhook {target.rstrip('/').split('/')[-2]}" if target.count('/') > 2 else 'webhook'
+        return f"channel {target}"
+
+    async def _send_channel(self, channel_id, message):
+        channel = self.channels.get(channel_id) or self.client.get_channel(channel_id)
+        if channel is None:
+            raise DeliveryError(f"channel {channel_id} not found", retryable=False)
+        self.channels[channel_id] = channel
+        try:
+            await channel.send(message)
+        except (discord.Forbidden, discord.NotFound) as e:
+            raise DeliveryError(str(e), retryable=False)
+        except discord.HTTPException as e:
+            raise DeliveryError(str(e), retryable=e.status == 429 or e.status >= 500,
+                                retry_after=getattr(e, 'retry_after', None))
+        logger.info(f"Sent attendance ping to channel {getattr(channel, 'name', channel_id)}")
+
+    async def _send_webhook(self, url, message):
+        async with self.session.post(url, json={'content': message}) as response:
+            if response.status < 300:
+                logger.info(f"Sent attendance ping to {self._describe(url)}")
+                return
+            retry_after = None
+            if response.status == 429:
+                retry_after = response.headers.get('Retry-After')
+                try:
+                    retry_after = float(retry_after) if retry_after else float((await response.json())['retry_after'])
+                except (ValueError, KeyError, TypeError, aiohttp.ContentTypeError):
+                    retry_after = None
+            raise DeliveryError(f"HTTP {response.status}", retryable=response.status == 429 or response.status >= 500,
+                                retry_after=retry_after)
+
+    async def close(self):
+        """Stop the dispatcher and close the HTTP session"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, *self._tasks, return_exceptions=True)
+            self._task = None
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
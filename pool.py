@@ -0,0 +1,218 @@
+"""
+Shared browser pool for multi-tenant monitoring
+A bounded number of headless Chromes serve all tenants; each tenant gets its
+own tab in an isolated browser context, so sessions never share cookies
+"""
+import asyncio
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from scraper import AttendanceBot, DEFAULT_PROFILE_DIR
+from worker import ScraperWorker
+
+logger = logging.getLogger(__name__)
+
+# Per-tenant login profiles and cookie jars (contain session secrets; keep out of git)
+TENANT_PROFILE_ROOT = DEFAULT_PROFILE_DIR + '-tenants'
+
+
+class PooledSession(AttendanceBot):
+    """A tenant's tab inside a shared pool browser.
+
+    The tab lives in its own CDP browser context; cookies are saved to and
+    restored from a per-tenant file since such contexts are not persisted.
+    """
+
+    def __init__(self, slot, tenant):
+        super().__init__(
+            tenant.email, tenant.password, tenant.url,
+            profile_dir=os.path.join(TENANT_PROFILE_ROOT, tenant.name)
+        )
+        self.slot = slot
+        self.driver = slot.driver
+        self.monitoring = True
+        self.cookie_file = os.path.join(TENANT_PROFILE_ROOT, f'{tenant.name}.cookies.json')
+        self.context_id = None
+        self.window_handle = None
+
+    def activate(self):
+        """Make this tenant's tab the driver's current window"""
+        if self.slot.active_handle != self.window_handle:
+            self.driver.switch_to.window(self.window_handle)
+            self.slot.active_handle = self.window_handle
+
+    def open(self):
+        """Create the isolated tab and get it onto a logged-in dashboard"""
+        try:
+            self.context_id = self.driver.execute_cdp_cmd('Target.createBrowserContext', {})['browserContextId']
+            # ChromeDriver window handles are CDP target ids
+            self.window_handle = self.driver.execute_cdp_cmd('Target.createTarget', {
+                'url': 'about:blank', 'browserContextId': self.context_id
+            })['targetId']
+            self.activate()
+            self.strip_resources()
+            self.install_detector()
+        except Exception as e:
+            logger.error(f"Failed to open pooled tab for {self.email}: {e}")
+            return False
+
+        self.load_cookies()
+        if not self.resume_session():
+            logger.info(f"No valid session for {self.email}; running interactive login")
+            if not self.interactive_login():
+                return False
+            self.load_cookies()
+            if not self.resume_session():
+                return False
+        self.save_cookies()
+        return True
+
+    def interactive_login(self):
+        """Log in with a headed browser on the tenant's own profile and keep its cookies"""
+        bot = AttendanceBot(self.email, self.password, self.url, profile_dir=self.profile_dir)
+        try:
+            if not (bot.setup_driver() and bot.login_with_google()):
+                return False
+            self._write_cookies(bot.export_cookies())
+            return True
+        except Exception as e:
+            logger.error(f"Interactive login for {self.email} failed: {e}")
+            return False
+        finally:
+            bot.close()
+
+    def _write_cookies(self, cookies):
+        os.makedirs(TENANT_PROFILE_ROOT, exist_ok=True)
+        tmp_path = self.cookie_file + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(cookies, f)
+        os.replace(tmp_path, self.cookie_file)
+
+    def load_cookies(self):
+        """Restore the tenant's saved cookies into its browser context"""
+        if not os.path.exists(self.cookie_file):
+            return
+        try:
+            with open(self.cookie_file) as f:
+                self.import_cookies(json.load(f), self.context_id)
+        except Exception as e:
+            logger.warning(f"Could not restore cookies for {self.email}: {e}")
+
+    def save_cookies(self):
+        """Persist the browser context's cookies for the next start"""
+        try:
+            cookies = self.driver.execute_cdp_cmd('Storage.getCookies', {'browserContextId': self.context_id})
+            self._write_cookies(cookies['cookies'])
+        except Exception as e:
+            logger.warning(f"Could not save cookies for {self.email}: {e}")
+
+    def close(self):
+        """Close the tab and dispose of its context; the shared browser keeps running"""
+        if self.context_id is None:
+            return
+        self.save_cookies()
+        try:
+            self.driver.execute_cdp_cmd('Target.closeTarget', {'targetId': self.window_handle})
+            self.driver.execute_cdp_cmd('Target.disposeBrowserContext', {'browserContextId': self.context_id})
+        except Exception as e:
+            logger.warning(f"Failed to close pooled tab for {self.email}: {e}")
+        if self.slot.active_handle == self.window_handle:
+            self.slot.active_handle = None
+        self.slot.sessions.discard(self)
+        self.context_id = None
+        self.logged_in = False
+
+
+class BrowserSlot:
+    """One shared headless Chrome and the single thread allowed to drive it"""
+
+    def __init__(self, index):
+        self.index = index
+        self.profile_dir = os.path.join(TENANT_PROFILE_ROOT, f'pool-{index}')
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'browser-{index}')
+        self.browser = None
+        self.active_handle = None
+        self.sessions = set()
+
+    @property
+    def driver(self):
+        return self.browser.driver if self.browser else None
+
+    def open_session(self, tenant):
+        """Start the shared browser if needed and open a tab for `tenant` (slot thread only)"""
+        if self.driver is not None and not self.alive():
+            self.drop_browser()
+        if self.driver is None:
+            self.browser = AttendanceBot('', '', '', profile_dir=self.profile_dir)
+            if not self.browser.setup_driver(monitoring=True):
+                self.browser = None
+                return None
+            self.active_handle = self.driver.current_window_handle
+
+        session = PooledSession(self, tenant)
+        if session.open():
+            self.sessions.add(session)
+            logger.info(f"Tenant {tenant.name} is monitoring in pool browser {self.index}")
+            return session
+        session.close()
+        return None
+
+    def alive(self):
+        """True if the shared browser still answers WebDriver commands"""
+        try:
+            self.driver.window_handles
+            return True
+        except Exception:
+            return False
+
+    def drop_browser(self):
+        """Quit a dead shared browser so the next login starts a new one; its tabs go with it"""
+        logger.warning(f"Pool browser {self.index} stopped responding; restarting it")
+        for session in self.sessions:
+            # Their workers see the lost session and log in again on the new browser
+            session.context_id = None
+            session.logged_in = False
+        self.sessions.clear()
+        try:
+            self.browser.close()
+        except Exception as e:
+            logger.warning(f"Failed to quit pool browser {self.index}: {e}")
+        self.browser = None
+        self.active_handle = None
+
+    def close(self):
+        """Close every tab and the shared browser"""
+        for session in list(self.sessions):
+            session.close()
+        if self.browser:
+            self.browser.close()
+            self.browser = None
+
+
+class BrowserPool:
+    """Bounded set of shared browsers; tenants are spread across them round-robin"""
+
+    def __init__(self, size):
+        self.slots = [BrowserSlot(i) for i in range(max(1, size))]
+
+    def worker_for(self, tenant, index, mode='poll', **kwargs):
+        """Build a ScraperWorker for `tenant` that runs on its slot's browser and thread"""
+        if mode == 'network':
+            # The performance log is shared by all tabs of a browser; an endpoint
+            # learned from it could belong to another tenant
+            logger.warning("Network detection is not supported with a browser pool; using poll mode")
+            mode = 'poll'
+        slot = self.slots[index % len(self.slots)]
+        return ScraperWorker(
+            tenant.email, tenant.password, tenant.url, mode=mode,
+            executor=slot.executor, factory=lambda: slot.open_session(tenant), **kwargs
+        )
+
+    async def close(self):
+        """Close all shared browsers"""
+        loop = asyncio.get_running_loop()
+        for slot in self.slots:
+            await loop.run_in_executor(slot.executor, slot.close)
+            slot.executor.shutdown(wait=False)
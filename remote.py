@@ -0,0 +1,214 @@
+"""
+Local IPC between the Discord bot and the scraper daemon
+Newline-delimited JSON over a Unix socket: the bot sends {"id", "tenant", "op",
+"args"} and gets back {"id", "result", "state"} or {"id", "error"}. RemoteWorker
+gives the bot the same interface as an in-process ScraperWorker, so the bot
+never imports Selenium and can restart while the logged-in browser keeps running
+"""
+import asyncio
+import functools
+import itertools
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOCKET = os.path.join(os.path.dirname(__file__), '.scraper.sock')
+
+# Protocol op -> ScraperWorker coroutine method
+OPS = {
+    'login': 'login',
+    'check': 'check',
+    'refresh': 'refresh_and_check',
+    'watch': 'watch',
+    'supervise': 'supervise',
+    'release': 'release',
+    'health': 'health_status',
+    'screenshot': 'screenshot',
+}
+
+
+class DaemonError(Exception):
+    """The daemon could not be reached or the op failed on its side"""
+
+
+def worker_state(worker):
+    """Worker fields mirrored by RemoteWorker after every response"""
+    sample = worker.last_sample
+    return {'ready': worker.ready, 'tabs': worker.tabs, 'rss': sample['rss'] if sample else None}
+
+
+async def serve(workers, path):
+    """Serve `workers` ({tenant name: ScraperWorker}) on a Unix socket at `path` (owner-only access)"""
+    if os.path.exists(path):
+        os.unlink(path)
+    server = await asyncio.start_unix_server(functools.partial(_handle, workers), path)
+    os.chmod(path, 0o600)
+    return server
+
+
+async def _handle(workers, reader, writer):
+    """One client connection; requests run concurrently and answer in completion order"""
+    lock = asyncio.Lock()
+    tasks = set()
+
+    async def respond(request):
+        try:
+            worker = workers[request['tenant']]
+            method = getattr(worker, OPS[request['op']])
+            result = await method(*request.get('args', ()))
+            response = {'id': request['id'], 'result': result, 'state': worker_state(worker)}
+        except Exception as e:
+            response = {'id': request.get('id'), 'error': f"{type(e).__name__}: {e}"}
+        try:
+            async with lock:
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        except (ConnectionError, RuntimeError):
+            # The bot went away mid-call; the browser work itself is done
+            pass
+
+    try:
+        while line := await reader.readline():
+            try:
+                request = json.loads(line)
+            except ValueError:
+                logger.warning("Ignoring malformed request from the bot")
+                continue
+            task = asyncio.create_task(respond(request))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+class DaemonConnection:
+    """A lazily (re)opened connection to the daemon, shared by all tenants' RemoteWorkers"""
+
+    def __init__(self, path):
+        self.path = path
+        self.writer = None
+        self.pending = {}
+        self._ids = itertools.count(1)
+        self._lock = asyncio.Lock()
+
+    async def _connect(self):
+        async with self._lock:
+            if self.writer is not None:
+                return
+            try:
+                reader, self.writer = await asyncio.open_unix_connection(self.path)
+            except OSError as e:
+                raise DaemonError(f"scraper daemon not reachable on {self.path}: {e}")
+            asyncio.create_task(self._read(reader, self.writer))
+            logger.info(f"Connected to scraper daemon on {self.path}")
+
+    async def _read(self, reader, writer):
+        try:
+            while line := await reader.readline():
+                response = json.loads(line)
+                future = self.pending.pop(response.get('id'), None)
+                if future is None or future.done():
+                    continue
+                if 'error' in response:
+                    future.set_exception(DaemonError(response['error']))
+                else:
+                    future.set_result(response)
+        except (ConnectionError, ValueError) as e:
+            logger.error(f"Lost connection to scraper daemon: {e}")
+        finally:
+            if self.writer is writer:
+                self.writer = None
+            writer.close()
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(DaemonError("scraper daemon disconnected"))
+            self.pending.clear()
+
+    async def call(self, tenant, op, *args, timeout=None):
+        """Send one request and wait up to `timeout` seconds for its response"""
+        await self._connect()
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        try:
+            request = {'id': request_id, 'tenant': tenant, 'op': op, 'args': list(args)}
+            self.writer.write(json.dumps(request).encode() + b'\n')
+            await self.writer.drain()
+            return await asyncio.wait_for(future, timeout)
+        except (ConnectionError, AttributeError) as e:
+            raise DaemonError(f"scraper daemon disconnected: {e}")
+        finally:
+            self.pending.pop(request_id, None)
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+class RemoteWorker:
+    """ScraperWorker stand-in that forwards every call to the scraper daemon.
+
+    `ready`, `tabs` and the browser's RSS are mirrored from the last
+    response. Until the daemon has answered, the browser is assumed to be
+    up, so one left running across a bot restart is still released when idle.
+    Failures are logged and reported as False, like a failed local call.
+    """
+
+    def __init__(self, connection, tenant, login_timeout=180, check_timeout=30):
+        self.connection = connection
+        self.tenant = tenant
+        self.login_timeout = login_timeout
+        self.check_timeout = check_timeout
+        self.ready = True
+        self.tabs = 1
+        self.rss = None
+
+    async def _call(self, op, *args, timeout):
+        try:
+            response = await self.connection.call(self.tenant, op, *args, timeout=timeout)
+        except (DaemonError, asyncio.TimeoutError) as e:
+            logger.error(f"Scraper daemon call {op} failed for {self.tenant}: {e or 'timed out'}")
+            return None
+        state = response['state']
+        self.ready = state['ready']
+        self.tabs = state['tabs']
+        if state['rss'] is not None:
+            self.rss = state['rss']
+        return response['result']
+
+    async def login(self):
+        return bool(await self._call('login', timeout=self.login_timeout + self.check_timeout))
+
+    async def check(self, interval):
+        return bool(await self._call('check', interval, timeout=interval + 2 * self.check_timeout))
+
+    async def refresh_and_check(self):
+        return bool(await self._call('refresh', timeout=2 * self.check_timeout))
+
+    async def watch(self, timeout):
+        return bool(await self._call('watch', timeout, timeout=timeout + 2 * self.check_timeout))
+
+    async def supervise(self, critical=False):
+        await self._call('supervise', critical, timeout=2 * self.check_timeout)
+
+    async def release(self):
+        await self._call('release', timeout=2 * self.check_timeout)
+
+    async def health_status(self):
+        return await self._call('health', timeout=self.check_timeout)
+
+    async def screenshot(self, path):
+        return await self._call('screenshot', path, timeout=2 * self.check_timeout)
+
+    def browser_rss(self):
+        """RSS reported by the daemon's last health sample"""
+        return self.rss if self.ready else None
+
+    async def close(self):
+        """Disconnect only; the daemon keeps the browser running"""
+        await self.connection.close()
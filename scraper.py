@@ -5,41 +5,397 @@ Uses Selenium with Google login
 import os
 import time
 import logging
+from urllib.parse import urlparse
+
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 
+from locators import SelectorCache, race
+from metrics import STAGE_SECONDS, DETECTIONS, FAILURES
+
 logger = logging.getLogger(__name__)
 
+try:
+    import psutil
+except ImportError:  # optional; /proc is used on Linux without it
+    psutil = None
+
+DEFAULT_PROFILE_DIR = os.path.join(os.path.dirname(__file__), '.chrome-profile')
+SOFT_REFRESH_MISSES = 3  # consecutive soft refreshes that fetched nothing before falling back to reloads
+
+# Requests blocked in the monitoring profile: static assets and third-party trackers
+BLOCKED_URL_PATTERNS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.mp4', '*.webm', '*.mp3', '*.wav', '*.ogg',
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+    '*facebook.net*', '*hotjar.com*', '*clarity.ms*', '*segment.io*', '*segment.com*',
+    '*mixpanel.com*', '*intercom.io*', '*intercomcdn.com*', '*sentry.io*', '*fullstory.com*',
+]
+
+# Lower-cases the text of the XPath context node
+_LOWER = "translate({}, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz')"
+
+# "Continue with Google" on the Kalvium login page
+GOOGLE_BUTTON_XPATHS = [
+    # Button contains a span with text
+    f"//button[.//span[contains({_LOWER.format('.')}, 'continue with google')]]",
+    # Button text directly
+    f"//button[contains({_LOWER.format('normalize-space(.)')}, 'continue with google')]",
+    # Role-button div
+    f"//div[@role='button'][.//span[contains({_LOWER.format('.')}, 'continue with google')]]",
+    # Anchor fallback
+    f"//a[contains({_LOWER.format('normalize-space(.)')}, 'continue with google')]",
+    # Provider attribute
+    "//*[@data-provider='google']",
+]
+
+# Stable dashboard strings
+DASHBOARD_XPATHS = [
+    f"//*[contains({_LOWER.format('normalize-space(.)')}, 'your kalvium apps')]",
+    f"//*[contains({_LOWER.format('normalize-space(.)')}, 'my day')]",
+    f"//*[contains({_LOWER.format('normalize-space(.)')}, 'attendance hub')]",
+]
+
+# Chrome's "Turn on sync?" and profile setup prompts that may follow a login
+SYNC_PROMPT_XPATH = (
+    "//button[contains(., 'No thanks')]"
+    " | //span[contains(., 'No thanks')]"
+    " | //div[@role='button'][contains(., 'No thanks')]"
+    " | //button[contains(., 'Not now')]"
+)
+PROFILE_PROMPT_XPATH = (
+    "//button[contains(., 'Use Chrome without an account')]"
+    " | //div[@role='button'][contains(., 'Use Chrome without an account')]"
+    " | //span[contains(., 'Use Chrome without an account')]"
+)
+
+# Cookie fields accepted by Storage.setCookies
+COOKIE_FIELDS = ('name', 'value', 'domain', 'path', 'secure', 'httpOnly', 'sameSite', 'expires')
+
+# Chrome features that do background work a monitoring session never needs
+MONITORING_DISABLED_FEATURES = [
+    'AccountConsistency', 'SignInProfileCreation', 'ChromeWhatsNewUI',
+    'Translate', 'OptimizationHints', 'MediaRouter', 'AutofillServerCommunication',
+    'InterestFeedContentSuggestions', 'CalculateNativeWinOcclusion', 'BackForwardCache',
+]
+
+
+def process_tree_rss(pid):
+    """Total resident memory in bytes of a process and all its descendants, or None if unknown"""
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            procs = [root] + root.children(recursive=True)
+            total = 0
+            for proc in procs:
+                try:
+                    total += proc.memory_info().rss
+                except psutil.Error:
+                    pass
+            return total
+        except psutil.Error:
+            return None
+
+    if not os.path.isdir('/proc'):
+        return None
+    children = {}
+    rss = {}
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                # The command name may contain spaces; fields after ')' are fixed
+                fields = f.read().rsplit(')', 1)[1].split()
+            with open(f'/proc/{entry}/statm') as f:
+                rss[int(entry)] = int(f.read().split()[1]) * page_size
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(int(fields[1]), []).append(int(entry))
+
+    if pid not in rss:
+        return None
+    total = 0
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        total += rss.get(current, 0)
+        stack.extend(children.get(current, []))
+    return total
+
+
+def process_tree_cpu(pid):
+    """User + system CPU seconds of a process and its live descendants, or None if unknown"""
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            total = 0.0
+            for proc in [root] + root.children(recursive=True):
+                try:
+                    times = proc.cpu_times()
+                    total += times.user + times.system
+                except psutil.Error:
+                    pass
+            return total
+        except psutil.Error:
+            return None
+
+    if not os.path.isdir('/proc'):
+        return None
+    children = {}
+    cpu = {}
+    ticks = os.sysconf('SC_CLK_TCK')
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        cpu[int(entry)] = (int(fields[11]) + int(fields[12])) / ticks
+        children.setdefault(int(fields[1]), []).append(int(entry))
+
+    if pid not in cpu:
+        return None
+    total = 0.0
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        total += cpu.get(current, 0.0)
+        stack.extend(children.get(current, []))
+    return total
+
+
+# In-page detector for the "Mark Attendance" button. Installed on every new
+# document via CDP so each check is a single execute_script round-trip.
+DETECTOR_JS = """
+window.__kalviumDetect = function () {
+    var needle = 'mark attendance';
+    function visible(el) {
+        var r = el.getBoundingClientRect();
+        if (r.width === 0 || r.height === 0) return false;
+        var s = window.getComputedStyle(el);
+        return s.visibility !== 'hidden' && s.display !== 'none' && s.opacity !== '0';
+    }
+    function text(el) {
+        return (el.innerText || el.textContent || '').replace(/\\s+/g, ' ').trim();
+    }
+    function result(strategy, el, matched) {
+        var r = el ? el.getBoundingClientRect() : null;
+        return {
+            found: true,
+            strategy: strategy,
+            text: matched,
+            rect: r ? {x: r.x, y: r.y, width: r.width, height: r.height} : null
+        };
+    }
+    var els = document.querySelectorAll('button, [role="button"]');
+    for (var i = 0; i < els.length; i++) {
+        var el = els[i];
+        var t = text(el);
+        if (t.toLowerCase().indexOf(needle) === -1 || !visible(el)) continue;
+        if (el.tagName !== 'BUTTON') return result('role-button', el, t);
+        var spans = el.getElementsByTagName('span');
+        for (var j = 0; j < spans.length; j++) {
+            if (text(spans[j]).toLowerCase().indexOf(needle) !== -1) return result('nested-span', el, t);
+        }
+        return result('button', el, t);
+    }
+    var body = document.body ? text(document.body) : '';
+    if (body.toLowerCase().indexOf(needle) !== -1) {
+        var labels = [];
+        for (var k = 0; k < els.length; k++) {
+            var label = text(els[k]);
+            if (label) labels.push(label);
+        }
+        return {found: true, strategy: 'page-text', text: labels.join(' | '), rect: null};
+    }
+    // Session health: 'login' if we were bounced to a sign-in page, 'ok' on the dashboard
+    var lower = body.toLowerCase();
+    var session = 'unknown';
+    if (location.hostname.indexOf('accounts.google') !== -1 || lower.indexOf('continue with google') !== -1) {
+        session = 'login';
+    } else if (/your kalvium apps|my day|attendance hub/.test(lower)) {
+        session = 'ok';
+    }
+    return {found: false, strategy: null, text: null, rect: null, session: session};
+};
+"""
+
+# Calls the installed detector; returns null if the page predates the install
+DETECT_CALL_JS = "return window.__kalviumDetect ? window.__kalviumDetect() : null;"
+
+# MutationObserver-based watcher, installed alongside the detector. Re-runs the
+# detector (debounced) whenever the DOM changes and wakes any pending waiters.
+WATCHER_JS = """
+(function () {
+    if (window.__kalviumWatch) return;
+    var waiters = [];
+    var scheduled = false;
+    function check() {
+        scheduled = false;
+        if (!waiters.length) return;
+        var r = window.__kalviumDetect();
+        if (!r.found) return;
+        var pending = waiters;
+        waiters = [];
+        for (var i = 0; i < pending.length; i++) pending[i](r);
+    }
+    function start() {
+        new MutationObserver(function () {
+            if (!scheduled) {
+                scheduled = true;
+                setTimeout(check, 50);
+            }
+        }).observe(document.documentElement, {
+            childList: true, subtree: true, characterData: true,
+            attributes: true, attributeFilter: ['style', 'class', 'hidden']
+        });
+    }
+    if (document.documentElement) start();
+    else document.addEventListener('readystatechange', start, {once: true});
+    window.__kalviumWatch = function (timeoutMs, callback) {
+        var r = window.__kalviumDetect();
+        if (r.found || timeoutMs <= 0) return callback(r);
+        var settled = false;
+        function finish(res) {
+            if (settled) return;
+            settled = true;
+            callback(res);
+        }
+        waiters.push(finish);
+        setTimeout(function () {
+            waiters = waiters.filter(function (w) { return w !== finish; });
+            finish({found: false, strategy: null, text: null, rect: null});
+        }, timeoutMs);
+    };
+})();
+"""
+
+# Long-poll: resolves as soon as the button appears or after arguments[0] ms
+WATCH_CALL_JS = """
+var done = arguments[arguments.length - 1];
+if (!window.__kalviumWatch) { done(null); return; }
+window.__kalviumWatch(arguments[0], done);
+"""
+
+# Counts the page's fetch/XHR requests so a soft refresh knows when the data is back.
+# Installed on every new document, before the app's own scripts run.
+NETWORK_TRACKER_JS = """
+(function () {
+    if (window.__kalviumNet) return;
+    var net = window.__kalviumNet = {pending: 0, completed: 0};
+    function settle() {
+        net.pending--;
+        net.completed++;
+    }
+    if (window.fetch) {
+        var fetch = window.fetch;
+        window.fetch = function () {
+            net.pending++;
+            var request = fetch.apply(window, arguments);
+            request.then(settle, settle);
+            return request;
+        };
+    }
+    var send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        net.pending++;
+        this.addEventListener('loadend', settle);
+        return send.apply(this, arguments);
+    };
+})();
+"""
+
+# Soft refresh: fire the focus/visibility events SPAs re-fetch their data on and
+# wait (up to arguments[0] ms) for those requests to finish. Resolves with the
+# number of requests completed, 0 if the app fetched nothing, -1 if still loading.
+SOFT_REFRESH_JS = """
+var done = arguments[arguments.length - 1], timeoutMs = arguments[0];
+var net = window.__kalviumNet, before = net.completed, start = Date.now();
+document.dispatchEvent(new Event('visibilitychange', {bubbles: true}));
+window.dispatchEvent(new Event('focus'));
+(function wait() {
+    if (!net.pending && net.completed > before) {
+        // Give the app a moment to render what it fetched
+        return setTimeout(function () { done(net.completed - before); }, 50);
+    }
+    if (Date.now() - start >= timeoutMs) return done(net.pending ? -1 : 0);
+    setTimeout(wait, 20);
+})();
+"""
+
+
+def count_round_trips(driver):
+    """Count WebDriver commands (one HTTP round-trip each) in `driver.round_trips`"""
+    driver.round_trips = 0
+    execute = driver.execute
+
+    def counting_execute(*args, **kwargs):
+        driver.round_trips += 1
+        return execute(*args, **kwargs)
+
+    driver.execute = counting_execute
+
 
 class AttendanceBot:
-    def __init__(self, email, password, url):
+    def __init__(self, email, password, url, capture_network=False, profile_dir=None):
         self.email = email
         self.password = password
         self.url = url
+        self.capture_network = capture_network
+        self.profile_dir = profile_dir or DEFAULT_PROFILE_DIR
         self.driver = None
         self.logged_in = False
+        self.monitoring = False
+        self.failures = 0  # consecutive failed refreshes; a dead driver fails every call
+        self.soft_refresh_ok = True  # cleared once the dashboard shows it doesn't re-fetch on focus
+        self.soft_refresh_misses = 0  # consecutive soft refreshes that fetched nothing
+        self.tab_handles = []  # dashboard tabs for staggered polling (empty: just the current window)
+        self.tab_index = 0
+        # Winning login/dashboard selectors, kept next to the profile directory
+        self.selectors = SelectorCache(os.path.join(os.path.dirname(self.profile_dir), '.selector-cache.json'))
+
+    def setup_driver(self, monitoring=False):
+        """Initialize and setup Selenium WebDriver.
 
-    def setup_driver(self):
-        """Initialize and setup Selenium WebDriver"""
+        With monitoring=True Chrome runs headless with a small viewport, no
+        images and no background services; use the default headed profile for
+        the interactive Google login.
+        """
         try:
             options = Options()
-            # Uncomment the line below to run in headless mode (no browser window)
-            # options.add_argument('--headless')
+            if monitoring:
+                options.add_argument('--headless=new')
+                options.add_argument('--window-size=1280,800')
+                options.add_argument('--blink-settings=imagesEnabled=false')
+                options.add_argument('--disable-extensions')
+                options.add_argument('--disable-background-networking')
+                options.add_argument('--disable-component-update')
+                options.add_argument('--disable-default-apps')
+                options.add_argument('--disable-domain-reliability')
+                options.add_argument('--disable-client-side-phishing-detection')
+                options.add_argument('--mute-audio')
+                options.add_argument(f"--disable-features={','.join(MONITORING_DISABLED_FEATURES)}")
+            else:
+                options.add_argument('--start-maximized')
+                options.add_argument('--disable-features=AccountConsistency,SignInProfileCreation,ChromeWhatsNewUI')
             options.add_argument('--no-sandbox')
             options.add_argument('--disable-dev-shm-usage')
-            options.add_argument('--start-maximized')
             options.add_argument('--disable-gpu')
             options.add_argument('--no-first-run')
             options.add_argument('--no-default-browser-check')
             options.add_argument('--disable-sync')
-            options.add_argument('--disable-features=AccountConsistency,SignInProfileCreation,ChromeWhatsNewUI')
             options.add_argument('--disable-blink-features=AutomationControlled')
 
             # Persist session across runs to avoid repeated Google login/2FA
-            profile_dir = os.path.join(os.path.dirname(__file__), '.chrome-profile')
+            profile_dir = self.profile_dir
             os.makedirs(profile_dir, exist_ok=True)
             options.add_argument(f'--user-data-dir={profile_dir}')
             options.add_argument('--profile-directory=Default')
@@ -49,35 +405,134 @@ class AttendanceBot:
             if os.path.exists(mac_chrome_path):
                 options.binary_location = mac_chrome_path
             
+            # Record XHR/fetch traffic so the attendance API can be learned (network mode)
+            if self.capture_network:
+                options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
             # Use Selenium Manager (built into Selenium 4.6+) to resolve driver automatically
             self.driver = webdriver.Chrome(options=options)
-            logger.info("WebDriver initialized successfully")
+            count_round_trips(self.driver)
+            self.monitoring = monitoring
+            if self.capture_network or monitoring:
+                self.driver.execute_cdp_cmd('Network.enable', {})
+            if monitoring:
+                self.strip_resources()
+            self.install_detector()
+            logger.info(f"WebDriver initialized successfully ({'monitoring' if monitoring else 'interactive'} profile)")
             return True
         except Exception as e:
             logger.error(f"Failed to initialize WebDriver: {e}")
             return False
 
-    def is_dashboard_loaded(self):
-        """Heuristically determine if Kalvium dashboard is loaded (already logged in)."""
+    def activate(self):
+        """Make this bot's window current; a no-op unless the driver is shared"""
+
+    def open_tabs(self, count):
+        """Have the dashboard open in `count` tabs of this browser, the current window included"""
         try:
-            wait = WebDriverWait(self.driver, 5)
-            # Look for stable dashboard strings
-            candidates = [
-                "//*[contains(translate(normalize-space(.),'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'), 'your kalvium apps')]",
-                "//*[contains(translate(normalize-space(.),'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'), 'my day')]",
-                "//*[contains(translate(normalize-space(.),'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'), 'attendance hub')]",
-            ]
-            for xp in candidates:
-                try:
-                    el = wait.until(EC.presence_of_element_located((By.XPATH, xp)))
-                    if el:
-                        return True
-                except Exception:
-                    continue
+            if not self.tab_handles:
+                self.tab_handles = [self.driver.current_window_handle]
+            while len(self.tab_handles) < count:
+                self.driver.switch_to.new_window('tab')
+                # CDP overrides and injected scripts are per tab; repeat the setup_driver() ones
+                if self.monitoring:
+                    self.driver.execute_cdp_cmd('Network.enable', {})
+                    self.strip_resources()
+                self.install_detector()
+                self.driver.get(self.url)
+                self.tab_handles.append(self.driver.current_window_handle)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to open dashboard tabs: {e}")
             return False
+
+    def next_tab(self):
+        """Switch to the next dashboard tab (round robin)"""
+        if len(self.tab_handles) < 2:
+            return
+        self.tab_index = (self.tab_index + 1) % len(self.tab_handles)
+        self.driver.switch_to.window(self.tab_handles[self.tab_index])
+
+    def strip_resources(self):
+        """Block static assets and trackers, and hide the headless user agent"""
+        try:
+            self.driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URL_PATTERNS})
+            user_agent = self.driver.execute_script("return navigator.userAgent")
+            self.driver.execute_cdp_cmd('Network.setUserAgentOverride', {
+                'userAgent': user_agent.replace('HeadlessChrome', 'Chrome')
+            })
+        except Exception as e:
+            logger.warning(f"Could not apply request blocking: {e}")
+
+    def browser_rss(self):
+        """Resident memory of chromedriver and its Chrome process tree in bytes, or None"""
+        try:
+            return process_tree_rss(self.driver.service.process.pid)
+        except Exception:
+            return None
+
+    def health_sample(self):
+        """Memory and CPU seconds of the browser process tree and the latency of a no-op command"""
+        start = time.perf_counter()
+        try:
+            self.driver.execute_script("return 1")
+            latency = time.perf_counter() - start
+        except Exception as e:
+            # Counts towards the browser being declared dead
+            self.failures += 1
+            logger.error(f"Browser did not answer a health probe: {e}")
+            latency = None
+        try:
+            pid = self.driver.service.process.pid
         except Exception:
+            pid = None
+        return {
+            'pid': pid, 'at': time.monotonic(), 'latency': latency,
+            'rss': process_tree_rss(pid) if pid else None, 'cpu': process_tree_cpu(pid) if pid else None,
+        }
+
+    def resume_session(self):
+        """Open the dashboard and check for a persisted session without any login interaction"""
+        try:
+            self.driver.get(self.url)
+            self.logged_in = self.is_dashboard_loaded()
+            return self.logged_in
+        except Exception as e:
+            logger.error(f"Failed to resume session: {e}")
             return False
 
+    def export_cookies(self):
+        """All cookies of the browser (every domain), as CDP Cookie objects"""
+        return self.driver.execute_cdp_cmd('Storage.getCookies', {})['cookies']
+
+    def import_cookies(self, cookies, context_id=None):
+        """Load cookies from export_cookies() into the browser (or a CDP browser context)"""
+        params = []
+        for cookie in cookies:
+            param = {k: cookie[k] for k in COOKIE_FIELDS if k in cookie}
+            if cookie.get('session'):
+                param.pop('expires', None)
+            params.append(param)
+        command = {'cookies': params}
+        if context_id:
+            command['browserContextId'] = context_id
+        self.driver.execute_cdp_cmd('Storage.setCookies', command)
+
+    def install_detector(self):
+        """Register the in-page detector so it is defined on every page load"""
+        try:
+            self.driver.execute_cdp_cmd(
+                'Page.addScriptToEvaluateOnNewDocument', {'source': NETWORK_TRACKER_JS + DETECTOR_JS + WATCHER_JS}
+            )
+        except Exception as e:
+            # Not fatal: detect_attendance_button() injects it on demand
+            logger.warning(f"Could not register detector script: {e}")
+
+    def is_dashboard_loaded(self, timeout=5):
+        """Heuristically determine if Kalvium dashboard is loaded (already logged in)."""
+        element, _ = race(self.driver, DASHBOARD_XPATHS, timeout, cache=self.selectors, page='dashboard')
+        return element is not None
+
     def login_with_google(self):
         """Login to Kalvium using Google account.
         Clicks "Continue with Google" and completes OAuth flow.
@@ -87,41 +542,22 @@ class AttendanceBot:
             self.driver.get(self.url)
 
             wait = WebDriverWait(self.driver, 20)
+            host = urlparse(self.url).netloc
 
-            # If already logged in (persisted session), skip Google OAuth
-            if "kalvium.community" in self.driver.current_url:
-                if self.is_dashboard_loaded():
-                    logger.info("Dashboard loaded; session persisted. Skipping login.")
-                    self.logged_in = True
-                    return True
-
-            # Click the "Continue with Google" button (try multiple selectors)
-            selectors = [
-                # Button contains a span with text
-                "//button[.//span[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'), 'continue with google')]]",
-                # Button text directly
-                "//button[contains(translate(normalize-space(.),'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'), 'continue with google')]",
-                # Role-button div
-                "//div[@role='button'][.//span[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'), 'continue with google')]]",
-                # Anchor fallback
-                "//a[contains(translate(normalize-space(.),'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'), 'continue with google')]",
-                # Provider attribute
-                "//*[@data-provider='google']",
-            ]
-
-            google_login_button = None
-            last_err = None
-            for xpath in selectors:
-                try:
-                    google_login_button = wait.until(EC.element_to_be_clickable((By.XPATH, xpath)))
-                    if google_login_button:
-                        break
-                except Exception as e:
-                    last_err = e
-                    continue
-
-            if not google_login_button:
-                raise RuntimeError(f"Google login button not found; last error: {last_err}")
+            # Race the dashboard (persisted session, skip Google OAuth) against every
+            # "Continue with Google" selector in one wait
+            element, xpath = race(
+                self.driver, [*DASHBOARD_XPATHS, *GOOGLE_BUTTON_XPATHS], 20,
+                clickable=True, cache=self.selectors, page='login'
+            )
+            if element is None:
+                raise RuntimeError("Neither the dashboard nor the Google login button appeared")
+            if xpath in DASHBOARD_XPATHS:
+                logger.info("Dashboard loaded; session persisted. Skipping login.")
+                self.logged_in = True
+                return True
+            google_login_button = element
+            logger.info(f"Found Google login button with {xpath}")
 
             try:
                 google_login_button.click()
@@ -130,12 +566,15 @@ class AttendanceBot:
                 self.driver.execute_script("arguments[0].click();", google_login_button)
             logger.info("Clicked 'Continue with Google'")
 
-            # If a new window opens, switch to it; otherwise stay
+            # If a new window opens, switch to it; otherwise stay (whichever happens first)
             try:
-                wait.until(lambda d: len(d.window_handles) >= 2)
+                wait.until(lambda d: len(d.window_handles) >= 2 or "accounts.google" in d.current_url)
+            except Exception:
+                pass
+            if len(self.driver.window_handles) >= 2:
                 self.driver.switch_to.window(self.driver.window_handles[-1])
                 logger.info("Switched to Google auth window")
-            except Exception:
+            else:
                 logger.info("No popup detected; continuing in current window")
 
             # If account chooser appears, pick the provided account or use another account
@@ -176,7 +615,7 @@ class AttendanceBot:
             logger.info("Waiting up to 90s for login, 2FA or consent...")
             try:
                 WebDriverWait(self.driver, 90).until(
-                    lambda d: "kalvium.community" in d.current_url and "accounts.google" not in d.current_url
+                    lambda d: host in d.current_url and "accounts.google" not in d.current_url
                 )
             except Exception:
                 # If still in popup, close and switch back
@@ -184,37 +623,21 @@ class AttendanceBot:
                     self.driver.close()
                     self.driver.switch_to.window(self.driver.window_handles[0])
 
-            # Handle Chrome's "Turn on sync?" or profile prompt if it shows up
-            try:
-                sync_dismiss = WebDriverWait(self.driver, 3).until(
-                    EC.element_to_be_clickable((
-                        By.XPATH,
-                        "//button[contains(., 'No thanks')]"
-                        " | //span[contains(., 'No thanks')]"
-                        " | //div[@role='button'][contains(., 'No thanks')]"
-                        " | //button[contains(., 'Not now')]"
-                    ))
-                )
-                sync_dismiss.click()
-                logger.info("Dismissed Chrome sync/profile prompt")
-            except Exception:
-                pass
-
-            # Prefer "Use Chrome without an account" on profile setup prompt
-            try:
-                without_account_btn = WebDriverWait(self.driver, 4).until(
-                    EC.element_to_be_clickable((
-                        By.XPATH,
-                        "//button[contains(., 'Use Chrome without an account')]"
-                        " | //div[@role='button'][contains(., 'Use Chrome without an account')]"
-                        " | //span[contains(., 'Use Chrome without an account')]"
-                    ))
+            # Handle Chrome's "Turn on sync?" or profile prompt if it shows up. Raced
+            # against the dashboard, so a login without prompts doesn't wait them out
+            # (if the only option visible is 'Continue as ...', leave it untouched)
+            for _ in range(2):
+                element, xpath = race(
+                    self.driver, [*DASHBOARD_XPATHS, SYNC_PROMPT_XPATH, PROFILE_PROMPT_XPATH], 4, clickable=True
                 )
-                without_account_btn.click()
-                logger.info("Selected 'Use Chrome without an account'")
-            except Exception:
-                # If the only option visible is 'Continue as ...', leave it untouched
-                pass
+                if element is None or xpath in DASHBOARD_XPATHS:
+                    break
+                try:
+                    element.click()
+                    logger.info("Dismissed Chrome sync prompt" if xpath == SYNC_PROMPT_XPATH
+                                else "Selected 'Use Chrome without an account'")
+                except Exception:
+                    break
 
             # Final check: ensure dashboard is visible
             if self.is_dashboard_loaded():
@@ -236,12 +659,86 @@ class AttendanceBot:
             logger.error(f"Login failed: {e}")
             return False
 
+    def detect_attendance_button(self):
+        """Run the in-page detector and return its structured result.
+
+        Returns a dict with found, strategy, text and rect keys, or None if the
+        detector could not run.
+        """
+        try:
+            with STAGE_SECONDS.time(stage='detect'):
+                result = self.driver.execute_script(DETECT_CALL_JS)
+                if result is None:
+                    # Detector missing (e.g. CDP registration failed); define and call in one go
+                    result = self.driver.execute_script(DETECTOR_JS + DETECT_CALL_JS)
+            return result
+        except Exception as e:
+            FAILURES.inc(type='detector')
+            logger.error(f"Attendance detector script failed: {e}")
+            return None
+
     def check_attendance_button(self):
         """Check if 'Mark Attendance' button is visible"""
+        if not self.logged_in:
+            return False
+
+        result = self.detect_attendance_button()
+        if result is None:
+            with STAGE_SECONDS.time(stage='detect_xpath'):
+                found = self._check_attendance_button_xpath()
+            DETECTIONS.inc(strategy='xpath' if found else 'none')
+            return found
+
+        DETECTIONS.inc(strategy=result['strategy'] if result['found'] else 'none')
+        if result['found']:
+            if result['strategy'] == 'page-text':
+                logger.info("⚠ Detected 'mark attendance' in page text (button may be rendered differently)")
+                if result['text']:
+                    logger.info(f"Buttons found: {result['text']}")
+            else:
+                logger.info(f"✓ Mark Attendance button found ({result['strategy']}) and visible!")
+            return True
+        self._note_session(result)
+        return False
+
+    def _note_session(self, result):
+        """Drop the logged-in flag if the detector saw a sign-in page"""
+        if result.get('session') == 'login':
+            FAILURES.inc(type='session_expired')
+            logger.warning("Dashboard redirected to a sign-in page; session has expired")
+            self.logged_in = False
+
+    def wait_for_attendance_button(self, timeout):
+        """Block until the button appears or `timeout` seconds pass (watch mode).
+
+        Waits on the page's MutationObserver via execute_async_script, so the
+        button is reported as soon as the DOM changes instead of on the next poll.
+        """
+        if not self.logged_in:
+            return False
+
+        try:
+            self.driver.set_script_timeout(timeout + 5)
+            with STAGE_SECONDS.time(stage='watch'):
+                result = self.driver.execute_async_script(WATCH_CALL_JS, int(timeout * 1000))
+            if result is None:
+                # Watcher missing on this document; install it for the next call
+                self.driver.execute_script(DETECTOR_JS + WATCHER_JS)
+                return self.check_attendance_button()
+        except Exception as e:
+            logger.error(f"Watch for attendance button failed: {e}")
+            return self.check_attendance_button()
+
+        DETECTIONS.inc(strategy=result['strategy'] if result['found'] else 'none')
+        if result['found']:
+            logger.info(f"✓ Mark Attendance button appeared ({result['strategy']})")
+            return True
+        self._note_session(result)
+        return False
+
+    def _check_attendance_button_xpath(self):
+        """Legacy multi-query XPath cascade; used as a fallback if the in-page detector fails"""
         try:
-            if not self.logged_in:
-                return False
-            
             # Try multiple selector strategies for the Mark Attendance button
             # Strategy 1: Direct button text match
             mark_attendance_buttons = self.driver.find_elements(
@@ -292,28 +789,92 @@ class AttendanceBot:
     def refresh_page(self):
         """Refresh the current page"""
         try:
-            self.driver.refresh()
-            logger.info("Page refreshed")
-            # Give the page a moment to settle
-            time.sleep(0.8)
+            with STAGE_SECONDS.time(stage='refresh'):
+                self.driver.refresh()
+                logger.info("Page refreshed")
+                # Give the page a moment to settle
+                time.sleep(0.8)
+            self.failures = 0
             return True
         except Exception as e:
+            self.failures += 1
+            FAILURES.inc(type='refresh')
             logger.error(f"Failed to refresh page: {e}")
             return False
 
+    def soft_refresh(self, timeout=5):
+        """Have the dashboard reload its data in place instead of reloading the document.
+
+        Returns True once the re-fetched data is in. Returns False on an error,
+        a timeout, or if the app fetched nothing; once it has fetched nothing
+        SOFT_REFRESH_MISSES times in a row soft refresh is turned off for this
+        browser.
+        """
+        if not self.soft_refresh_ok:
+            return False
+        try:
+            self.driver.set_script_timeout(timeout + 5)
+            with STAGE_SECONDS.time(stage='soft_refresh'):
+                fetched = self.driver.execute_async_script(NETWORK_TRACKER_JS + SOFT_REFRESH_JS, int(timeout * 1000))
+        except Exception as e:
+            FAILURES.inc(type='soft_refresh')
+            logger.error(f"Soft refresh failed: {e}")
+            return False
+        if fetched == 0:
+            self.soft_refresh_misses += 1
+            if self.soft_refresh_misses >= SOFT_REFRESH_MISSES:
+                logger.warning("Dashboard did not re-fetch its data on focus; using full reloads")
+                self.soft_refresh_ok = False
+            return False
+        self.soft_refresh_misses = 0
+        if fetched < 0:
+            FAILURES.inc(type='soft_refresh')
+            logger.warning(f"Soft refresh still loading after {timeout}s")
+            return False
+        return True
+
     def close(self):
         """Close the WebDriver"""
         if self.driver:
-            self.driver.quit()
+            try:
+                self.driver.quit()
+            finally:
+                self.driver = None
+                self.logged_in = False
             logger.info("WebDriver closed")
 
     
 
 
-def create_bot(email, password, url):
-    """Factory function to create and initialize the bot"""
-    bot = AttendanceBot(email, password, url)
-    if bot.setup_driver():
-        if bot.login_with_google():
+def create_bot(email, password, url, capture_network=False, monitoring=False, profile_dir=None, cookies=None):
+    """Factory function to create and initialize the bot.
+
+    With monitoring=True the bot ends up in the lightweight headless profile.
+    The headed browser is only started if the persisted session is missing
+    and an interactive Google login is needed. `cookies` (from
+    export_cookies()) seed a fresh profile from an existing session.
+    """
+    bot = AttendanceBot(email, password, url, capture_network=capture_network, profile_dir=profile_dir)
+    if not monitoring:
+        if bot.setup_driver():
+            if cookies:
+                bot.import_cookies(cookies)
+            if bot.login_with_google():
+                return bot
+        return None
+
+    if bot.setup_driver(monitoring=True):
+        if cookies:
+            bot.import_cookies(cookies)
+        if bot.resume_session():
+            logger.info("Persisted session is valid; monitoring headless")
             return bot
+        bot.close()
+
+    logger.info("No valid session; starting headed browser for Google login")
+    logged_in = bot.setup_driver() and bot.login_with_google()
+    bot.close()
+    if logged_in and bot.setup_driver(monitoring=True) and bot.resume_session():
+        return bot
+    bot.close()
     return None
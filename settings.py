@@ -0,0 +1,79 @@
+"""
+Settings that can change while the bot is running
+SETTINGS_FILE (JSON) overrides the class schedule, calendar files, ping
+message, dashboard URL and check timings from config.py. The bot re-reads it
+when it changes or on !reload; a file that fails validation is rejected and the
+running settings kept
+"""
+import json
+from urllib.parse import urlparse
+
+from config import (
+    CHECK_INTERVAL, MAX_IDLE_SLEEP, WARMUP_LEAD_TIME, IDLE_TIMEOUT, FAST_CHECK_INTERVAL, LATENCY_BUDGET,
+    KALVIUM_URL, PING_MESSAGE, CLASS_SCHEDULE, CALENDAR_FILES, SETTINGS_FILE
+)
+from timetable import parse_schedule
+
+# Timing settings in seconds and the smallest value each accepts
+TIMINGS = {
+    'check_interval': 1,
+    'max_idle_sleep': 1,
+    'warmup_lead_time': 0,
+    'idle_timeout': 0,  # 0 keeps the browser open
+    'fast_check_interval': 1,
+    'latency_budget': 1,
+}
+
+
+class Settings:
+    """One validated snapshot of the hot-reloadable settings; swapped whole, never modified"""
+
+    def __init__(self, check_interval=CHECK_INTERVAL, max_idle_sleep=MAX_IDLE_SLEEP,
+                 warmup_lead_time=WARMUP_LEAD_TIME, idle_timeout=IDLE_TIMEOUT,
+                 fast_check_interval=FAST_CHECK_INTERVAL, latency_budget=LATENCY_BUDGET,
+                 url=KALVIUM_URL, ping_message=PING_MESSAGE, schedule=CLASS_SCHEDULE,
+                 calendars=CALENDAR_FILES):
+        self.check_interval = check_interval
+        self.max_idle_sleep = max_idle_sleep
+        self.warmup_lead_time = warmup_lead_time
+        self.idle_timeout = idle_timeout
+        self.fast_check_interval = fast_check_interval
+        self.latency_budget = latency_budget
+        self.url = url
+        self.ping_message = ping_message
+        self.schedule = schedule
+        self.calendars = calendars
+
+        for name, minimum in TIMINGS.items():
+            value = getattr(self, name)
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or value < minimum:
+                raise ValueError(f"{name} must be a number of seconds >= {minimum}, got {value!r}")
+        parsed = urlparse(url) if isinstance(url, str) else None
+        if not parsed or parsed.scheme not in ('http', 'https') or not parsed.netloc:
+            raise ValueError(f"url must be an http(s) URL, got {url!r}")
+        if not isinstance(ping_message, str) or not ping_message.strip():
+            raise ValueError("ping_message must be a non-empty string")
+        if not isinstance(calendars, list) or not all(isinstance(path, str) for path in calendars):
+            raise ValueError("calendars must be a list of file paths")
+
+
+def load_settings(path=SETTINGS_FILE):
+    """Read SETTINGS_FILE, falling back to config.py for anything it leaves out.
+
+    Raises OSError or ValueError (including unknown keys, to catch typos).
+    """
+    if not path:
+        return Settings()
+
+    with open(path) as f:
+        raw = json.load(f)
+    if not isinstance(raw, dict):
+        raise ValueError(f"{path} must contain a JSON object")
+
+    known = set(TIMINGS) | {'url', 'ping_message', 'schedule', 'calendars'}
+    unknown = sorted(set(raw) - known)
+    if unknown:
+        raise ValueError(f"Unknown setting(s) in {path}: {', '.join(unknown)}")
+    if 'schedule' in raw:
+        raw['schedule'] = parse_schedule(raw['schedule'])
+    return Settings(**raw)
@@ -0,0 +1,119 @@
+"""
+Durable per-period state
+Keeps one SQLite row per tenant and class period (detection time, ping result,
+check count) so a restart mid-class neither re-pings nor forgets the period,
+and !history can answer from an index instead of the logs
+"""
+import logging
+import os
+import sqlite3
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATE_FILE = os.path.join(os.path.dirname(__file__), '.attendance-state.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS periods (
+    tenant TEXT NOT NULL,
+    date TEXT NOT NULL,
+    period_start TEXT NOT NULL,
+    period_end TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    detected_at REAL,
+    pinged_at REAL,
+    ping_ok INTEGER,
+    checks INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (tenant, date, period_start)
+) WITHOUT ROWID
+"""
+
+COLUMNS = ('tenant', 'date', 'period_start', 'period_end', 'started_at', 'detected_at', 'pinged_at', 'ping_ok', 'checks')
+
+UPSERT = f"""
+INSERT INTO periods ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})
+ON CONFLICT (tenant, date, period_start) DO UPDATE SET
+    detected_at = excluded.detected_at, pinged_at = excluded.pinged_at,
+    ping_ok = excluded.ping_ok, checks = excluded.checks
+"""
+
+
+class StateStore:
+    """SQLite store (WAL mode) for class periods.
+
+    Rows are dicts with the COLUMNS keys. Check counts are batched and
+    written at most every `flush_interval` seconds; detections and ping
+    results are written straight away since they decide whether a restarted
+    bot pings again.
+    """
+
+    def __init__(self, path=DEFAULT_STATE_FILE, flush_interval=5.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.db = sqlite3.connect(path or ':memory:', isolation_level=None)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(SCHEMA)
+        self._dirty = {}
+        self._last_flush = time.monotonic()
+
+    @staticmethod
+    def _key(row):
+        return row['tenant'], row['date'], row['period_start']
+
+    def open_period(self, tenant, date, period):
+        """The row for `tenant`'s period (start, end) on `date`, created if new"""
+        found = self.db.execute(
+            "SELECT * FROM periods WHERE tenant = ? AND date = ? AND period_start = ?", (tenant, date, period[0])
+        ).fetchone()
+        if found is not None:
+            return dict(found)
+        row = dict.fromkeys(COLUMNS)
+        row.update(tenant=tenant, date=date, period_start=period[0], period_end=period[1],
+                   started_at=time.time(), checks=0)
+        self._dirty[self._key(row)] = row
+        return row
+
+    def record_check(self, row):
+        row['checks'] += 1
+        self._dirty[self._key(row)] = row
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def record_detection(self, row, when=None):
+        if row['detected_at'] is None:
+            row['detected_at'] = when or time.time()
+        self._dirty[self._key(row)] = row
+        self.flush()
+
+    def record_ping(self, row, ok, when=None):
+        row['pinged_at'] = when or time.time()
+        row['ping_ok'] = int(ok)
+        self._dirty[self._key(row)] = row
+        self.flush()
+
+    def flush(self):
+        """Write pending rows in one transaction"""
+        self._last_flush = time.monotonic()
+        if not self._dirty:
+            return
+        rows = [tuple(row[c] for c in COLUMNS) for row in self._dirty.values()]
+        try:
+            with self.db:
+                self.db.execute("BEGIN")
+                self.db.executemany(UPSERT, rows)
+            self._dirty.clear()
+        except sqlite3.Error as e:
+            logger.error(f"Failed to save attendance state: {e}")
+
+    def history(self, tenant, limit=10):
+        """Most recent periods of `tenant`, newest first (walks the primary key backwards)"""
+        rows = self.db.execute(
+            "SELECT * FROM periods WHERE tenant = ? ORDER BY date DESC, period_start DESC LIMIT ?", (tenant, limit)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self):
+        self.flush()
+        self.db.close()
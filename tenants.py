@@ -0,0 +1,132 @@
+"""
+Tenant configuration for monitoring several Kalvium accounts from one bot
+Each tenant has its own credentials, dashboard URL, Discord channel and schedule
+"""
+import json
+import logging
+import os
+
+from config import (
+    GOOGLE_EMAIL, GOOGLE_PASSWORD, KALVIUM_URL, ATTENDANCE_CHANNEL_ID, NOTIFY_CHANNEL_IDS, WEBHOOK_URLS,
+    PING_WEBHOOK_URL, CLASS_SCHEDULE, PING_MESSAGE, CALENDAR_FILES, TENANTS_FILE, TIMEZONE
+)
+from calendars import load_calendars
+from timetable import Timetable, parse_schedule
+
+logger = logging.getLogger(__name__)
+
+
+class Tenant:
+    """One monitored account plus its per-period runtime state"""
+
+    def __init__(self, name, email, password, url=KALVIUM_URL, channel_id=ATTENDANCE_CHANNEL_ID,
+                 schedule=None, ping_message=PING_MESSAGE, notify_channel_ids=(), webhook_urls=(),
+                 ping_webhook_url=None, calendars=(), exceptions=None):
+        self.name = name
+        self.email = email
+        self.password = password
+        self.url = url
+        self.channel_id = channel_id
+        self.schedule = schedule if schedule is not None else CLASS_SCHEDULE
+        self.calendars = list(calendars)  # files `exceptions` was loaded from, watched for changes
+        self.timetable = Timetable(self.schedule, exceptions=exceptions)
+        self.ping_message = ping_message
+        self.notify_channel_ids = list(notify_channel_ids)
+        self.webhook_urls = list(webhook_urls)
+        self.ping_webhook_url = ping_webhook_url
+
+        # Runtime state
+        self.worker = None
+        self.is_checking = False
+        self.attendance_marked = False
+        self.current_class_period = None
+        self.next_check = 0.0
+        self.phase = 0.0
+        self.idle_since = None  # monotonic time the last period ended
+        self.last_miss = None  # monotonic start of the last check that found nothing
+        self.record = None  # current period's row in the state store
+        self.task = None  # in-flight check_tenant() run
+
+    def update_from(self, other):
+        """Take over `other`'s reloadable configuration, keeping this tenant's worker and period state"""
+        if (other.email, other.password) != (self.email, self.password):
+            logger.warning(f"[{self.name}] Credentials changed; they take effect after a restart")
+        self.url = other.url
+        self.channel_id = other.channel_id
+        self.schedule = other.schedule
+        self.calendars = other.calendars
+        self.timetable = other.timetable
+        self.ping_message = other.ping_message
+        self.notify_channel_ids = other.notify_channel_ids
+        self.webhook_urls = other.webhook_urls
+        self.ping_webhook_url = other.ping_webhook_url
+
+    @property
+    def channel_ids(self):
+        """Every channel the attendance ping goes to, the main one first"""
+        return list(dict.fromkeys([self.channel_id, *self.notify_channel_ids]))
+
+    def ping_targets(self):
+        """Notifier.notify() destinations; with a fast-path webhook the main channel is only the fallback"""
+        if not self.ping_webhook_url:
+            return dict(channel_ids=self.channel_ids, webhook_urls=self.webhook_urls)
+        return dict(
+            channel_ids=[c for c in self.notify_channel_ids if c != self.channel_id],
+            webhook_urls=self.webhook_urls,
+            fast_webhook_url=self.ping_webhook_url,
+            fallback_channel_ids=[self.channel_id],
+        )
+
+    def __repr__(self):
+        return f"Tenant({self.name!r})"
+
+
+def load_tenants(path=TENANTS_FILE, settings=None):
+    """Load tenants from the JSON tenants file, or build the single tenant from .env.
+
+    Passwords may be given inline ("password") or, preferably, as the name of
+    an environment variable ("password_env") so the file holds no secrets.
+    URL, schedule, calendars and ping message default to `settings` (a
+    Settings) if given. Calendar files are read here, so a missing or
+    invalid one raises OSError or ValueError.
+    """
+    url = settings.url if settings else KALVIUM_URL
+    schedule = settings.schedule if settings else CLASS_SCHEDULE
+    calendars = settings.calendars if settings else CALENDAR_FILES
+    ping_message = settings.ping_message if settings else PING_MESSAGE
+    if not path:
+        return [Tenant('default', GOOGLE_EMAIL, GOOGLE_PASSWORD, url=url, schedule=schedule,
+                       ping_message=ping_message, notify_channel_ids=NOTIFY_CHANNEL_IDS,
+                       webhook_urls=WEBHOOK_URLS, ping_webhook_url=PING_WEBHOOK_URL, calendars=calendars,
+                       exceptions=load_calendars(calendars, TIMEZONE, schedule))]
+
+    with open(path) as f:
+        entries = json.load(f)
+
+    tenants = []
+    for entry in entries:
+        password = entry.get('password')
+        if 'password_env' in entry:
+            password = os.getenv(entry['password_env'])
+        tenant_schedule = parse_schedule(entry['schedule']) if 'schedule' in entry else schedule
+        tenant_calendars = entry.get('calendars', calendars)
+        tenants.append(Tenant(
+            name=entry['name'],
+            email=entry['email'],
+            password=password,
+            url=entry.get('url', url),
+            channel_id=int(entry.get('channel_id', ATTENDANCE_CHANNEL_ID)),
+            schedule=tenant_schedule,
+            ping_message=entry.get('ping_message', ping_message),
+            notify_channel_ids=[int(c) for c in entry.get('notify_channel_ids', [])],
+            webhook_urls=entry.get('webhook_urls', []),
+            ping_webhook_url=entry.get('ping_webhook_url'),
+            calendars=tenant_calendars,
+            exceptions=load_calendars(tenant_calendars, TIMEZONE, tenant_schedule),
+        ))
+
+    names = [t.name for t in tenants]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate tenant names in {path}")
+    logger.info(f"Loaded {len(tenants)} tenants from {path}")
+    return tenants
@@ -0,0 +1,135 @@
+"""check_tenant() period handling with a fake browser worker and a fake clock"""
+import asyncio
+import functools
+import importlib
+import os
+import subprocess
+import sys
+from datetime import datetime
+
+import pytz
+import pytest
+
+from remote import RemoteWorker
+from store import StateStore
+from tenants import Tenant
+from timetable import Timetable
+
+TZ = pytz.timezone('Asia/Kolkata')
+
+
+class FakeWorker:
+    """Always logged in; the button is never on the page"""
+    ready = True
+    tabs = 1
+
+    def __init__(self):
+        self.checks = 0
+
+    async def login(self):
+        return True
+
+    async def check(self, interval):
+        self.checks += 1
+        return False
+
+    async def supervise(self, critical=False):
+        pass
+
+
+# config is already imported (and read the environment) by the time a fixture runs; patch it instead
+IMPORT_PATCHES = {
+    'config.SCRAPER_SOCKET': os.devnull,  # drive (never started) daemon workers, not local browsers
+    'config.COORDINATION_DB': None,
+    'store.StateStore': functools.partial(StateStore, path=None),
+}
+
+
+@pytest.fixture(scope='module')
+def bot():
+    # Import without browsers, Discord access or a state file on disk
+    with pytest.MonkeyPatch.context() as patch:
+        for target, value in IMPORT_PATCHES.items():
+            patch.setattr(target, value)
+        module = importlib.import_module('bot')
+    assert all(isinstance(tenant.worker, RemoteWorker) for tenant in module.tenants)
+    return module
+
+
+def test_daemon_client_never_imports_selenium():
+    # A fresh interpreter: other test modules (e.g. via benchmark) import Selenium themselves
+    code = (
+        "import functools, os, sys, config, store\n"
+        "config.SCRAPER_SOCKET = os.devnull\n"
+        "config.COORDINATION_DB = None\n"
+        "store.StateStore = functools.partial(store.StateStore, path=None)\n"
+        "import bot\n"
+        "assert 'selenium' not in sys.modules, 'selenium imported'\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, '-c', code], cwd=root, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+
+@pytest.fixture
+def clock():
+    class Clock:
+        now = None
+
+        def __call__(self):
+            return self.now
+
+        def set(self, hhmm, second=0):
+            hours, minutes = map(int, hhmm.split(':'))
+            self.now = TZ.localize(datetime(2024, 1, 1, hours, minutes, second))  # a Monday
+
+    return Clock()
+
+
+@pytest.fixture
+def tenant(clock):
+    tenant = Tenant('test', 'e', 'p')
+    tenant.timetable = Timetable({0: [('09:00', '10:00'), ('10:00', '11:00')]}, 'Asia/Kolkata', clock=clock)
+    tenant.worker = FakeWorker()
+    return tenant
+
+
+def test_touching_periods_roll_over(bot, tenant, clock):
+    clock.set('09:30')
+    asyncio.run(bot.check_tenant(tenant))
+    assert tenant.current_class_period == ('09:00', '10:00')
+    first = tenant.record
+
+    # Pinged for the first period; the next one starts straight after it
+    tenant.attendance_marked = True
+    clock.set('10:00', 1)
+    asyncio.run(bot.check_tenant(tenant))
+
+    assert tenant.is_checking
+    assert tenant.current_class_period == ('10:00', '11:00')
+    assert not tenant.attendance_marked
+    assert tenant.record is not first and tenant.record['period_start'] == '10:00'
+    assert tenant.worker.checks == 2
+
+
+def test_same_period_keeps_its_state(bot, tenant, clock):
+    clock.set('09:30')
+    asyncio.run(bot.check_tenant(tenant))
+    record = tenant.record
+    tenant.attendance_marked = True
+
+    clock.set('09:45')
+    asyncio.run(bot.check_tenant(tenant))
+    assert tenant.attendance_marked
+    assert tenant.record is record
+    assert tenant.worker.checks == 1
+
+
+def test_period_end_stops_checking(bot, tenant, clock):
+    clock.set('10:59')
+    asyncio.run(bot.check_tenant(tenant))
+    clock.set('11:01')
+    asyncio.run(bot.check_tenant(tenant))
+    assert not tenant.is_checking
+    assert tenant.current_class_period is None
+    assert tenant.record is None
@@ -0,0 +1,89 @@
+"""Adaptive polling cadence against a fixed and a recorded (fixture) detection history"""
+import os
+import statistics
+
+import pytest
+
+from cadence import CadenceModel, simulate
+
+HISTORY = os.path.join(os.path.dirname(__file__), 'fixtures', 'attendance-history.json')
+SLOT = 'default/0-09:00'
+
+
+def model(samples=(100, 110, 120, 130, 140), **kwargs):
+    # core band 110-130; 90% band 102-138, widened by the 30s margin to 72-168
+    model = CadenceModel(path=None, default_interval=10, fast_interval=2, latency_budget=60, **kwargs)
+    model.history = {SLOT: list(samples)}
+    return model
+
+
+def test_window():
+    assert model().window(SLOT) == ((110, 130), (72, 168))
+
+
+@pytest.mark.parametrize('offset', [110, 120, 130])
+def test_core_band_is_polled_fast(offset):
+    assert model().interval(SLOT, offset) == 2
+
+
+@pytest.mark.parametrize('offset, interval', [
+    (150, 10),  # shoulder
+    (500, 60),  # far from any past detection
+    (0, 60),
+])
+def test_band_intervals(offset, interval):
+    assert model().interval(SLOT, offset) == interval
+
+
+@pytest.mark.parametrize('offset, interval', [
+    (50, 22),  # latency budget cut short at the shoulder start
+    (105, 5),  # shoulder interval cut short at the core start
+    (109, 2),  # but never below the fast interval
+])
+def test_never_sleeps_past_a_faster_band(offset, interval):
+    assert model().interval(SLOT, offset) == interval
+
+
+def test_falls_back_below_min_samples():
+    sparse = model(samples=(100, 120))
+    assert sparse.window(SLOT) is None
+    assert sparse.interval(SLOT, 110) == 10
+    assert model().interval('default/1-10:00', 110) == 10
+
+
+def test_record_keeps_the_latest_samples(tmp_path):
+    path = str(tmp_path / 'history.json')
+    recorder = CadenceModel(path=path, max_samples=3)
+    for offset in (1, 2, 3, 4.04):
+        recorder.record(SLOT, offset)
+    assert CadenceModel(path=path).history == {SLOT: [2, 3, 4.0]}
+
+
+def test_simulate():
+    fixed = CadenceModel(path=None, default_interval=10)
+    assert simulate(fixed, SLOT, appear_at=125, period_length=3600) == (14, 5)
+    # Fast polling in the core band sees it within the fast interval
+    _, delay = simulate(model(), SLOT, appear_at=125, period_length=3600)
+    assert delay <= 2
+    # A button that never appears is polled until the period ends
+    assert simulate(fixed, SLOT, appear_at=4000, period_length=100) == (11, None)
+
+
+def test_replay_fixture_history():
+    """Leave-one-out replay of the fixture, as `benchmark.py cadence` does"""
+    history = CadenceModel(HISTORY).history
+    assert sum(len(samples) for samples in history.values()) == 23
+    fixed = CadenceModel(path=None, default_interval=10)
+    adaptive_checks, fixed_checks, delays = [], [], []
+    for slot, samples in history.items():
+        for i, appear_at in enumerate(samples):
+            adaptive = CadenceModel(path=None, default_interval=10, fast_interval=2, latency_budget=60)
+            adaptive.history = {slot: samples[:i] + samples[i + 1:]}
+            checks, delay = simulate(adaptive, slot, appear_at, 3600)
+            adaptive_checks.append(checks)
+            delays.append(delay)
+            fixed_checks.append(simulate(fixed, slot, appear_at, 3600)[0])
+    assert None not in delays
+    assert max(delays) <= 60  # the latency budget bounds outliers
+    assert statistics.mean(adaptive_checks) < statistics.mean(fixed_checks)
+    assert statistics.median(delays) <= 2
@@ -0,0 +1,110 @@
+"""Calendar exception files (iCalendar and JSON fixtures) and the timetable they produce"""
+import os
+from datetime import date, datetime, timedelta
+
+import pytz
+import pytest
+
+from calendars import load_calendars, parse_ics, _parse_duration
+from timetable import Timetable
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+ICS = os.path.join(FIXTURES, 'holidays.ics')
+JSON = os.path.join(FIXTURES, 'exams.json')
+TZ = pytz.timezone('Asia/Kolkata')
+
+# Weekdays only; 2024-01-01 is a Monday
+SCHEDULE = {day: [('09:00', '10:00')] for day in range(5)}
+
+
+def at(day, hhmm):
+    hours, minutes = map(int, hhmm.split(':'))
+    return TZ.localize(datetime(2024, 1, day, hours, minutes))
+
+
+def test_ics_fixture():
+    exceptions = load_calendars([ICS], 'Asia/Kolkata', SCHEDULE)
+    assert exceptions == {
+        date(2024, 1, 1): [],
+        date(2024, 1, 15): [], date(2024, 1, 16): [], date(2024, 1, 17): [],  # DTEND is exclusive
+        date(2024, 1, 22): [], date(2024, 1, 23): [],  # DURATION:P2D
+        date(2024, 1, 6): [('14:00', '15:30')],  # DURATION:PT1H30M
+        date(2024, 1, 3): [('09:00', '10:00'), ('14:00', '15:00')],  # UTC times, on top of the weekly period
+        date(2024, 1, 8): [('11:00', '12:00')],  # moved: all-day event plus the new time
+        date(2024, 1, 10): [('09:00', '10:00'), ('16:00', '17:00')],
+    }
+
+
+@pytest.mark.parametrize('paths', [[ICS, JSON], [JSON, ICS]])
+def test_fixtures_merge(paths):
+    exceptions = load_calendars(paths, 'Asia/Kolkata', SCHEDULE)
+    # The JSON periods replace the weekly one; the .ics workshop is added on top
+    assert exceptions[date(2024, 1, 3)] == [('14:00', '15:00'), ('16:00', '17:00')]
+    assert exceptions[date(2024, 1, 26)] == []
+    assert exceptions[date(2024, 1, 30)] == [('10:00', '11:00')]
+
+
+@pytest.mark.parametrize('paths', [[ICS, JSON], [JSON, ICS]])
+def test_extra_session_keeps_another_files_holiday(paths):
+    # Holiday in the JSON file, guest lecture in the .ics file: no weekly class that day
+    exceptions = load_calendars(paths, 'Asia/Kolkata', SCHEDULE)
+    assert exceptions[date(2024, 1, 10)] == [('16:00', '17:00')]
+
+
+def test_timetable_with_fixtures():
+    now = at(14, '20:00')  # Sunday before the break
+    table = Timetable(
+        SCHEDULE, 'Asia/Kolkata', clock=lambda: now,
+        exceptions=load_calendars([ICS, JSON], 'Asia/Kolkata', SCHEDULE)
+    )
+    assert table.current_period(at(1, '09:30')) is None
+    assert table.current_period(at(6, '15:00')) == ('14:00', '15:30')
+    assert table.current_period(at(8, '09:30')) is None
+    assert table.current_period(at(8, '11:30')) == ('11:00', '12:00')
+    # Monday to Wednesday are off; next class is Thursday 09:00
+    assert table.seconds_until_next_start() == (3 * 24 + 13) * 3600
+
+
+@pytest.mark.parametrize('value, duration', [
+    ('PT1H30M', timedelta(hours=1, minutes=30)),
+    ('P1D', timedelta(days=1)),
+    ('P1W', timedelta(weeks=1)),
+    ('P1DT2H', timedelta(days=1, hours=2)),
+    ('PT45S', timedelta(seconds=45)),
+    ('+PT5M', timedelta(minutes=5)),
+    ('-PT15M', -timedelta(minutes=15)),
+])
+def test_parse_duration(value, duration):
+    assert _parse_duration(value, 'test') == duration
+
+
+@pytest.mark.parametrize('value', ['P', 'PT', 'P1H', 'PT1D', '1H', 'P1.5D', ''])
+def test_parse_duration_rejects_invalid(value):
+    with pytest.raises(ValueError):
+        _parse_duration(value, 'test')
+
+
+def event(*lines):
+    return '\n'.join(['BEGIN:VCALENDAR', 'BEGIN:VEVENT', *lines, 'END:VEVENT', 'END:VCALENDAR'])
+
+
+@pytest.mark.parametrize('lines', [
+    ('DTSTART:20240106T140000',),
+    ('DTSTART:20240106T140000', 'DURATION:-PT1H'),
+    ('DTSTART:20240106T140000', 'DTEND:20240106T130000'),
+])
+def test_timed_event_needs_an_end(lines):
+    with pytest.raises(ValueError):
+        parse_ics(event(*lines), 'Asia/Kolkata', SCHEDULE)
+
+
+def test_event_without_start_is_rejected():
+    with pytest.raises(ValueError):
+        parse_ics(event('SUMMARY:No start'), 'Asia/Kolkata', SCHEDULE)
+
+
+def test_json_must_be_an_object(tmp_path):
+    path = tmp_path / 'bad.json'
+    path.write_text('[]')
+    with pytest.raises(ValueError):
+        load_calendars([str(path)], 'Asia/Kolkata', SCHEDULE)
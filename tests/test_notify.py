@@ -0,0 +1,137 @@
+"""Notifier delivery against the benchmark's local fake Discord (webhook server and channel)"""
+import asyncio
+import time
+
+import pytest
+
+from benchmark import FakeChannel, FakeWebhookServer
+from notify import Notifier
+
+
+async def start_notifier(**kwargs):
+    notifier = Notifier(base_delay=0.01, **kwargs)
+    await notifier.start(None)
+    return notifier
+
+
+def test_webhook_delivered():
+    async def scenario():
+        notifier = await start_notifier()
+        try:
+            async with FakeWebhookServer() as server:
+                assert await notifier.notify(None, '@everyone', webhook_urls=[server.url()])
+                assert [body for _, body in server.requests] == [{'content': '@everyone'}]
+        finally:
+            await notifier.close()
+
+    asyncio.run(scenario())
+
+
+def test_rate_limit_honours_retry_after():
+    async def scenario():
+        notifier = await start_notifier()
+        try:
+            async with FakeWebhookServer(rate_limited=2, retry_after=0.2) as server:
+                start = time.monotonic()
+                assert await notifier.notify(None, '@everyone', webhook_urls=[server.url()])
+                # Waited the server's Retry-After, not the (much shorter) backoff
+                assert time.monotonic() - start >= 0.35
+                assert len(server.requests) == 3
+        finally:
+            await notifier.close()
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize('status', [403, 404])
+def test_client_errors_are_not_retried(status):
+    async def scenario():
+        notifier = await start_notifier()
+        try:
+            async with FakeWebhookServer(status=status) as server:
+                assert await notifier.notify(None, '@everyone', webhook_urls=[server.url()]) is False
+                assert len(server.requests) == 1
+        finally:
+            await notifier.close()
+
+    asyncio.run(scenario())
+
+
+def test_server_errors_are_retried_up_to_max_attempts():
+    async def scenario():
+        notifier = await start_notifier(max_attempts=3)
+        try:
+            async with FakeWebhookServer(status=500) as server:
+                assert await notifier.notify(None, '@everyone', webhook_urls=[server.url()]) is False
+                assert len(server.requests) == 3
+        finally:
+            await notifier.close()
+
+    asyncio.run(scenario())
+
+
+def test_key_is_sent_once():
+    async def scenario():
+        notifier = await start_notifier()
+        try:
+            async with FakeWebhookServer() as server:
+                first = notifier.notify('tenant/2024-01-01/09:00', '@everyone', webhook_urls=[server.url()])
+                assert notifier.notify('tenant/2024-01-01/09:00', '@everyone', webhook_urls=[server.url()]) is None
+                assert await first
+                assert notifier.notify('tenant/2024-01-01/09:00', '@everyone', webhook_urls=[server.url()]) is None
+                assert len(server.requests) == 1
+        finally:
+            await notifier.close()
+
+    asyncio.run(scenario())
+
+
+def test_key_is_released_when_every_target_fails():
+    async def scenario():
+        notifier = await start_notifier(max_attempts=1)
+        try:
+            async with FakeWebhookServer(status=500) as server:
+                key = 'tenant/2024-01-01/09:00'
+                assert await notifier.notify(key, '@everyone', webhook_urls=[server.url()]) is False
+                server.status = 204
+                retry = notifier.notify(key, '@everyone', webhook_urls=[server.url()])
+                assert retry is not None and await retry
+        finally:
+            await notifier.close()
+
+    asyncio.run(scenario())
+
+
+def test_fan_out_delivers_to_every_target():
+    async def scenario():
+        notifier = await start_notifier()
+        channel = FakeChannel()
+        notifier.channels[1] = channel
+        try:
+            async with FakeWebhookServer() as server:
+                urls = [server.url(str(i)) for i in range(3)]
+                assert await notifier.notify(None, '@everyone', channel_ids=[1], webhook_urls=urls)
+                await asyncio.gather(*notifier._tasks)
+                assert len(server.requests) == 3
+                assert channel.messages == ['@everyone']
+        finally:
+            await notifier.close()
+
+    asyncio.run(scenario())
+
+
+def test_fast_path_falls_back_to_the_channel():
+    async def scenario():
+        notifier = await start_notifier()
+        channel = FakeChannel()
+        notifier.channels[1] = channel
+        try:
+            async with FakeWebhookServer(status=500) as server:
+                delivered = notifier.notify(None, '@everyone', fast_webhook_url=server.url(), fallback_channel_ids=[1])
+                assert await delivered
+                assert len(server.requests) == 1  # one attempt on the fast path only
+                assert channel.messages == ['@everyone']
+        finally:
+            await notifier.close()
+
+    asyncio.run(scenario())
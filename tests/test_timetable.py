@@ -0,0 +1,107 @@
+"""Timetable lookups against a fixed weekly schedule and a fake clock"""
+from datetime import date, datetime
+
+import pytz
+import pytest
+
+from timetable import Timetable, parse_exceptions, parse_schedule
+
+TZ = pytz.timezone('Asia/Kolkata')
+
+# 2024-01-01 is a Monday
+SCHEDULE = {
+    0: [('09:00', '10:00'), ('10:00', '11:00')],  # touching periods
+    4: [('14:00', '15:00')],
+    6: [('09:00', '10:00')],  # Sundays are never class time
+}
+
+
+def at(day, hhmm, second=0):
+    hours, minutes = map(int, hhmm.split(':'))
+    return TZ.localize(datetime(2024, 1, day, hours, minutes, second))
+
+
+def timetable(now=None, exceptions=None):
+    return Timetable(SCHEDULE, 'Asia/Kolkata', clock=lambda: now, exceptions=exceptions)
+
+
+@pytest.mark.parametrize('now, period', [
+    (at(1, '08:59', 59), None),
+    (at(1, '09:00'), ('09:00', '10:00')),
+    (at(1, '09:30'), ('09:00', '10:00')),
+    (at(1, '11:00'), ('10:00', '11:00')),  # end minute's first second is inclusive
+    (at(1, '11:00', 1), None),
+])
+def test_current_period_bounds(now, period):
+    assert timetable(now).current_period() == period
+
+
+def test_touching_periods_earlier_wins_then_rolls_over():
+    assert timetable(at(1, '10:00')).current_period() == ('09:00', '10:00')
+    assert timetable(at(1, '10:00', 1)).current_period() == ('10:00', '11:00')
+    assert timetable(at(1, '10:00', 1)).current_slot() == ('0-10:00', 1)
+
+
+def test_sunday_is_never_class_time():
+    sunday = at(7, '09:30')
+    assert sunday.weekday() == 6
+    assert timetable(sunday).current_period() is None
+    assert timetable(sunday).current_slot() is None
+
+
+def test_clock_is_converted_to_the_timetable_zone():
+    assert timetable(at(1, '09:30').astimezone(pytz.utc)).current_period() == ('09:00', '10:00')
+
+
+def test_seconds_until_next_start_same_day():
+    assert timetable(at(1, '08:00')).seconds_until_next_start() == 3600
+    # Inside a period the next start is the following period's
+    assert timetable(at(1, '09:30')).seconds_until_next_start() == 1800
+
+
+def test_seconds_until_next_start_across_weekend():
+    # Friday after class -> Monday 09:00, skipping Sunday's ignored period
+    friday = at(5, '15:30')
+    assert friday.weekday() == 4
+    assert timetable(friday).seconds_until_next_start() == (2 * 24 + 17) * 3600 + 30 * 60
+
+
+def test_exceptions_override_weekday():
+    exceptions = parse_exceptions({'2024-01-08': [], '2024-01-13': [['12:00', '13:00']]})
+    table = timetable(at(8, '09:30'), exceptions)
+    assert table.current_period() is None  # holiday Monday
+    # Next start is the extra Saturday session, not Friday's weekly period
+    assert table.seconds_until_next_start(at(12, '15:30')) == (20 * 60 + 30) * 60
+    assert table.upcoming_exceptions() == [(date(2024, 1, 8), []), (date(2024, 1, 13), [('12:00', '13:00')])]
+
+
+def test_seconds_until_next_start_none_without_periods():
+    assert Timetable({}, 'Asia/Kolkata', clock=lambda: at(1, '09:00')).seconds_until_next_start() is None
+
+
+@pytest.mark.parametrize('raw', [
+    {'7': [['09:00', '10:00']]},
+    {'0': [['10:00', '09:00']]},
+    {'0': [['9', '10:00']]},
+])
+def test_parse_schedule_rejects_invalid(raw):
+    with pytest.raises(ValueError):
+        parse_schedule(raw)
+
+
+def test_long_period_containing_several_later_ones():
+    # e.g. a weekly block with extra sessions inside it, from a calendar file
+    day = {0: [('08:00', '13:00'), ('08:30', '09:30'), ('09:30', '10:30'), ('10:45', '11:45')]}
+    table = Timetable(day, 'Asia/Kolkata', clock=lambda: at(1, '10:40'))
+    assert table.current_period() == ('08:00', '13:00')
+    assert table.current_period(at(1, '11:00')) == ('08:00', '13:00')
+    assert table.current_slot(at(1, '12:59')) == ('0-08:00', 4 * 3600 + 59 * 60)
+    assert table.current_period(at(1, '13:00', 1)) is None
+
+
+def test_overlap_after_a_gap():
+    day = {0: [('08:00', '09:00'), ('10:00', '12:00'), ('10:30', '11:00')]}
+    table = Timetable(day, 'Asia/Kolkata', clock=lambda: None)
+    assert table.current_period(at(1, '09:30')) is None
+    assert table.current_period(at(1, '11:30')) == ('10:00', '12:00')
+    assert table.current_period(at(1, '07:59')) is None
@@ -0,0 +1,61 @@
+"""ScraperWorker recovery from a browser whose calls raise (e.g. a pooled tab on a dead shared Chrome)"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from worker import MAX_REFRESH_FAILURES, ScraperWorker
+
+
+class DeadSession:
+    """A logged-in pooled session whose browser has died: every driver call raises"""
+
+    def __init__(self):
+        self.driver = None
+        self.logged_in = True
+        self.failures = 0
+        self.closed = False
+
+    def activate(self):
+        raise ConnectionRefusedError("chromedriver is gone")
+
+    def close(self):
+        self.closed = True
+
+
+def test_raising_checks_replace_the_session():
+    sessions = []
+
+    def factory():
+        sessions.append(DeadSession())
+        return sessions[-1]
+
+    async def scenario():
+        executor = ThreadPoolExecutor(max_workers=1)
+        worker = ScraperWorker('', '', 'http://localhost', executor=executor, factory=factory)
+        try:
+            assert await worker.login()
+            for _ in range(MAX_REFRESH_FAILURES):
+                assert await worker.check(1) is False  # never raises out of check()
+            # Dropped after MAX_REFRESH_FAILURES failed checks; the next login starts over
+            assert not worker.ready
+            await asyncio.sleep(0.05)  # let the close queued on the worker thread run
+            assert sessions[0].closed
+            assert await worker.login()
+            assert len(sessions) == 2
+        finally:
+            await worker.close()
+            executor.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_raising_call_counts_as_timeout():
+    async def scenario():
+        worker = ScraperWorker('', '', 'http://localhost', factory=DeadSession)
+        try:
+            assert await worker.login()
+            assert await worker._run(worker.scraper.activate, 1) is None
+            assert worker._timeouts == 1
+        finally:
+            await worker.close()
+
+    asyncio.run(scenario())
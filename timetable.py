@@ -0,0 +1,171 @@
+"""
+Precompiled class schedule
+Parses CLASS_SCHEDULE once into sorted per-day interval indexes, with dated
+exceptions (holidays, shifted periods, extra sessions) overriding the weekly
+days they fall on, so the check loop can ask for the current period and the
+next period start in O(log n)
+"""
+import bisect
+import itertools
+from datetime import date, datetime, timedelta
+
+import pytz
+
+from config import CLASS_SCHEDULE, TIMEZONE
+
+HORIZON = 400  # days searched for the next period start (covers any break)
+
+
+def _seconds(hhmm):
+    """'08:30' -> seconds since midnight"""
+    hours, minutes = hhmm.split(':')
+    return int(hours) * 3600 + int(minutes) * 60
+
+
+def parse_periods(periods, where='schedule'):
+    """Validate a JSON list of [start, end] HH:MM pairs and return them as tuples"""
+    parsed = []
+    for period in periods:
+        if len(period) != 2 or not all(_valid_time(t) for t in period):
+            raise ValueError(f"Invalid period {period!r} in {where} (expected [\"HH:MM\", \"HH:MM\"])")
+        if _seconds(period[0]) >= _seconds(period[1]):
+            raise ValueError(f"Period {period[0]}-{period[1]} in {where} ends before it starts")
+        parsed.append(tuple(period))
+    return parsed
+
+
+def parse_schedule(raw):
+    """Convert a JSON schedule ({"0": [["08:30", "09:30"], ...]}) to CLASS_SCHEDULE form.
+
+    Raises ValueError for a weekday outside 0-6 or a period that is not a
+    valid start/end pair of HH:MM times in order.
+    """
+    schedule = {}
+    for day, periods in raw.items():
+        if not str(day).isdigit() or not 0 <= int(day) <= 6:
+            raise ValueError(f"Invalid weekday {day!r} in schedule (0=Monday .. 6=Sunday)")
+        schedule[int(day)] = parse_periods(periods)
+    return schedule
+
+
+def parse_exceptions(raw, where='exceptions'):
+    """Convert dated exceptions ({"2024-12-25": [], "2024-12-26..2024-12-31": [], ...}) to {date: periods}.
+
+    A date (or inclusive date range) maps to the periods held that day
+    instead of its weekly ones; an empty list cancels the day.
+    """
+    exceptions = {}
+    for key, periods in raw.items():
+        first, _, last = key.partition('..')
+        try:
+            first = date.fromisoformat(first)
+            last = date.fromisoformat(last) if last else first
+        except ValueError:
+            raise ValueError(f"Invalid date {key!r} in {where} (expected YYYY-MM-DD or YYYY-MM-DD..YYYY-MM-DD)")
+        if last < first:
+            raise ValueError(f"Date range {key} in {where} ends before it starts")
+        periods = parse_periods(periods, where)
+        for offset in range((last - first).days + 1):
+            exceptions[first + timedelta(days=offset)] = periods
+    return exceptions
+
+
+def _valid_time(hhmm):
+    if not isinstance(hhmm, str) or hhmm.count(':') != 1:
+        return False
+    hours, minutes = hhmm.split(':')
+    return hours.isdigit() and minutes.isdigit() and int(hours) < 24 and int(minutes) < 60
+
+
+class DayIndex:
+    """One day's periods as (start, end, label) in seconds since midnight, sorted by start"""
+
+    def __init__(self, times):
+        self.periods = sorted(
+            ((_seconds(start), _seconds(end), (start, end)) for start, end in times), key=lambda p: p[0]
+        )
+        self.starts = [p[0] for p in self.periods]
+        # Latest end among the periods so far, so overlapping periods (e.g. an extra
+        # session inside a long class) are found however many start in between
+        self.reach = list(itertools.accumulate((p[1] for p in self.periods), max))
+
+    def find(self, t):
+        """Index of the earliest-starting period containing second-of-day `t`, or None.
+
+        So a period ending exactly at t takes precedence over one starting at t.
+        """
+        last = bisect.bisect_right(self.starts, t) - 1
+        # The first period whose running end reaches t is the one that ends at or after it
+        first = bisect.bisect_left(self.reach, t)
+        return first if first <= last else None
+
+
+NO_CLASS = DayIndex([])
+
+
+class Timetable:
+    """Weekly class periods plus dated exceptions, indexed per day.
+
+    Periods are inclusive of their end minute's first second, matching the
+    original `start <= now <= end` check; when periods touch or overlap, the
+    earliest-starting one wins. Sundays are never class time in the weekly schedule. A date in
+    `exceptions` ({date: [(start, end), ...]}) has those periods instead of
+    its weekday's: none for a holiday, moved ones, or an extra session.
+    """
+
+    def __init__(self, schedule=CLASS_SCHEDULE, timezone=TIMEZONE, clock=None, exceptions=None):
+        self.tz = pytz.timezone(timezone)
+        self.clock = clock or (lambda: datetime.now(self.tz))
+        self.weekly = {weekday: DayIndex(times) for weekday, times in schedule.items() if weekday <= 5}
+        self.exceptions = {day: DayIndex(times) for day, times in (exceptions or {}).items()}
+
+    def _day(self, day):
+        """The period index in effect on `day`"""
+        index = self.exceptions.get(day)
+        if index is None:
+            index = self.weekly.get(day.weekday(), NO_CLASS)
+        return index
+
+    def _locate(self, now):
+        """(local date, second of that day) for `now`"""
+        now = now.astimezone(self.tz)
+        return now.date(), now.hour * 3600 + now.minute * 60 + now.second + now.microsecond / 1e6
+
+    def current_period(self, now=None):
+        """(start, end) strings of the period containing `now`, or None"""
+        day, t = self._locate(now or self.clock())
+        index = self._day(day)
+        i = index.find(t)
+        return None if i is None else index.periods[i][2]
+
+    def current_slot(self, now=None):
+        """('<weekday>-<start>', seconds since period start) for the current period, or None.
+
+        The key identifies the same period across weeks, e.g. '0-08:30' for Monday 08:30.
+        """
+        day, t = self._locate(now or self.clock())
+        index = self._day(day)
+        i = index.find(t)
+        if i is None:
+            return None
+        start, _, label = index.periods[i]
+        return f"{day.weekday()}-{label[0]}", t - start
+
+    def seconds_until_next_start(self, now=None):
+        """Seconds from `now` until the next period starts, or None if none starts within HORIZON days"""
+        now = (now or self.clock()).astimezone(self.tz)
+        today, t = self._locate(now)
+        for offset in range(HORIZON):
+            day = today + timedelta(days=offset)
+            starts = self._day(day).starts
+            i = bisect.bisect_right(starts, t) if offset == 0 else 0
+            if i < len(starts):
+                start = self.tz.localize(datetime.combine(day, datetime.min.time()) + timedelta(seconds=starts[i]))
+                return (start - now).total_seconds()
+        return None
+
+    def upcoming_exceptions(self, count=5, now=None):
+        """The next `count` dated exceptions from today on, as (date, [(start, end), ...])"""
+        today, _ = self._locate(now or self.clock())
+        days = sorted(day for day in self.exceptions if day >= today)[:count]
+        return [(day, [label for _, _, label in self.exceptions[day].periods]) for day in days]
@@ -0,0 +1,507 @@
+"""
+Async wrapper that keeps all Selenium work off the Discord event loop
+Owns the AttendanceBot instance and runs every browser call on one dedicated thread
+"""
+import asyncio
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import urllib3
+
+from endpoint import AttendanceEndpoint
+from metrics import STAGE_SECONDS, ROUND_TRIPS, FAILURES, BROWSER_RECYCLES
+from scraper import create_bot, DEFAULT_PROFILE_DIR
+
+logger = logging.getLogger(__name__)
+
+# Second persisted profile so the warm standby can run next to the active browser
+STANDBY_PROFILE_DIR = DEFAULT_PROFILE_DIR + '-standby'
+
+MAX_REFRESH_FAILURES = 3  # consecutive failed refreshes before the browser counts as dead
+MAX_TIMEOUTS = 2  # consecutive timed-out (or raising) calls before the browser counts as hung
+
+
+class ScraperWorker:
+    """Runs the blocking scraper on a single worker thread.
+
+    WebDriver sessions are not thread-safe, so every call is funnelled through
+    one thread. Calls are bounded by a timeout; if a call overruns, the
+    coroutine returns early and further calls are refused until the stuck
+    browser call has finished, so work never piles up behind a hung driver.
+
+    A pooled worker is given the executor of a shared browser and a factory
+    that opens its session there; otherwise it owns a thread and a browser.
+
+    After every check the session's health is reviewed. An expired session,
+    a dead or a hung browser is dropped; with `standby` enabled a second,
+    already logged-in browser takes over at once and the failed one is
+    re-authenticated on a separate thread to become the next standby.
+
+    With `soft_refresh` the dashboard re-fetches its data in place between
+    checks; a full reload is still done every `hard_refresh_every` checks
+    and whenever a soft refresh fails.
+
+    With `tabs` > 1 (poll mode, own browser only) the dashboard is kept open
+    in that many tabs and each check reloads the next one, so checks can run
+    `tabs` times per interval while every tab still reloads once per interval.
+
+    With a `health` tracker the browser's memory, CPU and WebDriver latency
+    are sampled every `health_interval` seconds. Once a limit is crossed the
+    browser is recycled (outside critical windows): a replacement is started
+    from its cookies on the other profile, so no new login is needed, and the
+    old browser is closed only after the new one is ready.
+    """
+
+    def __init__(self, email, password, url, mode='poll', monitoring=False, login_timeout=180, check_timeout=30,
+                 watch_refresh_interval=120, executor=None, factory=None, standby=False,
+                 soft_refresh=False, hard_refresh_every=30, health=None, health_interval=60, tabs=1):
+        self.email = email
+        self.password = password
+        self.url = url
+        self.mode = mode
+        self.monitoring = monitoring
+        self.login_timeout = login_timeout
+        self.check_timeout = check_timeout
+        self.watch_refresh_interval = watch_refresh_interval
+        self.soft_refresh = soft_refresh
+        self.hard_refresh_every = hard_refresh_every
+        self._soft_refreshes = 0
+        self.health = health
+        self.health_interval = health_interval
+        self._last_health = 0.0
+        self.last_sample = None
+        self.scraper = None
+        self.standby = None
+        self._last_refresh = 0.0
+        self.endpoint = None
+        self._http = urllib3.PoolManager(maxsize=2, retries=False)
+        self.shared = executor is not None
+        self._executor = executor or self._new_executor()
+        self._factory = factory
+        if tabs > 1 and (mode != 'poll' or self.shared):
+            logger.warning("Multi-tab polling needs poll mode and its own browser; using one tab")
+            tabs = 1
+        self.tabs = tabs
+        self._pending = None
+        self._timeouts = 0
+
+        # Standby and replacement browsers are prepared on their own thread
+        self.standby_enabled = standby and not self.shared
+        self._standby_executor = (
+            None if self.shared else ThreadPoolExecutor(max_workers=1, thread_name_prefix='scraper-standby')
+        )
+        self._recovering = set()
+        self._parked = False
+
+    @staticmethod
+    def _new_executor():
+        return ThreadPoolExecutor(max_workers=1, thread_name_prefix='scraper')
+
+    @property
+    def ready(self):
+        """True once a logged-in scraper is available"""
+        return self.scraper is not None
+
+    @property
+    def busy(self):
+        """True while a previous browser call is still running on the worker thread"""
+        return self._pending is not None and not self._pending.done()
+
+    async def _run(self, func, timeout, *args):
+        """Run a blocking function on the worker thread with a timeout"""
+        if self.busy:
+            logger.warning("Scraper worker still busy with a previous call; skipping")
+            return None
+
+        loop = asyncio.get_running_loop()
+        self._pending = loop.run_in_executor(self._executor, func, *args)
+        try:
+            # shield() keeps the executor future alive so `busy` stays accurate
+            # after a timeout or cancellation of the awaiting task
+            result = await asyncio.wait_for(asyncio.shield(self._pending), timeout)
+            self._timeouts = 0
+            return result
+        except asyncio.TimeoutError:
+            self._timeouts += 1
+            FAILURES.inc(type='timeout')
+            logger.error(f"Scraper call {getattr(func, '__name__', func)} timed out after {timeout}s")
+            return None
+        except Exception as e:
+            # e.g. a dead driver; counted like a timeout so the browser gets replaced
+            self._timeouts += 1
+            FAILURES.inc(type='scraper_error')
+            logger.error(f"Scraper call {getattr(func, '__name__', func)} failed: {e}")
+            return None
+
+    async def login(self):
+        """Start the browser and log in if not done already"""
+        self._parked = False
+        if self.scraper is not None:
+            return True
+
+        if self.standby is not None:
+            self._promote_standby()
+            return True
+        if any(not f.done() for f in self._recovering):
+            logger.info("Waiting for background re-authentication to finish")
+            return False
+
+        logger.info("Initializing Kalvium scraper...")
+        self.scraper = await self._run(self._login, self.login_timeout)
+        self._last_refresh = time.monotonic()
+        if not self.scraper:
+            if self.busy:
+                # Login is still running (e.g. waiting on 2FA); keep its result when it lands
+                self._pending.add_done_callback(self._adopt_late_login)
+            FAILURES.inc(type='login')
+            logger.error("Failed to initialize scraper bot")
+            return False
+        await self._start_standby()
+        return True
+
+    def _login(self):
+        """Blocking browser startup + login, executed on the worker thread"""
+        with STAGE_SECONDS.time(stage='login'):
+            if self._factory is not None:
+                return self._factory()
+            return create_bot(
+                self.email, self.password, self.url,
+                capture_network=self.mode == 'network', monitoring=self.monitoring
+            )
+
+    def _adopt_late_login(self, future):
+        """Keep a scraper whose login finished after the timeout"""
+        if future.cancelled() or future.exception() is not None:
+            return
+        if future.result() and self._parked:
+            self._close_on_worker(future.result())
+        elif future.result() and self.scraper is None:
+            self.scraper = future.result()
+            logger.info("Late login completed; scraper is ready")
+
+    def _close_on_worker(self, scraper):
+        """Queue `scraper.close` on the worker thread, or a thread of its own once the worker is shut down"""
+        try:
+            self._executor.submit(scraper.close)
+        except RuntimeError:
+            threading.Thread(target=scraper.close, name='scraper-close').start()
+
+    async def _start_standby(self):
+        """Prepare a second logged-in browser in the background (standby mode only)"""
+        if not self.standby_enabled or self.standby is not None or self._recovering:
+            return
+        # Seed the standby profile from the active session so no second login is needed
+        cookies = await self._run(self.scraper.export_cookies, self.check_timeout)
+        self._background(self._create_browser, self._other_profile(self.scraper), cookies)
+
+    @staticmethod
+    def _other_profile(scraper):
+        """The persisted profile not used by `scraper` (a profile can't be open in two browsers)"""
+        return DEFAULT_PROFILE_DIR if scraper.profile_dir == STANDBY_PROFILE_DIR else STANDBY_PROFILE_DIR
+
+    def _create_browser(self, profile_dir, cookies=None):
+        """Blocking browser startup + login on `profile_dir`, executed on the standby thread"""
+        with STAGE_SECONDS.time(stage='login'):
+            return create_bot(
+                self.email, self.password, self.url, capture_network=self.mode == 'network',
+                monitoring=self.monitoring, profile_dir=profile_dir, cookies=cookies
+            )
+
+    def _relogin(self, failed):
+        """Close a failed browser and log in again on its profile (standby thread)"""
+        try:
+            failed.close()
+        except Exception as e:
+            logger.warning(f"Error closing failed browser: {e}")
+        return self._create_browser(failed.profile_dir)
+
+    def _background(self, func, *args, on_ready=None):
+        """Run a standby-thread job; the browser it returns becomes the standby (or goes to `on_ready`)"""
+        future = asyncio.get_running_loop().run_in_executor(self._standby_executor, func, *args)
+        self._recovering.add(future)
+        future.add_done_callback(on_ready or self._on_browser_ready)
+
+    def _on_browser_ready(self, future):
+        """Adopt a browser prepared in the background"""
+        self._recovering.discard(future)
+        bot = None if future.cancelled() or future.exception() is not None else future.result()
+        if not bot:
+            logger.error("Background browser preparation failed")
+            return
+        if self._parked:
+            # Released while this browser was starting; don't keep it running idle
+            self._standby_executor.submit(bot.close)
+        elif self.scraper is None:
+            self.scraper = bot
+            self._last_refresh = time.monotonic()
+            logger.info("Re-authenticated browser is now active")
+        elif self.standby is None:
+            self.standby = bot
+            logger.info("Warm standby browser is ready")
+        else:
+            self._standby_executor.submit(bot.close)
+
+    def _on_recycled(self, old, future):
+        """Swap in the replacement for a recycled browser, then close the old one"""
+        self._recovering.discard(future)
+        bot = None if future.cancelled() or future.exception() is not None else future.result()
+        if not bot:
+            logger.error("Replacement browser failed to start; keeping the current one")
+            return
+        if self._parked or self.scraper is not old:
+            # Released or failed over while the replacement was starting
+            self._standby_executor.submit(bot.close)
+            return
+        self.scraper = bot
+        self.endpoint = None
+        self._last_refresh = time.monotonic()
+        self._executor.submit(old.close)
+        logger.info("Recycled browser is now active")
+
+    def _promote_standby(self):
+        self.scraper, self.standby = self.standby, None
+        self._last_refresh = time.monotonic()
+        logger.info("Failed over to the warm standby browser")
+
+    async def _check_health(self):
+        """Replace the active browser if its session expired or it stopped responding"""
+        scraper = self.scraper
+        if scraper is None:
+            return
+        if scraper.logged_in and scraper.failures < MAX_REFRESH_FAILURES and self._timeouts < MAX_TIMEOUTS:
+            return
+
+        logger.warning("Session lost or browser unresponsive; replacing it")
+        FAILURES.inc(type='browser_replaced')
+        self.scraper = None
+        self.endpoint = None
+        self._timeouts = 0
+        if self.busy and not self.shared:
+            # The failed browser is stuck on the worker thread; continue on a fresh one
+            self._executor = self._new_executor()
+            self._pending = None
+
+        if self.standby is not None:
+            self._promote_standby()
+
+        if self.standby_enabled:
+            # Re-authenticate the failed browser while the active one keeps watching
+            self._background(self._relogin, scraper)
+        else:
+            # Next login() starts over; close the failed browser without waiting
+            executor = self._executor if self.shared else None
+            asyncio.get_running_loop().run_in_executor(executor, scraper.close)
+
+    def _reload(self, scraper):
+        """Soft refresh if enabled and due, otherwise (or if it fails) a full reload"""
+        if self.soft_refresh and self._soft_refreshes < self.hard_refresh_every - 1 and scraper.soft_refresh():
+            self._soft_refreshes += 1
+            return
+        scraper.refresh_page()
+        self._soft_refreshes = 0
+
+    async def supervise(self, critical=False):
+        """Sample the browser's health and recycle it once a limit is crossed.
+
+        Recycling is put off while `critical` (the ping may still be needed).
+        Pooled workers are not recycled since their browser is shared.
+        """
+        if self.health is None or self.scraper is None or self.shared or self._recovering:
+            return
+        if time.monotonic() - self._last_health < self.health_interval:
+            return
+        self._last_health = time.monotonic()
+        sample = await self._run(self._sample_health, self.check_timeout, self.scraper)
+        if sample:
+            self.last_sample = sample
+        verdict = self.health.record(sample) if sample else None
+        # A probe that failed or timed out counts towards replacing a dead or hung browser
+        await self._check_health()
+        if verdict is None or self.scraper is None:
+            return
+        reason, detail = verdict
+        if critical:
+            logger.warning(f"Browser degraded ({detail}); recycling once the ping is no longer pending")
+            return
+        await self.recycle(reason, detail)
+
+    def _sample_health(self, scraper):
+        """Blocking health sample, executed on the worker thread"""
+        return scraper.health_sample()
+
+    async def recycle(self, reason, detail=None):
+        """Replace the active browser without a new login, starting the new one before closing the old"""
+        old = self.scraper
+        if old is None or self.shared or self._recovering:
+            return
+        logger.warning(f"Recycling browser: {detail or reason}")
+        BROWSER_RECYCLES.inc(reason=reason)
+        if self.standby is not None:
+            # The standby is already running; retire the old browser, then refill the standby
+            self._promote_standby()
+            self.endpoint = None
+            await asyncio.get_running_loop().run_in_executor(self._executor, old.close)
+            await self._start_standby()
+            return
+        cookies = await self._run(old.export_cookies, self.check_timeout)
+        if cookies is None:
+            logger.error("Could not export cookies for the replacement browser; not recycling")
+            return
+        self._background(
+            self._create_browser, self._other_profile(old), cookies,
+            on_ready=functools.partial(self._on_recycled, old)
+        )
+
+    def _refresh_and_check(self, scraper):
+        """Blocking refresh + detection, executed on the worker thread"""
+        scraper.activate()
+        if self.tabs > 1:
+            # Opened lazily so a replaced or recycled browser gets its tabs too
+            if len(scraper.tab_handles) < self.tabs:
+                scraper.open_tabs(self.tabs)
+            scraper.next_tab()
+        self._reload(scraper)
+        self._last_refresh = time.monotonic()
+        return scraper.check_attendance_button()
+
+    def _watch(self, scraper, timeout):
+        """Blocking watch with a periodic safety refresh, executed on the worker thread"""
+        scraper.activate()
+        if time.monotonic() - self._last_refresh >= self.watch_refresh_interval:
+            # The SPA may not re-render on its own; reload now and then as a fallback
+            scraper.refresh_page()
+            self._last_refresh = time.monotonic()
+        return scraper.wait_for_attendance_button(timeout)
+
+    def _network_check(self, scraper):
+        """Blocking API poll with DOM confirmation, executed on the worker thread.
+
+        Until an endpoint is learned (and whenever it stops answering) this is a
+        normal refresh + check; the reload's traffic is then used to learn it.
+        """
+        if self.endpoint is None:
+            found = self._refresh_and_check(scraper)
+            if not found:
+                self.endpoint = AttendanceEndpoint.learn(scraper.driver, self._http)
+            return found
+
+        with STAGE_SECONDS.time(stage='api_poll'):
+            changed = self.endpoint.poll()
+        if changed is False:
+            return False
+        if changed is None:
+            # Session expired or endpoint moved; fall back and re-learn
+            self.endpoint = None
+            return self._refresh_and_check(scraper)
+
+        # Attendance state changed; confirm against the rendered page
+        found = self._refresh_and_check(scraper)
+        if not found:
+            relearned = AttendanceEndpoint.learn(scraper.driver, self._http)
+            if relearned:
+                self.endpoint = relearned
+            else:
+                self.endpoint.rebase()
+        return found
+
+    def _check(self, scraper, interval):
+        """One detection cycle in the configured mode, executed on the worker thread.
+
+        Records the cycle's duration and the WebDriver round-trips it made.
+        """
+        start = time.perf_counter()
+        trips = getattr(scraper.driver, 'round_trips', 0)
+        try:
+            if self.mode == 'watch':
+                return self._watch(scraper, interval)
+            if self.mode == 'network':
+                return self._network_check(scraper)
+            return self._refresh_and_check(scraper)
+        except Exception as e:
+            # Counts towards MAX_REFRESH_FAILURES like a failed reload (e.g. switching to a dead browser's tab)
+            scraper.failures += 1
+            FAILURES.inc(type='check')
+            logger.error(f"Check failed: {e}")
+            return False
+        finally:
+            STAGE_SECONDS.observe(time.perf_counter() - start, stage='check')
+            ROUND_TRIPS.observe(max(0, getattr(scraper.driver, 'round_trips', 0) - trips))
+
+    async def check(self, interval):
+        """Run one detection cycle in the configured mode.
+
+        In watch mode this waits up to `interval` seconds for the button;
+        the other modes return as soon as one check is done.
+        """
+        found = False
+        if self.scraper is not None:
+            if self.mode == 'watch':
+                # A shared browser thread can't be held by one tenant's long-poll,
+                # so pooled workers only read the observer's current state
+                interval = 0 if self.shared else interval
+                timeout = interval + self.check_timeout
+            else:
+                timeout = self.check_timeout
+            found = bool(await self._run(self._check, timeout, self.scraper, interval))
+        if not found:
+            await self._check_health()
+        return found
+
+    async def refresh_and_check(self):
+        """Refresh the dashboard and report whether the attendance button is visible"""
+        if self.scraper is None:
+            return False
+        return bool(await self._run(self._refresh_and_check, self.check_timeout, self.scraper))
+
+    async def watch(self, timeout):
+        """Wait up to `timeout` seconds for the button to appear without reloading the page"""
+        if self.scraper is None:
+            return False
+        return bool(await self._run(self._watch, timeout + self.check_timeout, self.scraper, timeout))
+
+    async def health_status(self):
+        """Readiness, standby and the latest health sample of this worker's browser"""
+        return {
+            'ready': self.ready, 'busy': self.busy, 'standby': self.standby is not None,
+            'mode': self.mode, 'tabs': self.tabs, 'timeouts': self._timeouts,
+            'failures': self.scraper.failures if self.scraper is not None else None,
+            'sample': self.last_sample,
+        }
+
+    async def screenshot(self, path):
+        """Save a screenshot of the active browser to `path`; returns the path, or None on failure"""
+        if self.scraper is None:
+            return None
+        saved = await self._run(self.scraper.driver.save_screenshot, self.check_timeout, path)
+        return path if saved else None
+
+    def browser_rss(self):
+        """Resident memory of the active browser's process tree, or None without one"""
+        return self.scraper.browser_rss() if self.scraper is not None else None
+
+    async def release(self):
+        """Close the browser (or pooled tab) but keep the worker threads; login() starts it again"""
+        loop = asyncio.get_running_loop()
+        self._parked = True
+        self.endpoint = None
+        if self.scraper is not None:
+            scraper, self.scraper = self.scraper, None
+            if not self.busy:
+                await loop.run_in_executor(self._executor, scraper.close)
+            else:
+                # Close it once the running call (e.g. a long-poll) lets go of the browser
+                self._pending.add_done_callback(lambda _future: self._close_on_worker(scraper))
+        if self.standby is not None:
+            standby, self.standby = self.standby, None
+            await loop.run_in_executor(self._standby_executor, standby.close)
+
+    async def close(self):
+        """Close the browser (or pooled tab) and stop the worker thread if owned"""
+        await self.release()
+        if not self.shared:
+            self._executor.shutdown(wait=False)
+        if self._standby_executor:
+            self._standby_executor.shutdown(wait=False)